@@ -0,0 +1,69 @@
+"""
+Shared OpenAI client, created on first use.
+
+Importing the openai SDK costs more than the rest of the project's
+startup put together, so nothing imports it at module level: workers,
+management commands and tests that never call the AI pay nothing.
+
+The first get_client() call builds one client per process on top of a
+keep-alive connection pool, and every later request reuses it (and its
+open TLS connections) instead of reconnecting to the API each time.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+_client = None
+_lock = threading.Lock()
+
+
+def _build_client():
+    import openai
+
+    # httpx.Limits, taken from openai so we don't depend on which httpx it bundles
+    limits = type(openai.DEFAULT_CONNECTION_LIMITS)(
+        max_connections=settings.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OPENAI_MAX_CONNECTIONS,
+        keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+    )
+    timeout = openai.Timeout(settings.OPENAI_TIMEOUT, connect=5.0)
+
+    return openai.OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        timeout=timeout,
+        max_retries=settings.OPENAI_MAX_RETRIES,
+        http_client=openai.DefaultHttpxClient(limits=limits, timeout=timeout),
+    )
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = _build_client()
+    return _client
+
+
+@contextmanager
+def override_client(client):
+    """Use `client` (e.g. benchmarks.fakes.FakeOpenAI) inside the block."""
+    global _client
+    with _lock:
+        previous, _client = _client, client
+    try:
+        yield client
+    finally:
+        with _lock:
+            _client = previous
+
+
+def close_client():
+    """Drop the pooled connections (the next call builds a new client)."""
+    global _client
+    with _lock:
+        client, _client = _client, None
+    if client is not None and hasattr(client, "close"):
+        client.close()
@@ -0,0 +1,168 @@
+"""
+Near-duplicate filter for AI-generated task titles.
+
+The model happily suggests "Go for a 5km run" for a goal that already
+has "go for a 5 km run", and AIAddTasks used to insert whatever it was
+given. filter_new() drops candidates that match an existing task of the
+goal (or an earlier candidate) after normalisation:
+
+- lowercase, accents folded, punctuation and extra spaces removed; the
+  same letters with different spacing are an exact match
+- character trigrams of the padded title, hashed into DIMENSIONS buckets
+- TF-IDF weights from the goal's own tasks, rows L2-normalised
+
+so one matrix product gives the cosine similarity of every candidate to
+every existing title, and anything at or above AI_DEDUPE_THRESHOLD is a
+duplicate.
+
+The existing titles' matrix is cached per process and per goal, keyed by
+a fingerprint of the goal's tasks (count, highest id, sum of versions):
+one aggregate query per call, and the titles are only re-read and
+re-vectorised after a task was added, edited or deleted. Bulk paths that
+skip Task.save() still change the count or the highest id.
+
+numpy is imported on first use, like the openai SDK in ai/client.py.
+
+Settings:
+    AI_DEDUPE_THRESHOLD    cosine similarity, default 0.7
+    AI_DEDUPE_CACHE_GOALS  goals kept in the per-process cache, default 256
+"""
+import re
+import threading
+import unicodedata
+
+from django.conf import settings
+from django.db.models import Count, Max, Sum
+
+from goals.models import Task
+
+THRESHOLD = getattr(settings, "AI_DEDUPE_THRESHOLD", 0.7)
+CACHE_GOALS = getattr(settings, "AI_DEDUPE_CACHE_GOALS", 256)
+
+# hashed trigram buckets; 4 KB per cached title as float32. hash() is
+# salted per process, which is fine: so is the cache.
+DIMENSIONS = 1024
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def normalize(title):
+    text = "".join(c for c in unicodedata.normalize("NFKD", str(title)) if not unicodedata.combining(c))
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def _compact(text):
+    return text.replace(" ", "")
+
+
+def _shingles(text):
+    padded = f" {text} "
+    return [padded[i:i + 3] for i in range(max(1, len(padded) - 2))]
+
+
+def _counts(texts):
+    """(len(texts), DIMENSIONS) float32 trigram counts."""
+    import numpy as np
+
+    rows, cols = [], []
+    for row, text in enumerate(texts):
+        buckets = [hash(s) % DIMENSIONS for s in _shingles(text)]
+        rows.extend([row] * len(buckets))
+        cols.extend(buckets)
+    flat = np.bincount(
+        np.asarray(rows, dtype=np.int64) * DIMENSIONS + np.asarray(cols, dtype=np.int64),
+        minlength=len(texts) * DIMENSIONS,
+    )
+    return flat.reshape(len(texts), DIMENSIONS).astype(np.float32)
+
+
+def _weigh(counts, idf):
+    import numpy as np
+
+    vectors = counts * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class TitleIndex:
+    """Normalised titles of one goal's tasks and their TF-IDF rows."""
+
+    def __init__(self, titles):
+        import numpy as np
+
+        texts = sorted({normalize(t) for t in titles} - {""})
+        # "5km run" == "5 km run"
+        self.exact = {_compact(t) for t in texts}
+        counts = _counts(texts)
+        # smoothed idf, so a bucket absent from every title still counts
+        df = np.count_nonzero(counts, axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+        self.vectors = _weigh(counts, self.idf)
+
+    def vectorize(self, texts):
+        return _weigh(_counts(texts), self.idf)
+
+
+def _fingerprint(goal):
+    row = Task.objects.filter(goal=goal).aggregate(n=Count("id"), last=Max("id"), versions=Sum("version"))
+    return row["n"], row["last"], row["versions"]
+
+
+def get_index(goal):
+    """TitleIndex for the goal's current tasks, rebuilt only when they changed."""
+    # goal ids repeat across shard databases
+    key = (goal._state.db, goal.pk)
+    fingerprint = _fingerprint(goal)
+    entry = _cache.get(key)
+    if entry is not None and entry[0] == fingerprint:
+        return entry[1]
+
+    index = TitleIndex(Task.objects.filter(goal=goal).values_list("title", flat=True))
+    with _lock:
+        if len(_cache) >= CACHE_GOALS:
+            _cache.clear()
+        _cache[key] = (fingerprint, index)
+    return index
+
+
+def filter_new(goal, titles, threshold=None):
+    """
+    Split candidate titles into (new, duplicates), both in input order.
+    A candidate is a duplicate if it is blank, normalises to an existing
+    title, or is at least `threshold` similar to an existing title or to
+    an earlier candidate.
+    """
+    import numpy as np
+
+    threshold = THRESHOLD if threshold is None else threshold
+    index = get_index(goal)
+    texts = [normalize(t) for t in titles]
+
+    new, duplicates = [], []
+    if not texts:
+        return new, duplicates
+
+    candidates = index.vectorize(texts)
+    if len(index.vectors):
+        best = (candidates @ index.vectors.T).max(axis=1)
+    else:
+        best = np.zeros(len(texts), dtype=np.float32)
+    among = candidates @ candidates.T
+
+    kept = []
+    for i, (title, text) in enumerate(zip(titles, texts)):
+        if (
+            not text
+            or _compact(text) in index.exact
+            or best[i] >= threshold
+            or any(among[i, j] >= threshold for j in kept)
+        ):
+            duplicates.append(title)
+        else:
+            kept.append(i)
+            new.append(title)
+    return new, duplicates
@@ -1,15 +1,19 @@
+import json
+
+from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
+from backend.metrics import record_timing
 from goals.models import Goal, Task
-from openai import OpenAI
-import os
 
-# -----------------------------------------------------
-# LOAD API KEY SAFELY FROM .env
-# -----------------------------------------------------
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# OpenAI client is created lazily (API key from .env), see ai/client.py
+from .client import get_client
+from .dedupe import filter_new
+
+BATCH_MAX_GOALS = getattr(settings, "AI_BATCH_MAX_GOALS", 100)
+BATCH_GOALS_PER_CALL = getattr(settings, "AI_BATCH_GOALS_PER_CALL", 25)
 
 
 # -----------------------------------------------------
@@ -44,13 +48,14 @@ class AISuggestions(APIView):
         """
 
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=180
-            )
+            with record_timing("ai"):
+                response = get_client().chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=180
+                )
         except Exception as e:
             return Response({"error": str(e)}, status=500)
 
@@ -66,6 +71,132 @@ class AISuggestions(APIView):
         return Response({"list": suggestions[:3]})
 
 
+# -----------------------------------------------------
+# 1️⃣b AI – SUGGESTIONS FOR MANY GOALS AT ONCE
+# -----------------------------------------------------
+BATCH_PROMPT = """You are an AI productivity coach.
+
+For each goal below, generate 3 short, unique, simple improvement
+suggestions. Do NOT repeat the same text across goals.
+
+Answer with a JSON object only, mapping each goal id (as a string) to
+a list of its 3 suggestions: {"<id>": ["...", "...", "..."]}
+
+Goals, one JSON array per line: [id, title, description, category, priority, start, end]
+"""
+
+
+def _clean_suggestions(items):
+    return [
+        s.replace("•", "").replace("-", "").strip()
+        for s in items
+        if isinstance(s, str) and s.strip()
+    ][:3]
+
+
+def suggest_for_goals(goals):
+    """
+    One upstream call for a list of goals: the instructions once, then a
+    compact JSON row per goal; per-goal answers come back as one JSON
+    object. Returns {goal id: [suggestions]} for the goals answered.
+    """
+    rows = "\n".join(
+        json.dumps(
+            [
+                goal.id,
+                goal.title,
+                goal.description,
+                goal.category,
+                goal.priority,
+                str(goal.start_date),
+                str(goal.end_date),
+            ],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        for goal in goals
+    )
+    with record_timing("ai"):
+        response = get_client().chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "user", "content": BATCH_PROMPT + rows}
+            ],
+            response_format={"type": "json_object"},
+            # same budget per goal as AISuggestions
+            max_tokens=180 * len(goals),
+        )
+
+    try:
+        answers = json.loads(response.choices[0].message.content)
+    except (TypeError, ValueError):
+        return {}
+    if not isinstance(answers, dict):
+        return {}
+
+    results = {}
+    for goal in goals:
+        suggestions = answers.get(str(goal.id))
+        if isinstance(suggestions, list):
+            suggestions = _clean_suggestions(suggestions)
+            if suggestions:
+                results[goal.id] = suggestions
+    return results
+
+
+def _goal_id(value):
+    # AISuggestions takes "12" as well as 12; so does the batch
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(value)
+    return int(value)
+
+
+class AISuggestionsBatch(APIView):
+    """
+    POST {"goal_ids": [...]}: suggestions for up to AI_BATCH_MAX_GOALS
+    goals, AI_BATCH_GOALS_PER_CALL per upstream call instead of one call
+    (and one copy of the instructions) per goal.
+
+    200 {"results": {"<id>": [...]}, "missing": [ids not found],
+         "failed": [ids without an answer; retry them one by one]}
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        goal_ids = request.data.get("goal_ids")
+        try:
+            if not isinstance(goal_ids, list) or not goal_ids:
+                raise ValueError(goal_ids)
+            goal_ids = list(dict.fromkeys(_goal_id(i) for i in goal_ids))
+        except (TypeError, ValueError):
+            return Response({"error": "goal_ids must be a non-empty list of ids"}, status=400)
+        if len(goal_ids) > BATCH_MAX_GOALS:
+            return Response({"error": f"At most {BATCH_MAX_GOALS} goals per request"}, status=400)
+
+        goals = {
+            goal.id: goal
+            for goal in Goal.objects.filter(id__in=goal_ids, user=request.user).only(
+                "id", "title", "description", "category", "priority", "start_date", "end_date"
+            )
+        }
+        found = [goals[i] for i in goal_ids if i in goals]
+
+        results, errors = {}, []
+        for start in range(0, len(found), BATCH_GOALS_PER_CALL):
+            try:
+                results.update(suggest_for_goals(found[start:start + BATCH_GOALS_PER_CALL]))
+            except Exception as e:
+                errors.append(str(e))
+        if found and not results and errors:
+            return Response({"error": errors[0]}, status=500)
+
+        return Response({
+            "results": {str(goal.id): results[goal.id] for goal in found if goal.id in results},
+            "missing": [i for i in goal_ids if i not in goals],
+            "failed": [goal.id for goal in found if goal.id not in results],
+        })
+
+
 # -----------------------------------------------------
 # 2️⃣ AI – GENERATE TASKS
 # -----------------------------------------------------
@@ -91,12 +222,13 @@ class AIGenerateTasks(APIView):
         """
 
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            with record_timing("ai"):
+                response = get_client().chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                )
         except Exception as e:
             return Response({"error": str(e)}, status=500)
 
@@ -108,7 +240,10 @@ class AIGenerateTasks(APIView):
             if t.strip()
         ]
 
-        return Response({"tasks": tasks[:count]})
+        # drop what the goal already has (or the model repeated)
+        tasks, duplicates = filter_new(goal, tasks)
+
+        return Response({"tasks": tasks[:count], "duplicates": duplicates})
 
 
 # -----------------------------------------------------
@@ -127,8 +262,9 @@ class AIAddTasks(APIView):
         except Goal.DoesNotExist:
             return Response({"error": "Goal not found"}, status=404)
 
-        # Save each task
+        # Save each task that isn't already on the goal
+        tasks, duplicates = filter_new(goal, tasks)
         for title in tasks:
             Task.objects.create(goal=goal, title=title)
 
-        return Response({"success": True})
+        return Response({"success": True, "added": len(tasks), "skipped": duplicates})
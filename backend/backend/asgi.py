@@ -5,6 +5,12 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Run with e.g. `uvicorn backend.asgi:application --workers 4`. The auth
+views (goals/auth_views.py) are async and wait for password hashing
+without holding a worker; the DRF API views stay sync and Django runs
+them in its thread. Every middleware in settings.MIDDLEWARE is
+async-capable, so nothing forces the async views back onto that thread.
 """
 
 import os
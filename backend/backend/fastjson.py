@@ -0,0 +1,69 @@
+"""
+Faster JSON renderer / parser for DRF.
+
+Drop-in replacements for rest_framework's JSONRenderer / JSONParser that
+use orjson when it is installed (and the stdlib json module otherwise).
+orjson encodes dicts, lists, strings, datetimes, dates and UUIDs in C;
+anything else goes through DRF's own JSONEncoder.default(), so Decimal,
+timedelta, lazy strings, querysets etc. come out exactly as before.
+
+The output matches DRF's compact, non-ASCII-escaped default. Requests
+that ask for indentation (the browsable API, `Accept: ...; indent=4`)
+are handed to DRF's renderer unchanged.
+
+Settings:
+    JSON_BACKEND   "orjson" (default) or "json"
+"""
+import codecs
+
+from django.conf import settings
+from rest_framework import parsers, renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _use_orjson():
+    return orjson is not None and getattr(settings, "JSON_BACKEND", "orjson") == "orjson"
+
+
+_drf_default = JSONEncoder().default
+
+# DRF writes UTC datetimes as "...Z"; naive datetimes stay naive
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def dumps(data):
+    """bytes, same as DRF's compact JSONRenderer output."""
+    return orjson.dumps(data, default=_drf_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if not _use_orjson() or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(parsers.JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not _use_orjson():
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            body = stream.read() if stream is not None else b""
+            if codecs.lookup(encoding).name != "utf-8":
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except (ValueError, LookupError) as exc:
+            raise ParseError(f"JSON parse error - {exc}")
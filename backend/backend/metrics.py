@@ -0,0 +1,335 @@
+"""
+Per-request performance metrics.
+
+MetricsMiddleware records, for a sampled share of requests:
+
+- wall time of the whole request
+- DB query count and DB time (an execute_wrapper on every connection)
+- serialize time: building `serializer.data` for serializers using
+  TimedSerializerMixin, and the list fast path (goals/fastpath.py);
+  queries it triggers count under db as well
+- response render time: DRF / template responses turned into bytes
+- outbound AI time (code wrapped in ``record_timing("ai")``)
+- password hashing time (goals/passwords.py)
+
+Numbers are aggregated per (method, route) in this process and exposed
+in Prometheus text format at /api/metrics/ (staff only). With
+METRICS_SERVER_TIMING on, the same numbers go out as a Server-Timing
+header so they show up in the browser dev tools.
+
+Settings:
+    METRICS_ENABLED        default True
+    METRICS_SAMPLE_RATE    0.0 - 1.0, default 1.0
+    METRICS_SERVER_TIMING  default DEBUG
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import IsAdminUser
+from rest_framework.serializers import ListSerializer
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+METRICS_ENABLED = getattr(settings, "METRICS_ENABLED", True)
+SAMPLE_RATE = getattr(settings, "METRICS_SAMPLE_RATE", 1.0)
+SERVER_TIMING = getattr(settings, "METRICS_SERVER_TIMING", settings.DEBUG)
+
+# seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+PHASES = ("db", "serialize", "render", "ai", "compress", "hash")
+
+_current = ContextVar("request_timings", default=None)
+
+
+# -----------------------------
+# PER-REQUEST RECORDING
+# -----------------------------
+class RequestTimings:
+    __slots__ = ("phases", "queries")
+
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def record_timing(phase):
+    """
+    Add the time spent in the block to `phase` for the current request.
+    No-op outside a sampled request.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
+
+
+class TimedListSerializer(ListSerializer):
+    @property
+    def data(self):
+        with record_timing("serialize"):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    Serializer mixin: building `.data` counts as the "serialize" phase,
+    for one object and for many=True lists (through TimedListSerializer
+    unless Meta names a list_serializer_class of its own).
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        meta = getattr(cls, "Meta", None)
+        if meta is not None and not hasattr(meta, "list_serializer_class"):
+            meta.list_serializer_class = TimedListSerializer
+
+    @property
+    def data(self):
+        with record_timing("serialize"):
+            return super().data
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.add("db", time.perf_counter() - start)
+
+
+def _install(connection):
+    if _db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_wrapper)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    # Connections are per thread: under ASGI the ORM runs in
+    # sync_to_async threads, not the middleware's. Wrapping each
+    # connection as it opens covers every thread; the wrapper finds the
+    # request through _current, which sync_to_async copies across.
+    _install(connection)
+
+
+connection_created.connect(_on_connection_created)
+
+
+# -----------------------------
+# AGGREGATION
+# -----------------------------
+class RouteStats:
+    __slots__ = ("count", "duration_sum", "buckets", "queries", "phases", "statuses")
+
+    def __init__(self):
+        self.count = 0
+        self.duration_sum = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.queries = 0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.statuses = {}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def observe(self, method, route, status, duration, timings):
+        with self._lock:
+            stats = self._routes.get((method, route))
+            if stats is None:
+                stats = self._routes[(method, route)] = RouteStats()
+
+            stats.count += 1
+            stats.duration_sum += duration
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[i] += 1
+            stats.queries += timings.queries
+            for phase, seconds in timings.phases.items():
+                stats.phases[phase] = stats.phases.get(phase, 0.0) + seconds
+
+            status_class = f"{status // 100}xx"
+            stats.statuses[status_class] = stats.statuses.get(status_class, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+
+    def render_prometheus(self):
+        with self._lock:
+            routes = sorted(self._routes.items())
+
+            lines = [
+                "# HELP http_request_duration_seconds Wall time per request.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), s in routes:
+                labels = f'method="{method}",route="{_escape(route)}"'
+                for bound, n in zip(DURATION_BUCKETS, s.buckets):
+                    lines.append(
+                        f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {n}'
+                    )
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {s.count}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {s.duration_sum:.6f}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {s.count}")
+
+            lines += [
+                "# HELP http_requests_total Sampled requests by status class.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route), s in routes:
+                for status_class, n in sorted(s.statuses.items()):
+                    lines.append(
+                        f'http_requests_total{{method="{method}",route="{_escape(route)}",'
+                        f'status="{status_class}"}} {n}'
+                    )
+
+            lines += [
+                "# HELP http_request_db_queries_total DB queries issued by sampled requests.",
+                "# TYPE http_request_db_queries_total counter",
+            ]
+            for (method, route), s in routes:
+                lines.append(
+                    f'http_request_db_queries_total{{method="{method}",route="{_escape(route)}"}} {s.queries}'
+                )
+
+            lines += [
+                f"# HELP http_request_phase_seconds_total Time spent per phase ({', '.join(PHASES)}).",
+                "# TYPE http_request_phase_seconds_total counter",
+            ]
+            for (method, route), s in routes:
+                for phase, seconds in sorted(s.phases.items()):
+                    lines.append(
+                        f'http_request_phase_seconds_total{{method="{method}",'
+                        f'route="{_escape(route)}",phase="{phase}"}} {seconds:.6f}'
+                    )
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+registry = MetricsRegistry()
+
+
+def _sampled():
+    return METRICS_ENABLED and (SAMPLE_RATE >= 1 or random.random() < SAMPLE_RATE)
+
+
+# -----------------------------
+# MIDDLEWARE
+# -----------------------------
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        # this thread's connections may have opened before this module
+        # was imported
+        for conn in connections.all(initialized_only=True):
+            _install(conn)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not _sampled():
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, time.perf_counter() - start, timings)
+
+    async def __acall__(self, request):
+        if not _sampled():
+            return await self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, time.perf_counter() - start, timings)
+
+    def finish(self, request, response, duration, timings):
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match and match.route else "unmatched"
+        registry.observe(request.method, route, response.status_code, duration, timings)
+
+        if SERVER_TIMING:
+            parts = [f"total;dur={duration * 1000:.1f}"]
+            parts.append(
+                f'db;dur={timings.phases["db"] * 1000:.1f};desc="{timings.queries} queries"'
+            )
+            for phase in PHASES[1:]:
+                if timings.phases[phase]:
+                    parts.append(f"{phase};dur={timings.phases[phase] * 1000:.1f}")
+            response["Server-Timing"] = ", ".join(parts)
+
+        return response
+
+    def process_template_response(self, request, response):
+        # runs right before render(); the callback right after it
+        timings = _current.get()
+        if timings is not None:
+            start = time.perf_counter()
+
+            def done(rendered):
+                timings.add("render", time.perf_counter() - start)
+
+            response.add_post_render_callback(done)
+        return response
+
+
+# -----------------------------
+# METRICS ENDPOINT (STAFF ONLY)
+# -----------------------------
+class MetricsView(APIView):
+    authentication_classes = [
+        *api_settings.DEFAULT_AUTHENTICATION_CLASSES,
+        SessionAuthentication,
+    ]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(
+            registry.render_prometheus(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
@@ -313,6 +313,8 @@ from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
 import os
+import re
+from corsheaders.defaults import default_headers as default_cors_headers
 
 # ---------------------------------------------------
 # BASE DIR
@@ -354,8 +356,24 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 # ---------------------------------------------------
 MIDDLEWARE = [
+    # Per-route timings / query counts (first, so it sees everything)
+    'backend.metrics.MetricsMiddleware',
+
+    # fresh shard selection per request (goals/sharding.py)
+    'goals.sharding.ShardMiddleware',
+
+    # replica reads for GETs, read-your-writes pinning (goals/replicas.py)
+    'goals.replicas.ReplicaMiddleware',
+
     'django.middleware.security.SecurityMiddleware',
 
+    # Static files (WhiteNoise: compressed + far-future cached) before anything
+    # else; async-capable so the stack stays async under ASGI
+    'backend.staticfiles.StaticFilesMiddleware',
+
+    # brotli / gzip for everything WhiteNoise didn't serve
+    'backend.compression.CompressionMiddleware',
+
     # CORS middleware FIRST
     'corsheaders.middleware.CorsMiddleware',
 
@@ -392,13 +410,51 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # ---------------------------------------------------
 # DATABASE
 # ---------------------------------------------------
+DB_DIR = Path(os.getenv("DB_DIR", BASE_DIR))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': DB_DIR / 'db.sqlite3',
     }
 }
 
+# DB_SHARDS=N spreads per-user data over N more SQLite files, one write
+# lock each (goals/sharding.py). Run `manage.py migrate_shards` after
+# changing it, then `manage.py rebalance_shards`.
+DATABASE_SHARDS = [f"shard_{i}" for i in range(int(os.getenv("DB_SHARDS", "0")))]
+for _alias in DATABASE_SHARDS:
+    DATABASES[_alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': DB_DIR / f'db_{_alias}.sqlite3',
+    }
+
+# DB_REPLICAS=N gives each database above N read-only copies that serve
+# GET requests (goals/replicas.py). Locally they are file copies kept
+# fresh by `manage.py sync_replicas --every 2`.
+DB_REPLICAS = int(os.getenv("DB_REPLICAS", "0"))
+DATABASE_REPLICAS = {}
+for _alias in list(DATABASES) if DB_REPLICAS else []:
+    _path = Path(DATABASES[_alias]['NAME'])
+    DATABASE_REPLICAS[_alias] = [f"{_alias}_replica_{i}" for i in range(DB_REPLICAS)]
+    for _i, _replica in enumerate(DATABASE_REPLICAS[_alias]):
+        DATABASES[_replica] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': f"file:{_path.with_name(f'{_path.stem}.replica{_i}{_path.suffix}')}?mode=ro",
+            'TEST': {'MIRROR': _alias},
+        }
+
+# A user's reads stay on the primary this long after they write; must
+# be longer than the replicas' lag
+READ_REPLICA_PIN_SECONDS = 10
+
+if DATABASE_SHARDS:
+    DATABASE_ROUTERS = ["goals.sharding.UserShardRouter"]
+elif DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ["goals.replicas.ReplicaRouter"]
+else:
+    DATABASE_ROUTERS = []
+
 # ---------------------------------------------------
 # PASSWORD VALIDATORS
 # ---------------------------------------------------
@@ -428,26 +484,162 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# collectstatic writes hashed names + .gz/.br variants next to each file
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+
+
+def _immutable_static_file(path, url):
+    # Django manifest hashes (name.<12 hex>.ext) and CRA build hashes
+    # (main.<8 hex>.js, 123.<8 hex>.chunk.js) never change content
+    return bool(re.search(r"\.[0-9a-f]{8,}\.", url))
+
+
+WHITENOISE_IMMUTABLE_FILE_TEST = _immutable_static_file
+WHITENOISE_MAX_AGE = 60 * 60  # non-hashed files
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Avatar thumbnails (see goals/thumbnails.py)
+AVATAR_THUMBNAIL_SIZES = (32, 64, 256)
+AVATAR_THUMBNAIL_FORMAT = "WEBP"  # falls back to JPEG without WebP support
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ---------------------------------------------------
+# CACHE
+# ---------------------------------------------------
+# Per-process memory cache by default; set REDIS_URL to share it
+# between workers.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+
+# Reuse the resolved JWT user/profile (goals/authentication.py). A
+# deactivation or password change only reaches the other workers through
+# a cache they all share, so this is on with REDIS_URL only; set
+# AUTH_USER_CACHE=True without it for single-process deployments.
+AUTH_USER_CACHE = os.getenv("AUTH_USER_CACHE", str(bool(os.getenv("REDIS_URL")))) == "True"
+# Seconds a resolved user is reused
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# ---------------------------------------------------
+# HABIT BITMAPS (goals/bitmaps.py)
+# ---------------------------------------------------
+# Serve completed_dates / streak from the per-year bitmaps instead of
+# HabitCompletion rows. Run `manage.py rebuild_habit_bitmaps --verify`
+# once before switching this on.
+HABIT_BITMAP_READS = os.getenv("HABIT_BITMAP_READS", "False") == "True"
+
+# ---------------------------------------------------
+# LIST ENDPOINTS (goals/fastpath.py)
+# ---------------------------------------------------
+# Build GET /api/goals/ and /api/tasks/ from .values() rows instead of
+# ModelSerializer instances (same JSON, much less per-row work)
+LIST_FAST_PATH = os.getenv("LIST_FAST_PATH", "True") == "True"
+
+# ---------------------------------------------------
+# OPENAI CLIENT (ai/client.py)
+# ---------------------------------------------------
+# One pooled client per process, kept-alive connections are reused
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY = 60.0
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+OPENAI_MAX_RETRIES = 2
+
+# POST /api/ai/suggestions/batch/ (ai/views.py): goals per request, and
+# goals packed into one upstream call
+AI_BATCH_MAX_GOALS = 100
+AI_BATCH_GOALS_PER_CALL = 25
+
+# Generated tasks at least this similar (TF-IDF cosine over character
+# trigrams, ai/dedupe.py) to one the goal already has are dropped
+AI_DEDUPE_THRESHOLD = 0.7
+AI_DEDUPE_CACHE_GOALS = 256
+
+# ---------------------------------------------------
+# REQUEST METRICS (backend/metrics.py)
+# ---------------------------------------------------
+METRICS_ENABLED = True
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", "1.0"))
+METRICS_SERVER_TIMING = DEBUG
+
+# ---------------------------------------------------
+# SOFT DELETE PURGER (goals/purge.py)
+# ---------------------------------------------------
+PURGE_CHUNK_SIZE = 2000
+PURGE_CHUNK_PAUSE = 0.01
+
+# ---------------------------------------------------
+# HOT / COLD ARCHIVAL (goals/archive.py, `manage.py archive_history`)
+# ---------------------------------------------------
+ARCHIVE_GOALS_AFTER_DAYS = 180
+ARCHIVE_COMPLETIONS_AFTER_YEARS = 2
+ARCHIVE_BATCH_SIZE = 500
+ARCHIVE_BATCH_PAUSE = 0.01
+
+# ---------------------------------------------------
+# PASSWORD HASHING (goals/passwords.py)
+# ---------------------------------------------------
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+PASSWORD_HASH_QUEUE = 32
+
+# ---------------------------------------------------
+# RESPONSE ENCODING
+# ---------------------------------------------------
+JSON_BACKEND = os.getenv("JSON_BACKEND", "orjson")  # or "json"
+COMPRESSION_ENABLED = True
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 5
+COMPRESSION_GZIP_LEVEL = 6
+
 # ---------------------------------------------------
 # CORS
 # ---------------------------------------------------
 CORS_ALLOW_ALL_ORIGINS = False
+# optimistic concurrency on goals / tasks (goals/concurrency.py)
+CORS_ALLOW_HEADERS = (*default_cors_headers, "if-match")
+CORS_EXPOSE_HEADERS = ["ETag"]
 
 # ---------------------------------------------------
 # REST FRAMEWORK (JWT)
 # ---------------------------------------------------
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # JWTAuthentication + cached user/profile lookup
+        "goals.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # orjson-backed JSON (falls back to DRF's encoder, see backend/fastjson.py)
+    "DEFAULT_RENDERER_CLASSES": (
+        "backend.fastjson.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "backend.fastjson.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 # ---------------------------------------------------
@@ -461,4 +653,15 @@ SIMPLE_JWT = {
     "LEEWAY": 30,
     "AUTH_HEADER_TYPES": ("Bearer",),
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
+    # rejects / revokes rotated refresh tokens (goals/revocation.py)
+    "TOKEN_REFRESH_SERIALIZER": "goals.serializers.RevokingTokenRefreshSerializer",
 }
+
+# ---------------------------------------------------
+# REFRESH TOKEN REVOCATION (goals/revocation.py)
+# ---------------------------------------------------
+REVOCATION_SYNC_INTERVAL = 5
+REVOCATION_REBUILD_INTERVAL = 60 * 60
+REVOCATION_ERROR_RATE = 0.001
+REVOCATION_PRUNE_EVERY = 1000
+REVOCATION_PURGE_BATCH = 5000
@@ -0,0 +1,40 @@
+"""
+WhiteNoise middleware that also runs natively under ASGI.
+
+WhiteNoiseMiddleware is sync-only. One sync middleware in the stack makes
+Django run everything inside it on the single thread it uses for sync
+code, async views included, so the async auth views (goals/auth_views.py)
+would queue behind each other again. Here the hot path, a dict lookup that
+misses for every API request, stays on the event loop; only an actual
+file hit goes to a thread to open the file.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # stats the filesystem
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(
+                request.path_info
+            )
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
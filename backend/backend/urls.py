@@ -1,13 +1,16 @@
 
 from django.contrib import admin
 from django.urls import path, include, re_path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenRefreshView
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.generic import TemplateView
+
+from .metrics import MetricsView
+from .views import spa_index
+from goals.auth_views import obtain_token
 
 # AI views
-from ai.views import AISuggestions, AIGenerateTasks, AIAddTasks
+from ai.views import AISuggestions, AISuggestionsBatch, AIGenerateTasks, AIAddTasks
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -15,14 +18,18 @@ urlpatterns = [
     # Main app
     path("api/", include("goals.urls")),
 
-    # JWT Authentication
-    path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
+    # JWT Authentication (login hashes off the event loop, see goals/auth_views.py)
+    path("api/token/", obtain_token, name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
 
     # AI API Endpoints
     path("api/ai/suggestions/", AISuggestions.as_view()),
+    path("api/ai/suggestions/batch/", AISuggestionsBatch.as_view()),
     path("api/ai/generate_tasks/", AIGenerateTasks.as_view()),
     path("api/ai/add_tasks/", AIAddTasks.as_view()),
+
+    # Prometheus metrics (staff only)
+    path("api/metrics/", MetricsView.as_view()),
 ]
 
 # Media files
@@ -34,5 +41,5 @@ if settings.DEBUG:
 # -----------------------------
 # Any URL that doesn't match API should load React index.html
 urlpatterns += [
-    re_path(r"^(?!api/).*", TemplateView.as_view(template_name="index.html")),
+    re_path(r"^(?!api/).*", spa_index),
 ]
@@ -0,0 +1,68 @@
+"""
+React index.html served straight from memory.
+
+The SPA shell never uses template tags, so running it through the template
+engine on every navigation is wasted work. The file is read once and kept
+as bytes together with an ETag; browsers revalidate it (no-cache) while the
+hashed JS/CSS it points at are cached forever by WhiteNoise.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified, Http404
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_safe
+
+INDEX_PATH = settings.BASE_DIR / "build" / "index.html"
+
+_index_cache = {}
+_index_lock = threading.Lock()
+
+
+def _load_index():
+    try:
+        mtime = INDEX_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise Http404("React build not found, run `npm run build` first")
+
+    cached = _index_cache.get("index")
+    if cached is not None and cached[0] == mtime:
+        return cached
+
+    with _index_lock:
+        content = INDEX_PATH.read_bytes()
+        etag = '"%s"' % hashlib.md5(content).hexdigest()
+        cached = (mtime, content, etag)
+        _index_cache["index"] = cached
+    return cached
+
+
+def _cached_index():
+    # outside DEBUG the build can't change under a running worker,
+    # so skip even the stat() call
+    cached = _index_cache.get("index")
+    if cached is not None and not settings.DEBUG:
+        return cached
+    return _load_index()
+
+
+def _etag_matches(header, etag):
+    # weak comparison: CompressionMiddleware hands out W/"..." for the
+    # compressed body, and browsers send that back
+    tags = parse_etags(header or "")
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+
+@require_safe
+def spa_index(request):
+    _, content, etag = _cached_index()
+
+    if _etag_matches(request.headers.get("If-None-Match"), etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type="text/html; charset=utf-8")
+
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    return response
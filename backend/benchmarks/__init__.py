@@ -0,0 +1,11 @@
+"""
+Benchmark harness for the REST API.
+
+    python manage.py benchmark                      # default dataset + scenarios
+    python manage.py benchmark --users 20 --years 5
+    python manage.py benchmark --compare benchmarks/results/<old>.json
+
+Runs against a throwaway test database, so the dev db.sqlite3 is never
+touched. See datagen.py (deterministic data), fakes.py (fake OpenAI
+client) and harness.py (scenarios + reporting).
+"""
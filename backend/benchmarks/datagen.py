@@ -0,0 +1,111 @@
+"""
+Deterministic data generator.
+
+Same seed + same parameters => same rows, so runs on different commits
+(and on different days) measure the same workload. Dates count back from
+the spec's `anchor`, not from the day the benchmark runs.
+"""
+import random
+from dataclasses import dataclass, asdict
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+
+from goals import rollups, search
+from goals.models import Goal, Task, Habit, HabitCompletion
+
+CATEGORIES = ["Health", "Career", "Learning", "Finance", "General"]
+PRIORITIES = ["High", "Medium", "Low"]
+WORDS = (
+    "read write run plan learn build ship review practice cook save study "
+    "sleep stretch call clean draft design test refactor walk meditate"
+).split()
+
+
+@dataclass
+class DatasetSpec:
+    users: int = 5
+    goals_per_user: int = 20
+    tasks_per_goal: int = 25
+    habits_per_user: int = 8
+    years: int = 2
+    # share of days a habit is checked off
+    completion_rate: float = 0.6
+    seed: int = 42
+    # the dataset's "today"
+    anchor: date = date(2025, 1, 1)
+
+    @property
+    def now(self):
+        """Noon UTC on the anchor day."""
+        return datetime.combine(self.anchor, time(12), tzinfo=dt_timezone.utc)
+
+    def as_dict(self):
+        return {**asdict(self), "anchor": self.anchor.isoformat()}
+
+
+def _title(rng, words=3):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def generate(spec, today=None, password="bench-pass-123"):
+    """
+    Create users, goals, tasks, habits and completions. Returns the list
+    of created users (all share `password`).
+    """
+    rng = random.Random(spec.seed)
+    today = today or spec.anchor
+    first_day = today - timedelta(days=365 * spec.years)
+    now = datetime.combine(today, time(12), tzinfo=dt_timezone.utc)
+
+    users = []
+    for u in range(spec.users):
+        user = User.objects.create_user(username=f"bench_user_{u}", password=password)
+        users.append(user)
+
+        goals = Goal.objects.bulk_create(
+            Goal(
+                user=user,
+                title=_title(rng),
+                description=_title(rng, 12),
+                start_date=first_day + timedelta(days=rng.randint(0, 300)),
+                end_date=today + timedelta(days=rng.randint(1, 365)),
+                category=rng.choice(CATEGORIES),
+                priority=rng.choice(PRIORITIES),
+                order=i,
+            )
+            for i in range(spec.goals_per_user)
+        )
+
+        tasks = []
+        for goal in goals:
+            for _ in range(spec.tasks_per_goal):
+                done = rng.random() < 0.5
+                tasks.append(Task(
+                    goal=goal,
+                    title=_title(rng, 4),
+                    completed=done,
+                    completed_at=now - timedelta(days=rng.randint(0, 365 * spec.years)) if done else None,
+                ))
+        Task.objects.bulk_create(tasks, batch_size=2000)
+        Goal.recalculate_progress_for(g.id for g in goals)
+
+        habits = Habit.objects.bulk_create(
+            Habit(user=user, goal=rng.choice(goals), title=_title(rng, 2))
+            for _ in range(spec.habits_per_user)
+        )
+
+        completions = []
+        days = (today - first_day).days
+        for habit in habits:
+            for offset in range(days):
+                if rng.random() < spec.completion_rate:
+                    completions.append(
+                        HabitCompletion(habit=habit, date=first_day + timedelta(days=offset))
+                    )
+        HabitCompletion.objects.bulk_create(completions, batch_size=5000)
+
+    # bulk_create skips the signals that maintain the rollups / search index
+    rollups.rebuild([user.id for user in users])
+    search.rebuild([user.id for user in users])
+    return users
@@ -0,0 +1,72 @@
+"""
+Fake OpenAI client: same call shape as `client.chat.completions.create`,
+fixed answers and an optional artificial latency, no network.
+
+Asked for a JSON object (response_format), it answers the batch prompt
+of ai/views.py: a list of suggestions for every goal row (a JSON array
+on its own line) in the prompt. Token usage is estimated at 4 characters
+per token, enough to compare prompts.
+
+Plain answers are distinct lines, so ai/dedupe.py doesn't fold them
+into one.
+"""
+import json
+import time
+from types import SimpleNamespace
+
+
+LINES = (
+    "Block thirty minutes on the calendar",
+    "Write down the next three steps",
+    "Ask a friend to check in weekly",
+    "Review progress every Sunday evening",
+    "Remove one distraction from your desk",
+    "Set a reminder on your phone",
+    "Split the goal into monthly milestones",
+    "Celebrate each finished milestone",
+)
+
+
+def _line(i):
+    line = LINES[i % len(LINES)]
+    return line if i < len(LINES) else f"{line} (round {i // len(LINES) + 1})"
+
+
+def _tokens(text):
+    return max(1, len(text) // 4)
+
+
+class FakeCompletions:
+    def __init__(self, latency=0.0, lines=5):
+        self.latency = latency
+        self.lines = lines
+        self.calls = []
+
+    def _answer(self, prompt, response_format):
+        if (response_format or {}).get("type") != "json_object":
+            return "\n".join(f"- {_line(i)}" for i in range(self.lines))
+        # one [id, title, ...] row per goal
+        goals = [json.loads(line) for line in prompt.splitlines() if line.startswith("[")]
+        return json.dumps({
+            str(goal_id): [f"Fake suggestion {i + 1} for {title}" for i in range(self.lines)]
+            for goal_id, title, *_ in goals
+        })
+
+    def create(self, model=None, messages=None, response_format=None, **kwargs):
+        self.calls.append({"model": model, "messages": messages, "response_format": response_format, **kwargs})
+        if self.latency:
+            time.sleep(self.latency)
+
+        prompt = "".join(m["content"] for m in messages or ())
+        text = self._answer(prompt, response_format)
+        usage = SimpleNamespace(prompt_tokens=_tokens(prompt), completion_tokens=_tokens(text))
+        usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+            usage=usage,
+        )
+
+
+class FakeOpenAI:
+    def __init__(self, latency=0.0, lines=5):
+        self.chat = SimpleNamespace(completions=FakeCompletions(latency, lines))
@@ -0,0 +1,268 @@
+"""
+Scenario runner + reporting.
+
+Each scenario is a function taking a BenchContext and issuing one request
+through the DRF test client (full middleware / auth / serializer stack,
+no network). run() times every call, counts DB queries and returns a
+JSON-serialisable report with p50 / p95 / p99 latency and throughput.
+"""
+import json
+import math
+import platform
+import random
+import subprocess
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+import django
+from django.db import connection
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ai.client import override_client
+from goals.models import Goal, Task, Habit
+
+from .datagen import WORDS
+from .fakes import FakeOpenAI
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+@dataclass
+class BenchContext:
+    client: APIClient
+    user: object
+    rng: random.Random
+    goal_ids: list = field(default_factory=list)
+    task_state: dict = field(default_factory=dict)
+    habit_ids: list = field(default_factory=list)
+    # the dataset's anchor; habit history windows end here
+    today: object = None
+
+
+def make_context(user, seed=0, today=None):
+    client = APIClient()
+    token = RefreshToken.for_user(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    return BenchContext(
+        client=client,
+        user=user,
+        rng=random.Random(seed),
+        goal_ids=list(Goal.objects.filter(user=user).values_list("id", flat=True)),
+        task_state=dict(
+            Task.objects.filter(goal__user=user).values_list("id", "completed")
+        ),
+        habit_ids=list(Habit.objects.filter(user=user).values_list("id", flat=True)),
+        today=today,
+    )
+
+
+# -----------------------------
+# SCENARIOS
+# -----------------------------
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(fn):
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+
+@scenario("list_goals")
+def list_goals(ctx):
+    return ctx.client.get("/api/goals/")
+
+
+@scenario("list_tasks")
+def list_tasks(ctx):
+    return ctx.client.get("/api/tasks/")
+
+
+@scenario("toggle_task")
+def toggle_task(ctx):
+    task_id = ctx.rng.choice(list(ctx.task_state))
+    ctx.task_state[task_id] = not ctx.task_state[task_id]
+    return ctx.client.patch(
+        f"/api/tasks/{task_id}/", {"completed": ctx.task_state[task_id]}, format="json"
+    )
+
+
+@scenario("toggle_habit")
+def toggle_habit(ctx):
+    return ctx.client.post(f"/api/habits/{ctx.rng.choice(ctx.habit_ids)}/toggle/")
+
+
+@scenario("list_habits")
+def list_habits(ctx):
+    # the default window, but ending on the dataset's day rather than the real one
+    params = {"until": ctx.today.isoformat()} if ctx.today else {}
+    return ctx.client.get("/api/habits/", params)
+
+
+@scenario("profile")
+def profile(ctx):
+    return ctx.client.get("/api/profile/")
+
+
+@scenario("search")
+def search(ctx):
+    # two words from the datagen vocabulary, the second one half-typed
+    first, second = ctx.rng.sample(WORDS, 2)
+    return ctx.client.get("/api/search/", {"q": f"{first} {second[:3]}"})
+
+
+@scenario("ai_suggestions")
+def ai_suggestions(ctx):
+    return ctx.client.post(
+        "/api/ai/suggestions/", {"goal_id": ctx.rng.choice(ctx.goal_ids)}, format="json"
+    )
+
+
+@scenario("ai_suggestions_batch")
+def ai_suggestions_batch(ctx):
+    return ctx.client.post(
+        "/api/ai/suggestions/batch/", {"goal_ids": ctx.goal_ids[:100]}, format="json"
+    )
+
+
+@scenario("ai_generate_tasks")
+def ai_generate_tasks(ctx):
+    return ctx.client.post(
+        "/api/ai/generate_tasks/",
+        {"goal_id": ctx.rng.choice(ctx.goal_ids), "count": 5},
+        format="json",
+    )
+
+
+# -----------------------------
+# MEASUREMENT
+# -----------------------------
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    # nearest-rank
+    rank = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(rank, len(sorted_values) - 1))]
+
+
+@contextmanager
+def count_queries():
+    counter = {"queries": 0}
+
+    def wrapper(execute, sql, params, many, context):
+        counter["queries"] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield counter
+
+
+@contextmanager
+def fake_ai(latency=0.0):
+    with override_client(FakeOpenAI(latency=latency)) as fake:
+        yield fake
+
+
+def run_scenario(fn, ctx, iterations, warmup):
+    for _ in range(warmup):
+        fn(ctx)
+
+    latencies = []
+    queries = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with count_queries() as counter:
+            t0 = time.perf_counter()
+            response = fn(ctx)
+            latencies.append(time.perf_counter() - t0)
+        queries.append(counter["queries"])
+        if response.status_code >= 400:
+            errors += 1
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda s: round(s * 1000, 3)
+    return {
+        "iterations": iterations,
+        "errors": errors,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        "max_ms": ms(latencies[-1]) if latencies else 0.0,
+        "throughput_rps": round(iterations / elapsed, 2) if elapsed else 0.0,
+        "queries_mean": round(sum(queries) / len(queries), 2) if queries else 0.0,
+        "queries_max": max(queries) if queries else 0,
+    }
+
+
+def run(users, names, iterations=200, warmup=20, ai_latency=0.0, seed=0, today=None):
+    # every scenario runs as the first generated user
+    ctx = make_context(users[0], seed=seed, today=today)
+
+    results = {}
+    with fake_ai(ai_latency):
+        for name in names:
+            results[name] = run_scenario(SCENARIOS[name], ctx, iterations, warmup)
+    return results
+
+
+# -----------------------------
+# REPORTING
+# -----------------------------
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def build_report(spec, results, **options):
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(dt_timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "dataset": spec.as_dict() if spec else None,
+            "options": options,
+        },
+        "scenarios": results,
+    }
+
+
+def save_report(report, path=None):
+    if path is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        meta = report["meta"]
+        stamp = meta["timestamp"].replace(":", "").replace("-", "")[:15]
+        path = RESULTS_DIR / f"{stamp}-{meta['revision']}.json"
+    path = Path(path)
+    path.write_text(json.dumps(report, indent=2))
+    return path
+
+
+def compare(old, new, metric="p95_ms"):
+    """Rows of (scenario, old, new, change %) for scenarios in both reports."""
+    rows = []
+    for name, stats in new["scenarios"].items():
+        before = old.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        a, b = before.get(metric, 0), stats.get(metric, 0)
+        change = ((b - a) / a * 100) if a else 0.0
+        rows.append((name, a, b, round(change, 1)))
+    return rows
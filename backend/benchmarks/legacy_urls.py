@@ -0,0 +1,11 @@
+"""
+URLconf with the old sync, DRF-based login view in front of the real
+one, for `manage.py loadtest_logins` to compare against.
+"""
+from django.urls import include, path
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+urlpatterns = [
+    path("api/token/", TokenObtainPairView.as_view()),
+    path("", include("backend.urls")),
+]
@@ -1,5 +1,33 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.models import User
+
+from . import sharding
 from .models import Goal, Task
+from .purge import soft_delete_user
+
+# with DB_SHARDS these rows are spread over several databases, which a
+# changelist can't page through
+if not sharding.enabled():
+    admin.site.register(Goal)
+    admin.site.register(Task)
+
+
+class SoftDeleteUserAdmin(UserAdmin):
+    """Deleting users here deactivates them and purges their data in the background."""
+
+    def get_deleted_objects(self, objs, request):
+        # the default walks every related row just to list them
+        perms_needed = set() if self.has_delete_permission(request) else {"user"}
+        return [str(obj) for obj in objs], {"users": len(objs)}, perms_needed, []
+
+    def delete_model(self, request, obj):
+        soft_delete_user(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            soft_delete_user(user)
+
 
-admin.site.register(Goal)
-admin.site.register(Task)
+admin.site.unregister(User)
+admin.site.register(User, SoftDeleteUserAdmin)
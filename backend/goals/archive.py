@@ -0,0 +1,234 @@
+"""
+Hot / cold archival.
+
+Completed goals and old habit history are rarely read again, but they sit
+in the same tables every dashboard request scans (GET /api/goals/ returns
+every goal with all its tasks). archive_goals() / archive_completions()
+move them into ArchivedGoal / ArchivedTask / ArchivedHabitCompletion:
+
+- goals completed more than ARCHIVE_GOALS_AFTER_DAYS ago, with their
+  tasks. Goals that still have habits stay hot; the habits are in use.
+- habit completions from before Jan 1 of ARCHIVE_COMPLETIONS_AFTER_YEARS
+  years ago. Whole years go at once, so the moved habits' HabitYearBitmap
+  rows for those years are dropped too and streaks / calendars keep
+  working from the hot years.
+
+Rows keep their ids, are moved ARCHIVE_BATCH_SIZE goals (or 10x as many
+completions) per transaction, and are removed from the search index. The
+rollups are left alone: archived rows still count in the stats, and
+rollups.rebuild() counts them too.
+
+Archived rows are read-only. The list / detail endpoints return them with
+?include_archived=true (hot + archived) or ?include_archived=only, and
+POST /api/goals/<id>/restore/ moves a goal back. Run
+`manage.py archive_history` from cron.
+
+Settings:
+    ARCHIVE_GOALS_AFTER_DAYS         default 180
+    ARCHIVE_COMPLETIONS_AFTER_YEARS  default 2
+    ARCHIVE_BATCH_SIZE               goals per transaction, default 500
+    ARCHIVE_BATCH_PAUSE              seconds between batches, default 0.01
+"""
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.response import Response
+
+from . import bitmaps, purge, search, sharding
+from .models import (
+    ArchivedGoal,
+    ArchivedHabitCompletion,
+    ArchivedTask,
+    Goal,
+    Habit,
+    HabitCompletion,
+    HabitYearBitmap,
+    Task,
+)
+
+GOALS_AFTER_DAYS = getattr(settings, "ARCHIVE_GOALS_AFTER_DAYS", 180)
+COMPLETIONS_AFTER_YEARS = getattr(settings, "ARCHIVE_COMPLETIONS_AFTER_YEARS", 2)
+BATCH_SIZE = getattr(settings, "ARCHIVE_BATCH_SIZE", 500)
+BATCH_PAUSE = getattr(settings, "ARCHIVE_BATCH_PAUSE", 0.01)
+
+INCLUDE_ARCHIVED = {"true": "with", "1": "with", "only": "only", "false": None, "0": None}
+
+
+def _copy(instance, model):
+    """An unsaved `model` row with the same column values as `instance`."""
+    return model(**{
+        f.attname: getattr(instance, f.attname)
+        for f in model._meta.concrete_fields
+        if hasattr(instance, f.attname)
+    })
+
+
+# -----------------------------
+# MOVING ROWS
+# -----------------------------
+def goal_cutoff(days=GOALS_AFTER_DAYS, now=None):
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def completion_cutoff(years=COMPLETIONS_AFTER_YEARS, today=None):
+    """First day that stays hot: Jan 1, `years` years back."""
+    today = today or timezone.localdate()
+    return date(today.year - years, 1, 1)
+
+
+def archive_goals(cutoff=None, batch_size=BATCH_SIZE, pause=BATCH_PAUSE):
+    """
+    Move goals completed before `cutoff` (and their tasks) to the archive.
+    Returns (goals, tasks) moved.
+    """
+    cutoff = cutoff or goal_cutoff()
+    candidates = (
+        Goal.objects.filter(is_completed=True, completed_at__lt=cutoff)
+        .filter(~Exists(Habit.objects.filter(goal=OuterRef("pk"))))
+        .order_by("id")
+    )
+
+    goals_moved = tasks_moved = 0
+    while True:
+        with sharding.atomic():
+            goals = list(candidates[:batch_size])
+            if not goals:
+                break
+            ids = [goal.id for goal in goals]
+            tasks = Task.objects.filter(goal_id__in=ids)
+
+            ArchivedGoal.objects.bulk_create([_copy(goal, ArchivedGoal) for goal in goals])
+            archived = ArchivedTask.objects.bulk_create(
+                [_copy(task, ArchivedTask) for task in tasks.iterator(chunk_size=2000)],
+                batch_size=2000,
+            )
+            # plain DELETEs by id, no signals: the rollups keep counting
+            # these rows, and the search rows go just below
+            purge.delete_ids(Task, [task.id for task in archived])
+            purge.delete_ids(Goal, ids)
+            search.unindex_many("goal", ids)
+            search.unindex_many("task", [task.id for task in archived])
+
+        goals_moved += len(goals)
+        tasks_moved += len(archived)
+        if len(goals) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return goals_moved, tasks_moved
+
+
+def archive_completions(before=None, batch_size=BATCH_SIZE * 10, pause=BATCH_PAUSE):
+    """
+    Move habit completions dated before `before` (normally a Jan 1) to
+    the archive and drop the moved habits' bitmaps of the earlier years;
+    if `before` falls mid-year, the moved days are cleared from that
+    year's bitmap instead. Returns the number moved.
+    """
+    before = before or completion_cutoff()
+    old = HabitCompletion.objects.filter(date__lt=before).order_by("id")
+
+    moved = 0
+    while True:
+        with sharding.atomic():
+            rows = list(old.values_list("id", "habit_id", "date")[:batch_size])
+            if not rows:
+                break
+            ArchivedHabitCompletion.objects.bulk_create(
+                [ArchivedHabitCompletion(habit_id=habit_id, date=day) for _, habit_id, day in rows],
+                ignore_conflicts=True,
+            )
+            purge.delete_ids(HabitCompletion, [pk for pk, _, _ in rows])
+
+            habit_ids = {habit_id for _, habit_id, _ in rows}
+            stale = HabitYearBitmap.objects.filter(habit_id__in=habit_ids, year__lt=before.year)
+            purge.delete_ids(HabitYearBitmap, stale.values_list("id", flat=True))
+            bitmaps.apply([(habit_id, day, False) for _, habit_id, day in rows if day.year == before.year])
+
+        moved += len(rows)
+        if len(rows) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    return moved
+
+
+def restore_goal(archived):
+    """Move an archived goal and its tasks back into Goal / Task."""
+    with sharding.atomic():
+        goal = _copy(archived, Goal)
+        tasks = [_copy(task, Task) for task in archived.tasks.all()]
+        created_at = [task.created_at for task in tasks]
+        # bulk_create: Task.save() would recompute completed_at
+        Goal.objects.bulk_create([goal])
+        Task.objects.bulk_create(tasks, batch_size=2000)
+        # ...but it does apply auto_now_add, so put the original times back
+        for task, value in zip(tasks, created_at):
+            task.created_at = value
+        Task.objects.bulk_update(tasks, ["created_at"], batch_size=500)
+        archived.delete()
+
+        search.index_goal(goal)
+        for task in tasks:
+            search.index_task(task, goal.user_id)
+    return goal
+
+
+# -----------------------------
+# READS (?include_archived=)
+# -----------------------------
+def include_archived(params):
+    """None (hot rows only), "with" (hot + archived) or "only"."""
+    value = (params.get("include_archived") or "false").lower()
+    if value not in INCLUDE_ARCHIVED:
+        raise ParseError({"error": "include_archived must be true, false or only"})
+    return INCLUDE_ARCHIVED[value]
+
+
+class ArchivedReadMixin:
+    """
+    For the goal / task viewsets: list and retrieve also read the archive
+    when ?include_archived= asks for it. Archived items come after the hot
+    ones and carry `archived_at`. Writes only ever see hot rows.
+    """
+    archive_serializer_class = None
+    # lookup from the archived model to its owner
+    archive_owner_field = "user"
+
+    def get_archived_queryset(self):
+        """The user's rows of the archive serializer's model, by id."""
+        model = self.archive_serializer_class.Meta.model
+        return model.objects.filter(**{self.archive_owner_field: self.request.user}).order_by("id")
+
+    def list_hot(self, request, *args, **kwargs):
+        """The plain list response; viewsets override this, not list()."""
+        return super().list(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        mode = include_archived(request.query_params)
+        if mode is None:
+            return self.list_hot(request, *args, **kwargs)
+
+        data = [] if mode == "only" else list(self.list_hot(request, *args, **kwargs).data)
+        archived = self.archive_serializer_class(self.get_archived_queryset(), many=True)
+        return Response(data + list(archived.data))
+
+    def retrieve(self, request, *args, **kwargs):
+        mode = include_archived(request.query_params)
+        if mode != "only":
+            try:
+                return super().retrieve(request, *args, **kwargs)
+            except Http404:
+                if mode is None:
+                    raise
+
+        obj = get_object_or_404(self.get_archived_queryset(), pk=kwargs[self.lookup_field])
+        return Response(self.archive_serializer_class(obj).data)
+
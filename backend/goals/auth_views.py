@@ -0,0 +1,181 @@
+"""
+Signup, login and password change as async views.
+
+These are the only endpoints that hash passwords. They hand the hashing
+to goals/passwords.py and await it, so under ASGI (backend/asgi.py) a
+login storm costs event-loop time only for the cheap parts (parsing,
+a DB lookup, signing the token) and the rest of the API keeps its
+latency. Under WSGI they still work; Django runs them to completion.
+
+Plain Django views rather than DRF ones, since DRF views are sync-only;
+responses keep the shapes the DRF versions had.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User, update_last_login
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from . import passwords, replicas
+from .authentication import CachedJWTAuthentication
+
+NO_ACTIVE_ACCOUNT = "No active account found with the given credentials"
+
+
+def _error(message, status=400):
+    return JsonResponse({"error": message}, status=status)
+
+
+def _busy():
+    response = _error("Too many login attempts right now, try again shortly", status=503)
+    response["Retry-After"] = "1"
+    return response
+
+
+def _body(request):
+    """Request data from a JSON or form body; None if it can't be parsed."""
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+def _authenticate(request):
+    """(user, None) for a valid Bearer token, else (None, error response)."""
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except APIException as exc:
+        return None, JsonResponse({"detail": exc.detail}, status=exc.status_code)
+    if result is None:
+        return None, JsonResponse(
+            {"detail": "Authentication credentials were not provided."}, status=401
+        )
+    return result[0], None
+
+
+def _create_user(user):
+    # the profile comes from a post_save signal; keep both in one transaction
+    with transaction.atomic():
+        user.save()
+    # the first requests after signing up must see the new profile
+    replicas.pin(user.pk)
+
+
+def _issue_tokens(user):
+    refresh = TokenObtainPairSerializer.get_token(user)
+    if jwt_settings.UPDATE_LAST_LOGIN:
+        update_last_login(None, user)
+    return {"refresh": str(refresh), "access": str(refresh.access_token)}
+
+
+# -----------------------------
+# SIGNUP API (PUBLIC)
+# -----------------------------
+@csrf_exempt
+@require_POST
+async def signup_user(request):
+    data = _body(request)
+    if data is None:
+        return _error("Invalid request body")
+
+    username = data.get("username")
+    password = data.get("password")
+    if not username or not password:
+        return _error("Username and password required")
+
+    try:
+        hashed = await passwords.make_password(password)
+    except passwords.HashingBusy:
+        return _busy()
+
+    # no exists() pre-check: two concurrent signups would both pass it.
+    # The unique constraint on username decides.
+    user = User(username=User.normalize_username(username), password=hashed)
+    try:
+        await sync_to_async(_create_user)(user)
+    except IntegrityError:
+        return _error("Username already exists")
+
+    return JsonResponse({"success": True}, status=201)
+
+
+# -----------------------------
+# LOGIN (JWT PAIR)
+# -----------------------------
+@csrf_exempt
+@require_POST
+async def obtain_token(request):
+    """Same contract as simplejwt's TokenObtainPairView, minus the blocking hash."""
+    data = _body(request)
+    if data is None:
+        return _error("Invalid request body")
+
+    username = data.get(User.USERNAME_FIELD)
+    password = data.get("password")
+    if not username or not password:
+        return _error("Username and password required")
+
+    try:
+        user = await User._default_manager.aget_by_natural_key(username)
+    except User.DoesNotExist:
+        user = None
+
+    try:
+        if user is None:
+            await passwords.burn_time(password)
+            ok = False
+        else:
+            ok = await passwords.check_password(user, password) and user.is_active
+    except passwords.HashingBusy:
+        return _busy()
+
+    if not ok:
+        return JsonResponse({"detail": NO_ACTIVE_ACCOUNT}, status=401)
+    return JsonResponse(await sync_to_async(_issue_tokens)(user))
+
+
+# -----------------------------
+# CHANGE PASSWORD
+# -----------------------------
+@csrf_exempt
+@require_POST
+async def change_password(request):
+    user, denied = await sync_to_async(_authenticate)(request)
+    if denied:
+        return denied
+
+    data = _body(request)
+    if data is None:
+        return _error("Invalid request body")
+
+    old_password = data.get("old_password")
+    new_password = data.get("new_password")
+    if not old_password or not new_password:
+        return _error("Old and new password are required")
+
+    try:
+        if not await passwords.check_password(user, old_password):
+            return _error("Old password is incorrect")
+
+        try:
+            await sync_to_async(validate_password)(new_password, user=user)
+        except ValidationError as e:
+            return _error(list(e.messages))
+
+        user.password = await passwords.make_password(new_password)
+    except passwords.HashingBusy:
+        return _busy()
+
+    await user.asave(update_fields=["password"])
+    return JsonResponse({"success": True})
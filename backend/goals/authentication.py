@@ -0,0 +1,152 @@
+"""
+JWT authentication with a cached user lookup.
+
+JWTAuthentication does `User.objects.get(...)` on every request, and most
+views then load the UserProfile as well. Here the user (with its profile
+attached via select_related) is cached in two layers:
+
+- a small per-process dict, checked first
+- the shared Django cache, so other workers benefit too
+
+Both layers are keyed by user id + a per-user token version kept in the
+shared cache. invalidate_cached_user() swaps the version, which makes
+every old entry unreachable in all processes at once; it runs from the
+User / UserProfile save signals (username + password changes included).
+
+That only holds if the Django cache really is shared, so the cache is
+used only with AUTH_USER_CACHE on (the default with REDIS_URL); without
+it every request loads the user like JWTAuthentication does.
+"""
+import pickle
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import replicas, sharding
+
+USER_CACHE_ENABLED = getattr(settings, "AUTH_USER_CACHE", False)
+USER_CACHE_TIMEOUT = getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 60)
+LOCAL_CACHE_MAX_ENTRIES = 1024
+
+_local_cache = {}
+_local_lock = threading.Lock()
+
+
+def _version_key(user_id):
+    return f"authuser:ver:{user_id}"
+
+
+def _user_key(user_id, version):
+    return f"authuser:{user_id}:{version}"
+
+
+def get_user_version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # a random version (not a counter) so an evicted key can never
+        # bring an old cached user back to life
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_cached_user(user_id):
+    cache.set(_version_key(user_id), uuid.uuid4().hex, None)
+
+
+def _load_user(user_id):
+    User = get_user_model()
+    if not sharding.enabled():
+        qs = User.objects.select_related("profile")
+    else:
+        # the profile is in the user's shard: no join, a second query
+        qs = User.objects.all()
+    try:
+        user = qs.get(**{api_settings.USER_ID_FIELD: user_id})
+    except User.DoesNotExist:
+        return None
+
+    if sharding.enabled():
+        try:
+            user.profile  # cached on the instance, pickled with it
+        except ObjectDoesNotExist:
+            pass
+    return user
+
+
+def get_cached_user(user_id):
+    """
+    Return a fresh User instance (profile prefetched) for user_id, or None.
+    Callers get their own unpickled copy, so mutating it is safe.
+    """
+    if not USER_CACHE_ENABLED:
+        return _load_user(user_id)
+
+    version = get_user_version(user_id)
+    key = _user_key(user_id, version)
+    now = time.monotonic()
+
+    entry = _local_cache.get(key)
+    if entry is not None and entry[0] > now:
+        return pickle.loads(entry[1])
+
+    payload = cache.get(key)
+    if payload is None:
+        user = _load_user(user_id)
+        if user is None:
+            return None
+        payload = pickle.dumps(user)
+        cache.set(key, payload, USER_CACHE_TIMEOUT)
+    else:
+        user = pickle.loads(payload)
+
+    with _local_lock:
+        if len(_local_cache) >= LOCAL_CACHE_MAX_ENTRIES:
+            _local_cache.clear()
+        _local_cache[key] = (now + USER_CACHE_TIMEOUT, payload)
+
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """Drop-in replacement for JWTAuthentication using get_cached_user()."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        # the rest of the request reads / writes this user's shard, and
+        # may read from a replica of it
+        sharding.select_user(user.pk)
+        replicas.select_user(user.pk)
+        return user
@@ -0,0 +1,213 @@
+"""
+Batched goal / task / habit operations.
+
+POST /api/batch/ takes an ordered list of operations:
+
+    {"operations": [
+        {"op": "create", "model": "goal", "ref": "g", "data": {...}},
+        {"op": "create", "model": "task", "data": {"goal": "@g", "title": "..."}},
+        {"op": "update", "model": "task", "id": 12, "data": {"completed": true}},
+        {"op": "delete", "model": "habit", "id": 3}
+    ]}
+
+Everything runs in one transaction: the first failing operation rolls
+the whole batch back. Goal progress is recomputed once per affected goal
+at the end instead of after every task change. A string "@<ref>" in
+`id` or in a data field that holds an id (`goal`, `habit`) points at the
+object created by an earlier operation with that `ref`; free text such as
+a title starting with "@" is left alone.
+
+Goal and task updates / deletes may carry `"version": <n>` (the batch
+equivalent of If-Match); if the row has moved on, the batch is rolled
+back with status 412.
+"""
+from rest_framework import status
+
+from . import purge, sharding
+from .models import Goal, Task, Habit, VersionConflict
+from .serializers import GoalSerializer, TaskSerializer, HabitSerializer
+
+BATCH_MAX_OPERATIONS = 100
+
+OPS = ("create", "update", "delete")
+
+# data fields that may hold an "@<ref>"
+REF_FIELDS = ("goal", "habit")
+
+
+class BatchError(Exception):
+    def __init__(self, index, errors, code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(errors)
+        self.index = index
+        self.errors = errors
+        self.code = code
+
+
+def _querysets(user):
+    return {
+        "goal": (Goal.objects.filter(user=user), GoalSerializer),
+        "task": (
+            Task.objects.filter(goal__user=user, goal__deleted_at__isnull=True).select_related("goal"),
+            TaskSerializer,
+        ),
+        "habit": (
+            Habit.objects.filter(user=user, goal__deleted_at__isnull=True).select_related("goal"),
+            HabitSerializer,
+        ),
+    }
+
+
+class BatchRunner:
+    def __init__(self, request):
+        self.request = request
+        self.user = request.user
+        self.models = _querysets(self.user)
+        self.refs = {}
+        self.affected_goal_ids = set()
+        self._owned_goal_ids = None
+
+    # ---- helpers ----
+    def _resolve(self, value, index):
+        if isinstance(value, str) and value.startswith("@"):
+            if value[1:] not in self.refs:
+                raise BatchError(index, {"detail": f"Unknown reference '{value}'"})
+            return self.refs[value[1:]]
+        return value
+
+    def _check_goal_owner(self, goal_id, index):
+        # the model serializers accept any goal pk, so ownership is checked here
+        if goal_id is None:
+            return
+        if self._owned_goal_ids is None:
+            self._owned_goal_ids = set(
+                Goal.objects.filter(user=self.user).values_list("id", flat=True)
+            )
+        try:
+            goal_id = int(goal_id)
+        except (TypeError, ValueError):
+            raise BatchError(index, {"goal": ["Invalid goal id"]})
+        if goal_id not in self._owned_goal_ids:
+            raise BatchError(index, {"goal": ["Goal not found"]}, status.HTTP_404_NOT_FOUND)
+
+    def _get(self, model, pk, index):
+        qs, _ = self.models[model]
+        try:
+            return qs.get(pk=pk)
+        except (qs.model.DoesNotExist, ValueError, TypeError):
+            raise BatchError(
+                index, {"detail": f"{model} {pk} not found"}, status.HTTP_404_NOT_FOUND
+            )
+
+    # ---- operations ----
+    def apply(self, index, operation):
+        if not isinstance(operation, dict):
+            raise BatchError(index, {"detail": "Operation must be an object"})
+
+        op = operation.get("op")
+        model = operation.get("model")
+        if op not in OPS or model not in self.models:
+            raise BatchError(
+                index, {"detail": "op must be create/update/delete, model goal/task/habit"}
+            )
+
+        data = operation.get("data") or {}
+        if not isinstance(data, dict):
+            raise BatchError(index, {"data": ["Must be an object"]})
+        data = {
+            key: self._resolve(value, index) if key in REF_FIELDS else value
+            for key, value in data.items()
+        }
+
+        _, serializer_class = self.models[model]
+        context = {"request": self.request}
+
+        if op == "create":
+            if model in ("task", "habit"):
+                self._check_goal_owner(data.get("goal"), index)
+
+            serializer = serializer_class(data=data, context=context)
+            self._validate(serializer, index)
+            extra = {"user": self.user} if model in ("goal", "habit") else {}
+            obj = serializer.save(**extra)
+
+            if model == "goal" and self._owned_goal_ids is not None:
+                self._owned_goal_ids.add(obj.id)
+            if model == "task":
+                self.affected_goal_ids.add(obj.goal_id)
+
+            ref = operation.get("ref")
+            if ref:
+                self.refs[str(ref)] = obj.pk
+            return {"index": index, "status": status.HTTP_201_CREATED, "data": serializer.data}
+
+        obj = self._get(model, self._resolve(operation.get("id"), index), index)
+        self._check_version(obj, operation.get("version"), index)
+
+        if op == "update":
+            if model in ("task", "habit") and "goal" in data:
+                self._check_goal_owner(data["goal"], index)
+
+            old_goal_id = getattr(obj, "goal_id", None)
+            serializer = serializer_class(obj, data=data, partial=True, context=context)
+            self._validate(serializer, index)
+            obj = serializer.save()
+
+            if model == "task":
+                self.affected_goal_ids.update({old_goal_id, obj.goal_id})
+            return {"index": index, "status": status.HTTP_200_OK, "data": serializer.data}
+
+        # delete
+        if model == "goal":
+            # like DELETE /api/goals/<id>/: hidden now, purged after commit
+            purge.soft_delete_goal(obj)
+            if self._owned_goal_ids is not None:
+                self._owned_goal_ids.discard(obj.id)
+            return {"index": index, "status": status.HTTP_204_NO_CONTENT, "data": None}
+        if model == "task":
+            self.affected_goal_ids.add(obj.goal_id)
+        obj.delete()
+        return {"index": index, "status": status.HTTP_204_NO_CONTENT, "data": None}
+
+    @staticmethod
+    def _check_version(obj, version, index):
+        if version is None or not hasattr(obj, "version"):
+            return
+        if str(version) != str(obj.version):
+            raise BatchError(
+                index,
+                {"version": [f"Current version is {obj.version}"]},
+                status.HTTP_412_PRECONDITION_FAILED,
+            )
+
+    @staticmethod
+    def _validate(serializer, index):
+        if not serializer.is_valid():
+            raise BatchError(index, serializer.errors)
+
+    def run(self, operations):
+        results = []
+        with sharding.atomic():
+            for index, operation in enumerate(operations):
+                try:
+                    results.append(self.apply(index, operation))
+                except VersionConflict as e:
+                    # changed by a concurrent request while this batch ran
+                    raise BatchError(
+                        index, {"version": [str(e)]}, status.HTTP_412_PRECONDITION_FAILED
+                    )
+
+            # one recomputation per goal touched by task changes
+            Goal.recalculate_progress_for(self.affected_goal_ids - {None})
+
+        goals = Goal.objects.filter(
+            id__in=self.affected_goal_ids - {None}
+        ).values("id", "progress", "is_completed")
+
+        return {
+            "results": results,
+            "goals": {
+                g["id"]: {"progress": g["progress"], "is_completed": g["is_completed"]}
+                for g in goals
+            },
+        }
+
@@ -0,0 +1,219 @@
+"""
+Compact per-year habit completion bitmaps.
+
+HabitCompletion rows stay the source of truth. Next to them each habit
+gets one HabitYearBitmap per year: 46 bytes, bit N set = completed on day
+N of the year (0 = Jan 1, little-endian). Counts, streaks and calendars
+can then be answered with a few integer operations instead of scanning
+one row per day.
+
+Single toggles keep the bitmaps in sync through the HabitCompletion
+signals; bulk check / uncheck calls apply() with the cells it changed,
+and the import calls rebuild() for the habits it touched.
+`manage.py rebuild_habit_bitmaps --verify` backfills / checks everything.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import IntegrityError
+
+from . import sharding
+
+BITMAP_BYTES = 46  # 366 bits
+
+
+def day_index(d):
+    return d.timetuple().tm_yday - 1
+
+
+def days_in_year(year):
+    return 366 if date(year, 12, 31).timetuple().tm_yday == 366 else 365
+
+
+def to_int(bits):
+    return int.from_bytes(bytes(bits), "little")
+
+
+def to_bytes(value):
+    return value.to_bytes(BITMAP_BYTES, "little")
+
+
+def bitmaps_from_dates(dates):
+    """{year: int} for an iterable of dates."""
+    years = defaultdict(int)
+    for d in dates:
+        years[d.year] |= 1 << day_index(d)
+    return years
+
+
+# -----------------------------
+# WRITES
+# -----------------------------
+def mark(habit_id, day, done):
+    """
+    Set / clear one cell: a SELECT and an UPDATE of the year row, or an
+    INSERT of its final bits when the year has no row yet.
+    """
+    from .models import HabitYearBitmap
+
+    bit = 1 << day_index(day)
+    rows = HabitYearBitmap.objects.filter(habit_id=habit_id, year=day.year)
+    # the lock needs a transaction, not a savepoint of its own
+    with sharding.atomic(savepoint=False):
+        bits = rows.select_for_update().values_list("bits", flat=True).first()
+        if bits is None:
+            if not done:
+                # a missing year reads as all zeros already
+                return
+            try:
+                with sharding.atomic():
+                    HabitYearBitmap.objects.create(habit_id=habit_id, year=day.year, bits=to_bytes(bit))
+                return
+            except IntegrityError:
+                # created concurrently; set the bit on that row instead
+                bits = rows.select_for_update().values_list("bits", flat=True).get()
+        value = to_int(bits)
+        rows.update(bits=to_bytes(value | bit if done else value & ~bit))
+
+
+def apply(changes):
+    """
+    Set / clear many (habit_id, day, done) cells: one SELECT of the year
+    rows involved, one bulk UPDATE and one bulk INSERT for missing years,
+    however long the habits' history. Returns the number of rows written.
+    """
+    from .models import HabitYearBitmap
+
+    per_row = defaultdict(list)
+    for habit_id, day, done in changes:
+        per_row[(habit_id, day.year)].append((1 << day_index(day), done))
+    if not per_row:
+        return 0
+
+    with sharding.atomic():
+        existing = {
+            (row.habit_id, row.year): row
+            for row in HabitYearBitmap.objects.select_for_update().filter(
+                habit_id__in={habit_id for habit_id, _ in per_row},
+                year__in={year for _, year in per_row},
+            )
+        }
+        updated, created = [], []
+        for (habit_id, year), cells in per_row.items():
+            row = existing.get((habit_id, year))
+            value = to_int(row.bits) if row is not None else 0
+            for bit, done in cells:
+                value = value | bit if done else value & ~bit
+            if row is None:
+                created.append(HabitYearBitmap(habit_id=habit_id, year=year, bits=to_bytes(value)))
+            else:
+                row.bits = to_bytes(value)
+                updated.append(row)
+        HabitYearBitmap.objects.bulk_update(updated, ["bits"], batch_size=500)
+        HabitYearBitmap.objects.bulk_create(created, batch_size=1000)
+    return len(updated) + len(created)
+
+
+def rebuild(habit_ids=None):
+    """
+    Recompute bitmaps from HabitCompletion rows. habit_ids=None rebuilds
+    every habit. Returns the number of bitmap rows written.
+    """
+    from .models import HabitCompletion, HabitYearBitmap
+
+    completions = HabitCompletion.objects.all()
+    bitmaps = HabitYearBitmap.objects.all()
+    if habit_ids is not None:
+        habit_ids = list(habit_ids)
+        completions = completions.filter(habit_id__in=habit_ids)
+        bitmaps = bitmaps.filter(habit_id__in=habit_ids)
+
+    per_habit = defaultdict(list)
+    for habit_id, d in completions.values_list("habit_id", "date").iterator(chunk_size=5000):
+        per_habit[habit_id].append(d)
+
+    rows = [
+        HabitYearBitmap(habit_id=habit_id, year=year, bits=to_bytes(value))
+        for habit_id, dates in per_habit.items()
+        for year, value in bitmaps_from_dates(dates).items()
+    ]
+
+    with sharding.atomic():
+        bitmaps.delete()
+        HabitYearBitmap.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+# -----------------------------
+# READS
+# -----------------------------
+class HabitCalendar:
+    """Read-only view over one habit's {year: int} bitmaps."""
+
+    def __init__(self, years):
+        self.years = {year: value for year, value in years.items() if value}
+
+    @classmethod
+    def from_rows(cls, rows):
+        return cls({row.year: to_int(row.bits) for row in rows})
+
+    def __contains__(self, day):
+        return bool(self.years.get(day.year, 0) >> day_index(day) & 1)
+
+    def count(self, since=None, until=None):
+        total = 0
+        for year, value in self.years.items():
+            total += _clip(year, value, since, until).bit_count()
+        return total
+
+    def dates(self, since=None, until=None):
+        for year in sorted(self.years):
+            value = _clip(year, self.years[year], since, until)
+            jan1 = date(year, 1, 1)
+            while value:
+                low = value & -value
+                yield jan1 + timedelta(days=low.bit_length() - 1)
+                value ^= low
+
+    def last_date(self):
+        if not self.years:
+            return None
+        year = max(self.years)
+        return date(year, 1, 1) + timedelta(days=self.years[year].bit_length() - 1)
+
+    def streak(self, today=None):
+        """
+        Consecutive completed days ending at the last completed day
+        (same rule as the row-based HabitSerializer.get_streak). With
+        `today`, a run that ended before yesterday no longer counts.
+        """
+        last = self.last_date()
+        if last is None or (today is not None and (today - last).days > 1):
+            return 0
+
+        streak = 0
+        year, pos = last.year, day_index(last)
+        while True:
+            window = self.years.get(year, 0) & ((1 << (pos + 1)) - 1)
+            gaps = ~window & ((1 << (pos + 1)) - 1)
+            if gaps:
+                # run of ones from pos down to just above the highest gap
+                return streak + pos - (gaps.bit_length() - 1)
+            streak += pos + 1
+            # the run reaches Jan 1: continue from Dec 31 of the year before
+            year -= 1
+            pos = days_in_year(year) - 1
+            if not self.years.get(year, 0) >> pos & 1:
+                return streak
+
+
+def _clip(year, value, since, until):
+    if since is not None and since.year == year:
+        value &= ~((1 << day_index(since)) - 1)
+    elif since is not None and since.year > year:
+        return 0
+    if until is not None and until.year == year:
+        value &= (1 << (day_index(until) + 1)) - 1
+    elif until is not None and until.year < year:
+        return 0
+    return value
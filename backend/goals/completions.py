@@ -0,0 +1,240 @@
+"""
+Bulk check / uncheck of habit completions.
+
+Used by POST /api/habits/completions/:
+
+    {"changes": [{"habit": 3, "date": "2024-05-01", "done": true}, ...]}
+
+Costs a fixed number of queries however many cells change (and however
+long the habits' history): one SELECT for the current state, one bulk
+INSERT (ignore_conflicts) and one DELETE, then the changed cells are
+applied to the bitmaps (bitmaps.apply) and the analytics rollups.
+"""
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.utils.dateparse import parse_date
+
+from . import bitmaps, purge, rollups, sharding
+from .models import Habit, HabitCompletion, HabitYearBitmap
+
+MAX_CHANGES = 1000
+
+# what HabitTracker.jsx shows by default: the current month grid (6 weeks)
+HISTORY_WEEKS = getattr(settings, "HABIT_HISTORY_WEEKS", 6)
+
+ENCODINGS = ("dates", "offsets", "bits")
+
+
+class CompletionError(Exception):
+    pass
+
+
+def parse_changes(user, changes):
+    """
+    Validate the payload. Returns {(habit_id, date): done}; a later entry
+    for the same cell wins.
+    """
+    if not isinstance(changes, list) or not changes:
+        raise CompletionError("changes must be a non-empty list")
+    if len(changes) > MAX_CHANGES:
+        raise CompletionError(f"At most {MAX_CHANGES} changes per request")
+
+    owned = set(
+        Habit.objects.filter(user=user, goal__deleted_at__isnull=True).values_list("id", flat=True)
+    )
+
+    cells = {}
+    for i, change in enumerate(changes):
+        if not isinstance(change, dict):
+            raise CompletionError(f"changes[{i}] must be an object")
+        try:
+            habit_id = int(change.get("habit"))
+        except (TypeError, ValueError):
+            raise CompletionError(f"changes[{i}].habit must be a habit id")
+        if habit_id not in owned:
+            raise CompletionError(f"changes[{i}]: habit {habit_id} not found")
+        try:
+            day = parse_date(str(change.get("date") or ""))
+        except ValueError:
+            day = None
+        if day is None:
+            raise CompletionError(f"changes[{i}].date must be YYYY-MM-DD")
+
+        cells[(habit_id, day)] = bool(change.get("done", True))
+    return cells
+
+
+def apply_changes(cells, today=None):
+    """
+    Write the cells and return (changed, streaks): only the cells whose
+    state actually flipped, and the new streak of every touched habit.
+    """
+    habit_ids = {habit_id for habit_id, _ in cells}
+    days = {day for _, day in cells}
+
+    with sharding.atomic():
+        existing = {
+            (habit_id, day): pk
+            for pk, habit_id, day in HabitCompletion.objects.filter(
+                habit_id__in=habit_ids, date__in=days
+            ).values_list("id", "habit_id", "date")
+        }
+
+        to_set = [cell for cell, done in cells.items() if done and cell not in existing]
+        to_clear = [cell for cell, done in cells.items() if not done and cell in existing]
+
+        if to_set:
+            HabitCompletion.objects.bulk_create(
+                [HabitCompletion(habit_id=h, date=d) for h, d in to_set],
+                ignore_conflicts=True,
+            )
+        if to_clear:
+            # one DELETE by id, without the per-row post_delete signals
+            purge.delete_ids(HabitCompletion, [existing[cell] for cell in to_clear])
+
+        # bulk writes skip the per-row bitmap / rollup signals
+        if to_set or to_clear:
+            bitmaps.apply(
+                [(h, d, True) for h, d in to_set] + [(h, d, False) for h, d in to_clear]
+            )
+
+            checkins = Counter(d for _, d in to_set)
+            checkins.subtract(d for _, d in to_clear)
+            # parse_changes only accepts habits of one user
+            user_id = Habit.objects.filter(id__in=habit_ids).values_list("user_id", flat=True)[0]
+            rollups.bump_many(user_id, "habit_checkins", checkins)
+
+    streaks = current_streaks(habit_ids, today)
+
+    changed = [
+        {"habit": h, "date": d.isoformat(), "done": True} for h, d in to_set
+    ] + [
+        {"habit": h, "date": d.isoformat(), "done": False} for h, d in to_clear
+    ]
+    return changed, streaks
+
+
+# -----------------------------
+# STREAKS
+# -----------------------------
+def streak_from_dates(dates, today=None):
+    """
+    Consecutive days ending at the last completed day, from completion
+    dates newest first. With `today`, a run that ended before yesterday
+    no longer counts. HabitCalendar.streak() is the bitmap version.
+    """
+    if not dates:
+        return 0
+    if today is not None and (today - dates[0]) > timedelta(days=1):
+        return 0
+
+    streak = 1
+    for newer, older in zip(dates, dates[1:]):
+        if newer - older != timedelta(days=1):
+            break
+        streak += 1
+    return streak
+
+
+def current_streaks(habit_ids, today=None):
+    """
+    {habit_id: streak}, one query. Read from the bitmaps only with
+    HABIT_BITMAP_READS (same rule as HabitSerializer.get_streak): they are
+    not backfilled until `manage.py rebuild_habit_bitmaps` has run.
+    """
+    if getattr(settings, "HABIT_BITMAP_READS", False):
+        per_habit = {habit_id: [] for habit_id in habit_ids}
+        for row in HabitYearBitmap.objects.filter(habit_id__in=habit_ids):
+            per_habit[row.habit_id].append(row)
+        return {
+            habit_id: bitmaps.HabitCalendar.from_rows(rows).streak(today)
+            for habit_id, rows in per_habit.items()
+        }
+
+    per_habit = {habit_id: [] for habit_id in habit_ids}
+    rows = HabitCompletion.objects.filter(habit_id__in=habit_ids).order_by("habit_id", "-date")
+    for habit_id, day in rows.values_list("habit_id", "date"):
+        per_habit[habit_id].append(day)
+    return {habit_id: streak_from_dates(dates, today) for habit_id, dates in per_habit.items()}
+
+
+# -----------------------------
+# HISTORY WINDOW FOR HABIT READS
+# -----------------------------
+@dataclass(frozen=True)
+class HistoryWindow:
+    """
+    Which completions a habit read returns and how they are encoded:
+
+    dates    ["2024-05-01", ...]
+    offsets  [0, 3, 4, ...]   days after `since`
+    bits     "10011..."       one char per day from `since` to `until`
+
+    since=None means the full history (only valid with "dates").
+    """
+    since: date = None
+    until: date = None
+    encoding: str = "dates"
+
+    def encode(self, dates):
+        dates = [d for d in dates if self.contains(d)]
+        if self.encoding == "offsets":
+            return sorted((d - self.since).days for d in dates)
+        if self.encoding == "bits":
+            cells = ["0"] * ((self.until - self.since).days + 1)
+            for d in dates:
+                cells[(d - self.since).days] = "1"
+            return "".join(cells)
+        return sorted(d.isoformat() for d in dates)
+
+    def contains(self, d):
+        return (self.since is None or d >= self.since) and (
+            self.until is None or d <= self.until
+        )
+
+    def as_dict(self):
+        return {
+            "since": self.since.isoformat() if self.since else None,
+            "until": self.until.isoformat() if self.until else None,
+            "encoding": self.encoding,
+        }
+
+
+def _param_date(params, key):
+    value = params.get(key)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise CompletionError(f"{key} must be YYYY-MM-DD")
+    return parsed
+
+
+def parse_history_window(params, today=None):
+    """
+    ?since= / ?until= / ?history=all / ?encoding=dates|offsets|bits.
+    Default: the last HISTORY_WEEKS weeks up to today.
+    """
+    today = today or date.today()
+    encoding = params.get("encoding") or "dates"
+    if encoding not in ENCODINGS:
+        raise CompletionError(f"encoding must be one of {', '.join(ENCODINGS)}")
+
+    if params.get("history") == "all":
+        if encoding != "dates":
+            raise CompletionError("history=all only supports encoding=dates")
+        return HistoryWindow(encoding=encoding)
+
+    until = _param_date(params, "until") or today
+    since = _param_date(params, "since") or until - timedelta(weeks=HISTORY_WEEKS)
+    if since > until:
+        raise CompletionError("since must be on or before until")
+    if (until - since).days > 366 * 5:
+        raise CompletionError("window is limited to 5 years")
+    return HistoryWindow(since=since, until=until, encoding=encoding)
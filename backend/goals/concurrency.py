@@ -0,0 +1,96 @@
+"""
+ETag / If-Match handling for versioned goals and tasks.
+
+Every goal / task response carries `ETag: "<version>"` (the same number
+as the `version` field). A client that sends it back on PATCH / PUT /
+DELETE:
+
+    If-Match: "3"
+
+only changes the row if nobody else changed it in the meantime. On a
+mismatch the response is 412 with the current row, so the client can
+update just that one object instead of refetching everything:
+
+    {"error": "...", "current": {...}}
+
+Requests without If-Match keep working; the UPDATE is still guarded by
+the version read at the start of the request (see VersionedModel).
+"""
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import VersionConflict
+
+
+def etag(obj):
+    return f'"{obj.version}"'
+
+
+def parse_if_match(header):
+    """
+    None when the header is absent, "*" for any version, else the set of
+    versions listed. Weak tags are compared by value, since compressing
+    proxies / middleware may turn our ETags into W/"...".
+    """
+    if not header:
+        return None
+    header = header.strip()
+    if header == "*":
+        return "*"
+
+    versions = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag.isdigit():
+            versions.add(int(tag))
+    return versions
+
+
+class VersionedViewMixin:
+    """
+    For ModelViewSets over a VersionedModel: checks If-Match before any
+    write, turns VersionConflict into 412 and adds ETag to detail responses.
+    """
+    conditional_methods = ("PUT", "PATCH", "DELETE")
+
+    def get_object(self):
+        obj = super().get_object()
+        if self.request.method in self.conditional_methods:
+            expected = parse_if_match(self.request.headers.get("If-Match"))
+            if expected is not None and expected != "*" and obj.version not in expected:
+                raise VersionConflict(f"If-Match does not match version {obj.version}")
+        return obj
+
+    def handle_exception(self, exc):
+        if isinstance(exc, VersionConflict):
+            return self.precondition_failed()
+        return super().handle_exception(exc)
+
+    def precondition_failed(self):
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        current = self.get_queryset().filter(**{self.lookup_field: lookup}).first()
+        if current is None:
+            return Response({"error": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(
+            {
+                "error": "This item was changed elsewhere; your edit was not saved",
+                "current": self.get_serializer(current).data,
+            },
+            status=status.HTTP_412_PRECONDITION_FAILED,
+            headers={"ETag": etag(current)},
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        data = getattr(response, "data", None)
+        if (
+            response.status_code in (status.HTTP_200_OK, status.HTTP_201_CREATED)
+            and isinstance(data, dict)
+            and "version" in data
+        ):
+            response["ETag"] = f'"{data["version"]}"'
+        return response
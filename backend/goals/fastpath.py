@@ -0,0 +1,141 @@
+"""
+Read-only fast path for the goal / task list endpoints.
+
+A ModelSerializer builds a model instance per row and then walks a
+Field object per attribute. For list responses with thousands of tasks
+that per-field overhead dominates the request. Here the same output is
+built straight from `.values_list()` tuples:
+
+- the serializer is inspected once, at import, to get its field order,
+  the column behind each field and a converter for non-null values
+  (None = the value is already what DRF would return);
+- each request then runs one query per model and a short loop per row.
+
+The result renders to exactly the same JSON as GoalSerializer /
+TaskSerializer (`manage.py benchmark_lists` checks this byte for byte).
+Only plain model fields, primary-key relations and nested list
+serializers are supported; anything else fails loudly at import.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, relations, serializers
+from rest_framework.settings import api_settings
+
+from backend.metrics import record_timing
+
+from .models import Task
+from .serializers import GoalSerializer, TaskSerializer
+
+# fields whose to_representation() returns DB values unchanged
+PASSTHROUGH = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+    relations.PrimaryKeyRelatedField,
+)
+
+
+def _iso_datetime(field):
+    """
+    DateTimeField.to_representation() with the timezone lookup hoisted
+    out of the per-value path: returns a function that, once per request,
+    resolves the output timezone and returns the per-value converter.
+    """
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if not settings.USE_TZ or output_format is None or output_format.lower() != ISO_8601:
+        return lambda: field.to_representation
+
+    def bind():
+        tz = getattr(field, "timezone", None) or timezone.get_current_timezone()
+
+        def convert(value):
+            if timezone.is_naive(value):
+                return field.to_representation(value)
+            value = value.astimezone(tz).isoformat()
+            return value[:-6] + "Z" if value.endswith("+00:00") else value
+        return convert
+    return bind
+
+
+def _converter(field):
+    """None (no conversion) or a function returning the per-value converter."""
+    if isinstance(field, serializers.DateTimeField):
+        return _iso_datetime(field)
+    if isinstance(field, serializers.DateField):
+        return lambda: _iso_date
+    if isinstance(field, PASSTHROUGH):
+        return None
+    raise TypeError(f"fastpath can't convert {type(field).__name__} '{field.field_name}'")
+
+
+def _iso_date(value):
+    return value.isoformat()
+
+
+class CompiledSerializer:
+    """Precomputed (name, column, converter) list for one serializer."""
+
+    def __init__(self, serializer_class, nested=()):
+        self.fields = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if name in nested:
+                # filled in by the caller, kept here for the key order
+                self.fields.append((name, None, None))
+                continue
+            if "." in field.source or field.source == "*":
+                raise TypeError(f"fastpath can't follow source '{field.source}'")
+            self.fields.append((name, field.source, _converter(field)))
+
+        self.columns = [column for _, column, _ in self.fields if column]
+
+    def index(self, column):
+        return self.columns.index(column)
+
+    def rows(self, queryset, **nested_values):
+        """
+        Yield output dicts for `queryset`. nested_values maps a nested
+        field name to a function taking the row tuple.
+        """
+        plan = []
+        for name, column, bind in self.fields:
+            if column is None:
+                plan.append((name, None, nested_values[name]))
+            else:
+                plan.append((name, self.index(column), bind() if bind else None))
+
+        for row in queryset.values_list(*self.columns).iterator(chunk_size=2000):
+            out = {}
+            for name, i, convert in plan:
+                if i is None:
+                    out[name] = convert(row)
+                    continue
+                value = row[i]
+                out[name] = convert(value) if convert and value is not None else value
+            yield out
+
+
+TASKS = CompiledSerializer(TaskSerializer)
+GOALS = CompiledSerializer(GoalSerializer, nested=("tasks",))
+
+
+# timed like the serializers' .data (backend/metrics.py)
+@record_timing("serialize")
+def task_list(queryset):
+    return list(TASKS.rows(queryset))
+
+
+@record_timing("serialize")
+def goal_list(queryset):
+    """Goals with their nested tasks: two queries in total."""
+    tasks_by_goal = defaultdict(list)
+    tasks = Task.objects.filter(goal__in=queryset.values("id")).order_by("goal_id", "id")
+    for task in TASKS.rows(tasks):
+        tasks_by_goal[task["goal"]].append(task)
+
+    empty = []
+    id_index = GOALS.index("id")
+    return list(GOALS.rows(queryset, tasks=lambda row: tasks_by_goal.get(row[id_index], empty)))
@@ -0,0 +1,378 @@
+"""
+Streaming bulk import for goals, tasks, habits and habit completions.
+
+The upload is JSON Lines or CSV, one record per line / row. Every record
+has a ``type`` column:
+
+    goal        ref, title, description, start_date, end_date,
+                category, priority, order
+    task        goal, title, completed, completed_at
+    habit       ref, goal, title
+    completion  habit, date
+
+``goal`` / ``habit`` point either at a ``ref`` declared earlier in the
+same file or at the id of an existing row owned by the user.
+
+Records are parsed one line at a time and inserted with bulk_create in
+batches, so memory stays flat no matter how large the file is. Each batch
+runs in its own transaction; a failing batch is rolled back and reported
+without aborting the rest of the import. Duplicate ``(habit, date)``
+completions are skipped by the database (ignore_conflicts), so completion
+counts in the report are rows submitted, not rows inserted.
+"""
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import bitmaps, rollups, search, sharding
+from .models import Goal, Task, Habit, HabitCompletion
+
+
+IMPORT_BATCH_SIZE = getattr(settings, "IMPORT_BATCH_SIZE", 500)
+
+# cap per-batch error lists so a bad file can't blow up the response
+MAX_ERRORS_PER_BATCH = 50
+
+TRUE_VALUES = {"1", "true", "yes", "y", "on"}
+
+
+class RowError(Exception):
+    pass
+
+
+# -----------------------------
+# PARSING
+# -----------------------------
+def detect_format(upload, requested=None):
+    fmt = (requested or "").lower()
+    if fmt in ("jsonl", "csv"):
+        return fmt
+
+    name = (upload.name or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    return None
+
+
+def iter_records(upload, fmt):
+    """
+    Yield (line_number, dict) pairs without reading the whole file.
+    Malformed lines yield (line_number, RowError). A file that is not
+    UTF-8, or CSV the reader cannot tokenize, ends the stream with a
+    RowError on the first line that was not read; rows before it are
+    still imported.
+    """
+    text = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+    records = _csv_records(text) if fmt == "csv" else _jsonl_records(text)
+
+    line_number = 0
+    try:
+        for line_number, record in records:
+            yield line_number, record
+    except UnicodeDecodeError:
+        yield line_number + 1, RowError("File is not UTF-8 text; the rest of it was skipped")
+    except csv.Error as e:
+        yield line_number + 1, RowError(f"Invalid CSV: {e}; the rest of the file was skipped")
+
+
+def _csv_records(text):
+    reader = csv.DictReader(text)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _jsonl_records(text):
+    for line_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, RowError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield line_number, RowError("Each line must be a JSON object")
+            continue
+        yield line_number, record
+
+
+def _text(record, key, required=False, default=""):
+    value = record.get(key)
+    if value is None or value == "":
+        if required:
+            raise RowError(f"'{key}' is required")
+        return default
+    return str(value).strip()
+
+
+def _date(record, key):
+    value = _text(record, key, required=True)
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise RowError(f"'{key}' must be a YYYY-MM-DD date")
+    return parsed
+
+
+def _int(record, key):
+    value = _text(record, key, default="0")
+    if not value.isdigit():
+        raise RowError(f"'{key}' must be a non-negative integer")
+    return int(value)
+
+
+def _bool(record, key):
+    value = record.get(key)
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in TRUE_VALUES
+
+
+# -----------------------------
+# IMPORTER
+# -----------------------------
+class BulkImporter:
+    """
+    Buffers parsed rows and flushes them in dependency order
+    (goals -> habits -> tasks -> completions) once a batch is full.
+    """
+
+    def __init__(self, user, batch_size=IMPORT_BATCH_SIZE):
+        self.user = user
+        self.batch_size = batch_size
+
+        self.goal_refs = {}
+        self.habit_refs = {}
+        self._owned_goal_ids = None
+        self._owned_habit_ids = None
+
+        self.affected_goal_ids = set()
+        self.affected_habit_ids = set()
+        self.batches = []
+        self.totals = {"goals": 0, "tasks": 0, "habits": 0, "completions": 0}
+
+        self._reset_batch()
+
+    def _reset_batch(self):
+        self.pending = {"goals": [], "habits": [], "tasks": [], "completions": []}
+        self.batch_refs = []
+        self.batch_errors = []
+        self.batch_rows = 0
+
+    # ---- reference resolution ----
+    def _resolve(self, value, refs, owned_attr, model, lookup):
+        if value in (None, ""):
+            raise RowError("missing reference")
+        value = str(value).strip()
+
+        if value in refs:
+            return refs[value]
+
+        if not value.isdigit():
+            raise RowError(f"unknown reference '{value}'")
+
+        if getattr(self, owned_attr) is None:
+            setattr(
+                self,
+                owned_attr,
+                set(model.objects.filter(**lookup).values_list("id", flat=True)),
+            )
+        if int(value) not in getattr(self, owned_attr):
+            raise RowError(f"{model.__name__} {value} not found")
+        return int(value)
+
+    def _goal(self, record):
+        return self._resolve(
+            record.get("goal"), self.goal_refs, "_owned_goal_ids",
+            Goal, {"user": self.user},
+        )
+
+    def _habit(self, record):
+        return self._resolve(
+            record.get("habit"), self.habit_refs, "_owned_habit_ids",
+            Habit, {"user": self.user},
+        )
+
+    @staticmethod
+    def _fk(name, target):
+        # target is either an existing id or an instance from this import
+        if isinstance(target, int):
+            return {f"{name}_id": target}
+        return {name: target}
+
+    # ---- row builders ----
+    def add(self, line_number, record):
+        if isinstance(record, RowError):
+            self._error(line_number, record)
+            return
+
+        kind = _text(record, "type").lower()
+        try:
+            builder = {
+                "goal": self._add_goal,
+                "task": self._add_task,
+                "habit": self._add_habit,
+                "completion": self._add_completion,
+            }.get(kind)
+            if builder is None:
+                raise RowError(f"unknown type '{kind}'")
+            builder(record)
+        except RowError as e:
+            self._error(line_number, e)
+            return
+
+        self.batch_rows += 1
+        if self.batch_rows >= self.batch_size:
+            self.flush()
+
+    def _error(self, line_number, error):
+        if len(self.batch_errors) < MAX_ERRORS_PER_BATCH:
+            self.batch_errors.append({"line": line_number, "error": str(error)})
+
+    def _add_goal(self, record):
+        goal = Goal(
+            user=self.user,
+            title=_text(record, "title", required=True)[:200],
+            description=_text(record, "description"),
+            start_date=_date(record, "start_date"),
+            end_date=_date(record, "end_date"),
+            category=_text(record, "category", default="General")[:100],
+            priority=_text(record, "priority", default="Medium")[:10],
+            order=_int(record, "order"),
+        )
+        self.pending["goals"].append(goal)
+
+        ref = _text(record, "ref")
+        if ref:
+            self.goal_refs[ref] = goal
+            self.batch_refs.append((self.goal_refs, ref))
+
+    def _add_habit(self, record):
+        habit = Habit(
+            user=self.user,
+            title=_text(record, "title", required=True)[:255],
+            **self._fk("goal", self._goal(record)),
+        )
+        self.pending["habits"].append(habit)
+
+        ref = _text(record, "ref")
+        if ref:
+            self.habit_refs[ref] = habit
+            self.batch_refs.append((self.habit_refs, ref))
+
+    def _add_task(self, record):
+        target = self._goal(record)
+        completed = _bool(record, "completed")
+
+        completed_at = None
+        if completed:
+            raw = _text(record, "completed_at")
+            completed_at = parse_datetime(raw) if raw else None
+            if raw and completed_at is None:
+                raise RowError("'completed_at' must be an ISO datetime")
+            if completed_at is not None and timezone.is_naive(completed_at):
+                completed_at = timezone.make_aware(completed_at)
+            # bulk_create skips Task.save, so mirror its completed_at rule
+            completed_at = completed_at or timezone.now()
+
+        task = Task(
+            title=_text(record, "title", required=True)[:200],
+            completed=completed,
+            completed_at=completed_at,
+            **self._fk("goal", target),
+        )
+        self.pending["tasks"].append(task)
+
+    def _add_completion(self, record):
+        completion = HabitCompletion(
+            date=_date(record, "date"),
+            **self._fk("habit", self._habit(record)),
+        )
+        self.pending["completions"].append(completion)
+
+    # ---- flushing ----
+    def _insert_parents(self, model, objs):
+        if sharding.connection().features.can_return_rows_from_bulk_insert:
+            model.objects.bulk_create(objs, batch_size=self.batch_size)
+        else:
+            # backends without RETURNING need a pk per row for children
+            for obj in objs:
+                obj.save()
+
+    def flush(self):
+        pending = self.pending
+        if not self.batch_rows and not self.batch_errors:
+            return
+
+        report = {
+            "batch": len(self.batches) + 1,
+            "rows": self.batch_rows,
+            "created": {key: 0 for key in pending},
+            "errors": self.batch_errors,
+        }
+
+        try:
+            with sharding.atomic():
+                self._insert_parents(Goal, pending["goals"])
+                self._insert_parents(Habit, pending["habits"])
+                Task.objects.bulk_create(pending["tasks"], batch_size=self.batch_size)
+                HabitCompletion.objects.bulk_create(
+                    pending["completions"],
+                    batch_size=self.batch_size,
+                    ignore_conflicts=True,
+                )
+        except DatabaseError as e:
+            # drop refs declared in this batch so later rows report them
+            # as unknown instead of pointing at rolled-back rows
+            for refs, ref in self.batch_refs:
+                refs.pop(ref, None)
+            report["errors"].append({"line": None, "error": f"Batch failed: {e}"})
+        else:
+            for key, objs in pending.items():
+                report["created"][key] = len(objs)
+                self.totals[key] += len(objs)
+
+            if self._owned_goal_ids is not None:
+                self._owned_goal_ids.update(g.id for g in pending["goals"])
+            if self._owned_habit_ids is not None:
+                self._owned_habit_ids.update(h.id for h in pending["habits"])
+            self.affected_goal_ids.update(t.goal_id for t in pending["tasks"])
+            self.affected_habit_ids.update(c.habit_id for c in pending["completions"])
+
+        self.batches.append(report)
+        self._reset_batch()
+
+    def run(self, records):
+        for line_number, record in records:
+            self.add(line_number, record)
+        self.flush()
+
+        # one progress recomputation per touched goal, not per task
+        Goal.recalculate_progress_for(self.affected_goal_ids)
+        # bulk_create skips the HabitCompletion signals
+        if self.affected_habit_ids:
+            bitmaps.rebuild(self.affected_habit_ids)
+        # ...and the Task ones, so recount this user's analytics rollups
+        # and re-index their search rows
+        if any(self.totals.values()):
+            rollups.rebuild([self.user.id])
+            search.rebuild([self.user.id])
+
+        return {
+            "created": self.totals,
+            "batches": self.batches,
+            "failed_batches": sum(
+                1 for b in self.batches
+                if any(err["line"] is None for err in b["errors"])
+            ),
+        }
@@ -0,0 +1,59 @@
+"""
+The user's local "today".
+
+Users set an IANA timezone on their profile (default UTC). request_today()
+resolves the local date once per request and caches it on the request,
+so toggles, streaks, history windows and the stats range all agree on
+the same day and roll over at the user's midnight, not UTC's.
+"""
+from datetime import datetime, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
+
+from .models import UserProfile
+
+DEFAULT_TIMEZONE = "UTC"
+
+
+_known = None
+
+
+def is_valid_timezone(name):
+    global _known
+    if _known is None:
+        # available_timezones() walks tzdata, do it once
+        _known = available_timezones() | {DEFAULT_TIMEZONE}
+    return name in _known
+
+
+def zone(name):
+    """ZoneInfo for a profile's timezone name; UTC if unset or unknown."""
+    try:
+        return ZoneInfo(name or DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def user_timezone(user):
+    # the cached JWT user carries its profile, so this is normally query-free
+    try:
+        name = user.profile.timezone
+    except (AttributeError, UserProfile.DoesNotExist):
+        name = DEFAULT_TIMEZONE
+    return zone(name)
+
+
+def user_id_timezone(user_id):
+    """user_timezone() when only the id is at hand: one query."""
+    return zone(UserProfile.objects.filter(user_id=user_id).values_list("timezone", flat=True).first())
+
+
+def request_today(request):
+    """The user's local date, computed once per request."""
+    # DRF wraps the Django request; cache on the underlying one
+    raw = getattr(request, "_request", request)
+    today = getattr(raw, "_user_today", None)
+    if today is None:
+        tz = user_timezone(request.user)
+        today = datetime.now(dt_timezone.utc).astimezone(tz).date()
+        raw._user_today = today
+    return today
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from goals import archive, sharding
+from goals.models import ArchivedGoal, ArchivedHabitCompletion, Goal, HabitCompletion
+
+
+class Command(BaseCommand):
+    help = (
+        "Move old completed goals (with their tasks) and old habit completions "
+        "into the archive tables, in batches. Safe to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--goals-after-days", type=int, default=archive.GOALS_AFTER_DAYS,
+            help="archive goals completed more than this many days ago",
+        )
+        parser.add_argument(
+            "--completions-after-years", type=int, default=archive.COMPLETIONS_AFTER_YEARS,
+            help="archive completions from before Jan 1 this many years back",
+        )
+        parser.add_argument("--batch-size", type=int, default=archive.BATCH_SIZE)
+        parser.add_argument(
+            "--pause", type=float, default=archive.BATCH_PAUSE, help="seconds to sleep between batches"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+
+        goals = tasks = completions = 0
+        hot, archived = [0, 0], [0, 0]
+        for _ in sharding.each_shard():
+            g, t = archive.archive_goals(
+                cutoff=archive.goal_cutoff(options["goals_after_days"]),
+                batch_size=batch_size,
+                pause=options["pause"],
+            )
+            completions += archive.archive_completions(
+                before=archive.completion_cutoff(options["completions_after_years"]),
+                batch_size=batch_size * 10,
+                pause=options["pause"],
+            )
+            goals, tasks = goals + g, tasks + t
+            hot = [hot[0] + Goal.objects.count(), hot[1] + HabitCompletion.objects.count()]
+            archived = [
+                archived[0] + ArchivedGoal.objects.count(),
+                archived[1] + ArchivedHabitCompletion.objects.count(),
+            ]
+
+        self.stdout.write(
+            f"Archived {goals} goals ({tasks} tasks) and {completions} habit completions. "
+            f"Hot: {hot[0]} goals, {hot[1]} completions; "
+            f"archived: {archived[0]} goals, {archived[1]} completions"
+        )
@@ -0,0 +1,99 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from benchmarks import datagen, harness
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database with deterministic data, drive the main "
+        "API scenarios and write p50/p95/p99 + query counts to JSON."
+    )
+
+    def add_arguments(self, parser):
+        spec = datagen.DatasetSpec()
+        parser.add_argument("--users", type=int, default=spec.users)
+        parser.add_argument("--goals", type=int, default=spec.goals_per_user, help="goals per user")
+        parser.add_argument("--tasks", type=int, default=spec.tasks_per_goal, help="tasks per goal")
+        parser.add_argument("--habits", type=int, default=spec.habits_per_user, help="habits per user")
+        parser.add_argument("--years", type=int, default=spec.years, help="years of habit history")
+        parser.add_argument("--seed", type=int, default=spec.seed)
+
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument(
+            "--scenarios",
+            default=",".join(harness.SCENARIOS),
+            help="comma separated, available: " + ", ".join(harness.SCENARIOS),
+        )
+        parser.add_argument("--ai-latency", type=float, default=0.0, help="fake upstream delay (s)")
+
+        parser.add_argument("--output", help="report path (default benchmarks/results/)")
+        parser.add_argument("--compare", help="earlier report to diff against")
+
+    def handle(self, *args, **options):
+        names = [n.strip() for n in options["scenarios"].split(",") if n.strip()]
+        unknown = set(names) - set(harness.SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        spec = datagen.DatasetSpec(
+            users=options["users"],
+            goals_per_user=options["goals"],
+            tasks_per_goal=options["tasks"],
+            habits_per_user=options["habits"],
+            years=options["years"],
+            seed=options["seed"],
+        )
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            self.stdout.write(f"Generating dataset {spec.as_dict()} ...")
+            users = datagen.generate(spec)
+
+            results = harness.run(
+                users,
+                names,
+                iterations=options["iterations"],
+                warmup=options["warmup"],
+                ai_latency=options["ai_latency"],
+                seed=spec.seed,
+                today=spec.anchor,
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = harness.build_report(
+            spec,
+            results,
+            iterations=options["iterations"],
+            warmup=options["warmup"],
+            ai_latency=options["ai_latency"],
+        )
+        path = harness.save_report(report, options["output"])
+
+        self.stdout.write(
+            f"\n{'scenario':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'queries':>10}"
+        )
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<20}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+                f"{r['throughput_rps']:>10}{r['queries_mean']:>10}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"\nReport written to {path}"))
+
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                old = json.load(f)
+            self.stdout.write(f"\np95 vs {old['meta'].get('revision', '?')}:")
+            for name, before, after, change in harness.compare(old, report):
+                self.stdout.write(f"  {name:<20}{before:>10} -> {after:<10} ({change:+}%)")
@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from benchmarks import datagen, harness
+
+
+class Command(BaseCommand):
+    help = (
+        "'Suggest for all my goals' against a fake AI client: one POST "
+        "/api/ai/suggestions/ per goal vs one POST /api/ai/suggestions/batch/. "
+        "Reports upstream calls, estimated prompt / completion tokens and wall time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--goals", type=int, default=50)
+        parser.add_argument("--latency", type=float, default=0.3, help="seconds per upstream call")
+        parser.add_argument("--output", help="report path (default benchmarks/results/)")
+
+    def measure(self, fake, send):
+        calls = fake.chat.completions.calls
+        seen = len(calls)
+        t0 = time.perf_counter()
+        responses = send()
+        elapsed = time.perf_counter() - t0
+
+        new = calls[seen:]
+        prompt = sum(max(1, len(m["content"]) // 4) for call in new for m in call["messages"])
+        return responses, {
+            "requests": len(responses),
+            "errors": sum(r.status_code >= 400 for r in responses),
+            "upstream_calls": len(new),
+            "prompt_tokens": prompt,
+            "max_tokens": sum(call.get("max_tokens") or 0 for call in new),
+            "wall_ms": round(elapsed * 1000, 1),
+        }
+
+    def handle(self, *args, **options):
+        spec = datagen.DatasetSpec(users=1, goals_per_user=options["goals"], tasks_per_goal=1, habits_per_user=0)
+
+        results = {}
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            user = datagen.generate(spec)[0]
+            ctx = harness.make_context(user)
+            goal_ids = sorted(ctx.goal_ids)
+
+            with harness.fake_ai(options["latency"]) as fake:
+                _, results["per_goal"] = self.measure(fake, lambda: [
+                    ctx.client.post("/api/ai/suggestions/", {"goal_id": goal_id}, format="json")
+                    for goal_id in goal_ids
+                ])
+                (batch,), results["batch"] = self.measure(fake, lambda: [
+                    ctx.client.post("/api/ai/suggestions/batch/", {"goal_ids": goal_ids}, format="json")
+                ])
+                answered = len(batch.data["results"]) if batch.status_code == 200 else 0
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = harness.build_report(spec, results, latency=options["latency"], answered=answered)
+        path = harness.save_report(report, options["output"])
+
+        self.stdout.write(
+            f"\n{'mode':<12}{'requests':>10}{'calls':>8}{'prompt tok':>12}{'max_tokens':>12}{'wall ms':>10}{'errors':>8}"
+        )
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<12}{r['requests']:>10}{r['upstream_calls']:>8}{r['prompt_tokens']:>12}"
+                f"{r['max_tokens']:>12}{r['wall_ms']:>10}{r['errors']:>8}"
+            )
+        self.stdout.write(f"\nBatch answered {answered} of {len(goal_ids)} goals")
+        self.stdout.write(self.style.SUCCESS(f"Report written to {path}"))
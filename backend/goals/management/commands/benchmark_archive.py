@@ -0,0 +1,143 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from benchmarks import datagen, harness
+from goals import archive, rollups
+from goals.models import Goal, Habit, HabitCompletion, Task, UserDailyStats
+
+
+def _get(path, **params):
+    return lambda ctx: ctx.client.get(path, params)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the dashboard list endpoints for an account with years of "
+        "completed goals and habit history, before and after archive_history "
+        "moves the cold rows out; checks the rollups still match a rebuild."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--goals", type=int, default=400)
+        parser.add_argument("--tasks-per-goal", type=int, default=25)
+        parser.add_argument("--habits", type=int, default=8)
+        parser.add_argument("--years", type=int, default=5)
+        parser.add_argument("--completed", type=float, default=0.8, help="share of goals completed long ago")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--output", help="report path (default benchmarks/results/)")
+
+    def account(self, options):
+        spec = datagen.DatasetSpec(
+            users=1,
+            goals_per_user=options["goals"],
+            tasks_per_goal=options["tasks_per_goal"],
+            habits_per_user=options["habits"],
+            years=options["years"],
+        )
+        user = datagen.generate(spec)[0]
+
+        # datagen leaves goals half done; finish most of them, 1..years
+        # before the dataset's anchor
+        now = spec.now
+        goal_ids = list(Goal.objects.filter(user=user).order_by("id").values_list("id", flat=True))
+        done = goal_ids[: int(len(goal_ids) * options["completed"])]
+        for i, goal_id in enumerate(done):
+            completed_at = now - timedelta(days=365 + i * 365 * (options["years"] - 1) // max(1, len(done)))
+            Task.objects.filter(goal_id=goal_id).update(completed=True, completed_at=completed_at)
+            Goal.objects.filter(id=goal_id).update(progress=100, is_completed=True, completed_at=completed_at)
+        rollups.rebuild([user.id])
+        return spec, user
+
+    def counts(self, user):
+        return {
+            "goals": Goal.objects.filter(user=user).count(),
+            "tasks": Task.objects.filter(goal__user=user).count(),
+            "completions": HabitCompletion.objects.filter(habit__user=user).count(),
+        }
+
+    def run(self, ctx, scenarios, iterations):
+        return {
+            name: harness.run_scenario(fn, ctx, iterations, warmup=min(5, iterations))
+            for name, fn in scenarios.items()
+        }
+
+    def handle(self, *args, **options):
+        results = {}
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            spec, user = self.account(options)
+            ctx = harness.make_context(user)
+            since = (spec.anchor - timedelta(days=365)).isoformat()
+            scenarios = {
+                "list_goals": _get("/api/goals/"),
+                "list_tasks": _get("/api/tasks/"),
+                "list_habits_1y": _get("/api/habits/", since=since),
+            }
+
+            rows_before = self.counts(user)
+            stats_before = UserDailyStats.objects.filter(user=user).aggregate(
+                *(Sum(field) for field in rollups.FIELDS)
+            )
+            everything_before = len(ctx.client.get("/api/goals/").data)
+            for name, r in self.run(ctx, scenarios, options["iterations"]).items():
+                results[f"{name}@before"] = r
+
+            t0 = time.perf_counter()
+            moved_goals, moved_tasks = archive.archive_goals(archive.goal_cutoff(now=spec.now))
+            moved_completions = archive.archive_completions(archive.completion_cutoff(today=spec.anchor))
+            archive_ms = round((time.perf_counter() - t0) * 1000, 1)
+
+            for name, r in self.run(ctx, scenarios, options["iterations"]).items():
+                results[f"{name}@after"] = r
+            with_archive = {
+                "list_goals_all": _get("/api/goals/", include_archived="true"),
+                "list_habits_all": _get("/api/habits/", history="all", include_archived="true"),
+            }
+            for name, r in self.run(ctx, with_archive, options["iterations"]).items():
+                results[f"{name}@after"] = r
+
+            everything_after = len(ctx.client.get("/api/goals/", {"include_archived": "true"}).data)
+            rollups.rebuild([user.id])
+            stats_after = UserDailyStats.objects.filter(user=user).aggregate(
+                *(Sum(field) for field in rollups.FIELDS)
+            )
+            habits = Habit.objects.filter(user=user).count()
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        archived = {
+            "archive_ms": archive_ms,
+            "goals": moved_goals,
+            "tasks": moved_tasks,
+            "completions": moved_completions,
+            "hot_before": rows_before,
+            "goals_listed_with_archive": [everything_before, everything_after],
+            "rollups_match_rebuild": stats_before == stats_after,
+        }
+        report = harness.build_report(spec, results, archive=archived, habits=habits)
+        path = harness.save_report(report, options["output"])
+
+        self.stdout.write(f"\n{'scenario':<28}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}")
+        for name, r in results.items():
+            self.stdout.write(f"{name:<28}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['queries_mean']:>9}")
+        self.stdout.write(
+            f"\nArchived {moved_goals} goals / {moved_tasks} tasks / {moved_completions} completions "
+            f"in {archive_ms} ms (hot before: {rows_before})"
+        )
+        if everything_before != everything_after or stats_before != stats_after:
+            self.stdout.write(self.style.ERROR(
+                f"Mismatch: goals {everything_before} vs {everything_after}, "
+                f"rollups {stats_before} vs {stats_after}"
+            ))
+        self.stdout.write(self.style.SUCCESS(f"\nReport written to {path}"))
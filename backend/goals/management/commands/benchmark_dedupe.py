@@ -0,0 +1,123 @@
+import random
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from ai import dedupe
+from benchmarks import datagen, fakes, harness
+from goals.models import Goal, Task
+
+
+def python_filter(existing, titles, threshold):
+    """The same trigram cosine in plain Python, nothing cached: the baseline."""
+    def vector(title):
+        text = f" {dedupe.normalize(title)} "
+        return Counter(text[i:i + 3] for i in range(len(text) - 2))
+
+    def cosine(a, b):
+        dot = sum(n * b[s] for s, n in a.items() if s in b)
+        return dot / ((sum(n * n for n in a.values()) * sum(n * n for n in b.values())) ** 0.5 or 1)
+
+    vectors = [vector(t) for t in existing]
+    return [t for t in titles if not any(cosine(vector(t), v) >= threshold for v in vectors)]
+
+
+def near_copy(rng, title):
+    return rng.choice([
+        lambda t: t.lower(),
+        lambda t: t.upper() + "!",
+        lambda t: f"  {t}.",
+        lambda t: t + "s",
+        lambda t: t.replace(" ", "  ", 1),
+    ])(title)
+
+
+class Command(BaseCommand):
+    help = (
+        "Filter --candidates AI task titles (near-copies of existing tasks "
+        "plus up to 8 new ones) against goals with 1k / 5k / 10k tasks: first "
+        "call (vectors built), cached call, plain-Python baseline, and how "
+        "many near-copies / new titles were flagged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", default="1000,5000,10000", help="existing tasks per goal")
+        parser.add_argument("--candidates", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=20, help="cached calls to average")
+        parser.add_argument("--output", help="report path (default benchmarks/results/)")
+
+    def run_size(self, goal, size, options, rng):
+        titles = [
+            " ".join(rng.choice(datagen.WORDS) for _ in range(4)).capitalize()
+            for _ in range(size)
+        ]
+        Task.objects.bulk_create((Task(goal=goal, title=t) for t in titles), batch_size=2000)
+
+        fresh = list(fakes.LINES[:options["candidates"] // 2])
+        copies = [near_copy(rng, t) for t in rng.sample(titles, options["candidates"] - len(fresh))]
+        candidates = copies + fresh
+
+        t0 = time.perf_counter()
+        _, duplicates = dedupe.filter_new(goal, candidates)
+        first = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for _ in range(options["repeat"]):
+            dedupe.filter_new(goal, candidates)
+        cached = (time.perf_counter() - t0) / options["repeat"]
+
+        t0 = time.perf_counter()
+        python_filter(titles, candidates, dedupe.THRESHOLD)
+        python = time.perf_counter() - t0
+
+        flagged = set(duplicates)
+        return {
+            "first_ms": round(first * 1000, 2),
+            "cached_ms": round(cached * 1000, 2),
+            "python_ms": round(python * 1000, 1),
+            "copies_flagged": sum(c in flagged for c in copies),
+            "copies": len(copies),
+            "fresh_flagged": sum(f in flagged for f in fresh),
+            "fresh": len(fresh),
+        }
+
+    def handle(self, *args, **options):
+        sizes = [int(n) for n in options["tasks"].split(",")]
+        spec = datagen.DatasetSpec(users=1, goals_per_user=len(sizes), tasks_per_goal=0, habits_per_user=0)
+        rng = random.Random(spec.seed)
+
+        results = {}
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            user = datagen.generate(spec)[0]
+            goals = Goal.objects.filter(user=user).order_by("id")
+            for goal, size in zip(goals, sizes):
+                self.stdout.write(f"{size} tasks ...")
+                results[f"tasks={size}"] = self.run_size(goal, size, options, rng)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = harness.build_report(
+            spec, results, candidates=options["candidates"], threshold=dedupe.THRESHOLD
+        )
+        path = harness.save_report(report, options["output"])
+
+        self.stdout.write(
+            f"\n{'goal':<13}{'first ms':>10}{'cached ms':>11}{'python ms':>11}"
+            f"{'copies caught':>15}{'new flagged':>13}"
+        )
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<13}{r['first_ms']:>10}{r['cached_ms']:>11}{r['python_ms']:>11}"
+                f"{r['copies_flagged']:>9}/{r['copies']:<5}{r['fresh_flagged']:>7}/{r['fresh']:<5}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"\nReport written to {path}"))
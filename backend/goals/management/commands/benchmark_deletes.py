@@ -0,0 +1,125 @@
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from benchmarks import datagen, harness
+from goals import purge
+from goals.models import Goal, Task, HabitCompletion
+
+TASKS_PER_GOAL = 50
+
+
+@contextmanager
+def measure():
+    """Wall time, peak Python memory and the longest single DELETE."""
+    stats = {"longest_delete_ms": 0.0, "deletes": 0}
+
+    def wrapper(execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith("DELETE"):
+            return execute(sql, params, many, context)
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            stats["deletes"] += 1
+            stats["longest_delete_ms"] = max(stats["longest_delete_ms"], round(ms, 1))
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(wrapper):
+            yield stats
+    finally:
+        stats["wall_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        stats["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        tracemalloc.stop()
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete accounts of growing size the old way (one ORM cascade) and the "
+        "new way (soft delete + chunked purge); report wall time, peak memory "
+        "and the longest single DELETE, which is how long SQLite stays locked."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated task counts")
+        parser.add_argument("--habits", type=int, default=8)
+        parser.add_argument("--output", help="report path (default benchmarks/results/)")
+
+    def account(self, size, habits):
+        spec = datagen.DatasetSpec(
+            users=1,
+            goals_per_user=max(1, size // TASKS_PER_GOAL),
+            tasks_per_goal=min(size, TASKS_PER_GOAL),
+            habits_per_user=habits,
+        )
+        return datagen.generate(spec)[0]
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(s) for s in options["sizes"].split(",") if s.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be comma separated integers")
+
+        results = {}
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            for size in sizes:
+                self.stdout.write(f"{size} tasks ...")
+
+                user = self.account(size, options["habits"])
+                rows = Task.objects.filter(goal__user=user).count() + HabitCompletion.objects.filter(
+                    habit__user=user
+                ).count()
+                with measure() as stats:
+                    user.delete()
+                # a single transaction: the lock is held for all of it
+                stats["longest_lock_ms"] = stats["wall_ms"]
+                results[f"cascade@{size}"] = {"rows": rows, **stats}
+
+                user = self.account(size, options["habits"])
+                with override_settings(PURGE_SYNC=True), measure() as stats:
+                    t0 = time.perf_counter()
+                    with transaction.atomic():
+                        purge.soft_delete_user(user)
+                        soft_ms = round((time.perf_counter() - t0) * 1000, 1)
+                    # the purge ran inline from on_commit as the block closed
+                results[f"soft+purge@{size}"] = {
+                    "rows": rows,
+                    "soft_delete_ms": soft_ms,
+                    **stats,
+                    "longest_lock_ms": max(soft_ms, stats["longest_delete_ms"]),
+                }
+
+                leftover = Goal.all_objects.filter(user_id=user.pk).count()
+                if leftover:
+                    raise CommandError(f"purge left {leftover} goals behind")
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = harness.build_report(None, results, tasks_per_goal=TASKS_PER_GOAL, habits=options["habits"])
+        path = harness.save_report(report, options["output"])
+
+        self.stdout.write(
+            f"\n{'scenario':<22}{'rows':>9}{'wall ms':>10}{'peak MB':>9}{'longest lock ms':>17}{'DELETEs':>9}"
+        )
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<22}{r['rows']:>9}{r['wall_ms']:>10}{r['peak_mb']:>9}"
+                f"{r['longest_lock_ms']:>17}{r['deletes']:>9}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"\nReport written to {path}"))
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from benchmarks import datagen, harness
+
+TASKS_PER_GOAL = 50
+
+
+class Command(BaseCommand):
+    help = (
+        "Time GET /api/goals/ and /api/tasks/ through ModelSerializer and "
+        "through the .values() fast path at several dataset sizes, and check "
+        "that both produce the same bytes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default="1000,10000,100000", help="comma separated task counts"
+        )
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="report path (default benchmarks/results/)")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(s) for s in options["sizes"].split(",") if s.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be comma separated integers")
+
+        results = {}
+        mismatches = []
+        for size in sizes:
+            spec = datagen.DatasetSpec(
+                users=1,
+                goals_per_user=max(1, size // TASKS_PER_GOAL),
+                tasks_per_goal=min(size, TASKS_PER_GOAL),
+                habits_per_user=0,
+                seed=options["seed"],
+            )
+
+            setup_test_environment()
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                self.stdout.write(f"Generating {size} tasks ...")
+                ctx = harness.make_context(datagen.generate(spec)[0], seed=spec.seed)
+
+                for name in ("list_goals", "list_tasks"):
+                    scenario = harness.SCENARIOS[name]
+                    bodies = {}
+                    for mode, fast in (("serializer", False), ("fast", True)):
+                        with override_settings(LIST_FAST_PATH=fast):
+                            bodies[mode] = scenario(ctx).content
+                            results[f"{name}@{size}/{mode}"] = harness.run_scenario(
+                                scenario, ctx, options["iterations"], options["warmup"]
+                            )
+                    if bodies["serializer"] != bodies["fast"]:
+                        mismatches.append(f"{name}@{size}")
+            finally:
+                teardown_databases(old_config, verbosity=0)
+                teardown_test_environment()
+
+        report = harness.build_report(
+            None,
+            results,
+            sizes=sizes,
+            tasks_per_goal=TASKS_PER_GOAL,
+            iterations=options["iterations"],
+            warmup=options["warmup"],
+        )
+        path = harness.save_report(report, options["output"])
+
+        self.stdout.write(f"\n{'scenario':<32}{'p50 ms':>10}{'p95 ms':>10}{'queries':>10}")
+        for name, r in results.items():
+            self.stdout.write(f"{name:<32}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['queries_mean']:>10}")
+        self.stdout.write(self.style.SUCCESS(f"\nReport written to {path}"))
+
+        if mismatches:
+            raise CommandError(f"Fast path output differs from the serializers: {mismatches}")
+        self.stdout.write(self.style.SUCCESS("Fast path output is byte-identical"))
@@ -0,0 +1,104 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from rest_framework.renderers import JSONRenderer
+
+from backend import compression
+from backend.fastjson import FastJSONRenderer, orjson
+from benchmarks import datagen, harness
+
+ENDPOINTS = ("/api/goals/", "/api/tasks/", "/api/habits/?history=all")
+
+
+def cpu_ms(fn, iterations):
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return round((time.process_time() - start) * 1000 / iterations, 2)
+
+
+class Command(BaseCommand):
+    help = (
+        "For a heavy account, compare render CPU time of DRF's JSONRenderer "
+        "and the orjson renderer, and bytes on the wire raw / gzip / brotli."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--goals", type=int, default=100)
+        parser.add_argument("--tasks-per-goal", type=int, default=50)
+        parser.add_argument("--habits", type=int, default=10)
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="report path (default benchmarks/results/)")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("orjson is not installed")
+
+        spec = datagen.DatasetSpec(
+            users=1,
+            goals_per_user=options["goals"],
+            tasks_per_goal=options["tasks_per_goal"],
+            habits_per_user=options["habits"],
+            seed=options["seed"],
+        )
+        iterations = max(1, options["iterations"])
+        stdlib, fast = JSONRenderer(), FastJSONRenderer()
+
+        results = {}
+        mismatches = []
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            self.stdout.write("Generating dataset ...")
+            ctx = harness.make_context(datagen.generate(spec)[0], seed=spec.seed)
+
+            for path in ENDPOINTS:
+                response = ctx.client.get(path, HTTP_ACCEPT_ENCODING="identity")
+                if response.status_code != 200:
+                    raise CommandError(f"GET {path} returned {response.status_code}")
+                data = response.data
+
+                body = stdlib.render(data)
+                if fast.render(data) != body:
+                    mismatches.append(path)
+
+                results[path] = {
+                    "render_ms_json": cpu_ms(lambda: stdlib.render(data), iterations),
+                    "render_ms_orjson": cpu_ms(lambda: fast.render(data), iterations),
+                    "bytes_raw": len(body),
+                    "bytes_gzip": len(compression.compress(body, "gzip")),
+                    "compress_ms_gzip": cpu_ms(lambda: compression.compress(body, "gzip"), iterations),
+                }
+                if compression.brotli is not None:
+                    results[path]["bytes_br"] = len(compression.compress(body, "br"))
+                    results[path]["compress_ms_br"] = cpu_ms(
+                        lambda: compression.compress(body, "br"), iterations
+                    )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = harness.build_report(spec, results, iterations=iterations)
+        path = harness.save_report(report, options["output"])
+
+        self.stdout.write(
+            f"\n{'endpoint':<28}{'json ms':>9}{'orjson ms':>11}"
+            f"{'raw B':>11}{'gzip B':>10}{'br B':>10}"
+        )
+        for endpoint, r in results.items():
+            self.stdout.write(
+                f"{endpoint:<28}{r['render_ms_json']:>9}{r['render_ms_orjson']:>11}"
+                f"{r['bytes_raw']:>11}{r['bytes_gzip']:>10}{r.get('bytes_br', '-'):>10}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"\nReport written to {path}"))
+
+        if mismatches:
+            raise CommandError(f"orjson output differs from JSONRenderer: {mismatches}")
+        self.stdout.write(self.style.SUCCESS("Renderer output is byte-identical"))
@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from benchmarks import datagen, harness
+from goals.models import Task
+
+READS = ("/api/goals/", "/api/habits/", "/api/stats/")
+
+
+def summarize(latencies, elapsed):
+    latencies.sort()
+    ms = lambda s: round(s * 1000, 1)
+    return {
+        "requests": len(latencies),
+        "p50_ms": ms(harness.percentile(latencies, 50)),
+        "p95_ms": ms(harness.percentile(latencies, 95)),
+        "max_ms": ms(latencies[-1]) if latencies else 0.0,
+        "per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mixed workload against 0, 1, 2 read replicas (SQLite file copies "
+        "refreshed every --lag seconds): --writers processes toggle tasks and "
+        "read each one straight back, --readers processes list goals / habits "
+        "/ stats for other users. Reports read and write latency, the share "
+        "of queries the replicas served and stale read-backs (must be 0)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--replicas", default="0,1,2", help="replica counts to compare")
+        parser.add_argument("--readers", type=int, default=3)
+        parser.add_argument("--writers", type=int, default=1)
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument("--lag", type=float, default=1.0, help="seconds between replica refreshes")
+        parser.add_argument("--output", help="report path (default benchmarks/results/)")
+        # the subprocesses
+        parser.add_argument("--setup", type=int, metavar="USERS", help=argparse.SUPPRESS)
+        parser.add_argument("--role", choices=["read", "write"], help=argparse.SUPPRESS)
+        parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+        parser.add_argument("--start", type=float, help=argparse.SUPPRESS)
+
+    # -----------------------------
+    # SUBPROCESSES
+    # -----------------------------
+    def setup(self, users):
+        spec = datagen.DatasetSpec(users=users, goals_per_user=10, tasks_per_goal=20, habits_per_user=4, years=1)
+        datagen.generate(spec)
+
+    def client(self, user):
+        client = Client()
+        client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {RefreshToken.for_user(user).access_token}"
+        return client
+
+    def work(self, options):
+        # writers get the first users, readers the rest
+        users = list(User.objects.order_by("id"))
+        worker, writers = options["worker"], options["writers"]
+        if options["role"] == "write":
+            user = users[worker]
+            tasks = list(Task.objects.filter(goal__user=user).values_list("id", "completed"))
+        else:
+            user = users[writers + worker]
+        client = self.client(user)
+
+        queries = Counter()
+
+        def count(alias):
+            def wrapper(execute, sql, params, many, context):
+                queries[alias] += 1
+                return execute(sql, params, many, context)
+            return wrapper
+
+        latencies, errors, stale, i = [], 0, 0, 0
+        time.sleep(max(0.0, options["start"] - time.time()))
+        deadline = options["start"] + options["duration"]
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(count(alias)))
+            while time.time() < deadline:
+                t0 = time.perf_counter()
+                if options["role"] == "write":
+                    task_id, completed = tasks[i % len(tasks)]
+                    tasks[i % len(tasks)] = (task_id, not completed)
+                    response = client.patch(
+                        f"/api/tasks/{task_id}/", {"completed": not completed}, content_type="application/json"
+                    )
+                    back = client.get(f"/api/tasks/{task_id}/")
+                    if back.status_code == 200 and back.json()["completed"] == completed:
+                        stale += 1
+                else:
+                    response = client.get(READS[i % len(READS)])
+                latencies.append(time.perf_counter() - t0)
+                errors += response.status_code >= 400
+                i += 1
+        self.stdout.write(json.dumps({
+            "latencies": latencies,
+            "errors": errors,
+            "stale": stale,
+            "replica_queries": sum(n for alias, n in queries.items() if "_replica_" in alias),
+            "queries": sum(queries.values()),
+        }))
+
+    # -----------------------------
+    # DRIVER
+    # -----------------------------
+    def run_replicas(self, replicas, options):
+        manage = [sys.executable, str(settings.BASE_DIR / "manage.py")]
+        workdir = tempfile.mkdtemp(prefix=f"replicas{replicas}-")
+        env = {**os.environ, "DB_REPLICAS": str(replicas), "DB_DIR": workdir}
+        env.pop("DB_SHARDS", None)
+        sync = None
+        try:
+            subprocess.run([*manage, "migrate", "-v", "0"], env=env, check=True, stdout=subprocess.DEVNULL)
+            users = options["writers"] + options["readers"]
+            subprocess.run([*manage, "benchmark_replicas", "--setup", str(users)], env=env, check=True)
+            if replicas:
+                subprocess.run([*manage, "sync_replicas"], env=env, check=True, stdout=subprocess.DEVNULL)
+                sync = subprocess.Popen([*manage, "sync_replicas", "--every", str(options["lag"])], env=env)
+
+            start = time.time() + 2.0 + users  # after every worker has started Django
+            common = [
+                "--writers", str(options["writers"]),
+                "--start", str(start),
+                "--duration", str(options["duration"]),
+            ]
+            procs = [
+                (role, subprocess.Popen(
+                    [*manage, "benchmark_replicas", "--role", role, "--worker", str(w), *common],
+                    env=env,
+                    stdout=subprocess.PIPE,
+                    text=True,
+                ))
+                for role, count in (("write", options["writers"]), ("read", options["readers"]))
+                for w in range(count)
+            ]
+            totals = {role: {"latencies": [], "errors": 0, "stale": 0} for role in ("read", "write")}
+            replica_queries = queries = 0
+            for role, proc in procs:
+                out, _ = proc.communicate()
+                result = json.loads(out.strip().splitlines()[-1])
+                totals[role]["latencies"] += result["latencies"]
+                totals[role]["errors"] += result["errors"]
+                totals[role]["stale"] += result["stale"]
+                replica_queries += result["replica_queries"]
+                queries += result["queries"]
+        finally:
+            if sync is not None:
+                sync.terminate()
+                sync.wait()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        return {
+            "reads": summarize(totals["read"]["latencies"], options["duration"]),
+            "writes": summarize(totals["write"]["latencies"], options["duration"]),
+            "errors": totals["read"]["errors"] + totals["write"]["errors"],
+            "stale_read_backs": totals["write"]["stale"],
+            "replica_query_share": round(replica_queries / queries, 3) if queries else 0.0,
+        }
+
+    def handle(self, *args, **options):
+        if options["setup"] is not None:
+            return self.setup(options["setup"])
+        if options["role"]:
+            return self.work(options)
+
+        results = {}
+        for replicas in [int(n) for n in options["replicas"].split(",")]:
+            self.stdout.write(
+                f"{replicas} replicas: {options['writers']} writers + {options['readers']} readers "
+                f"for {options['duration']} s ..."
+            )
+            results[f"replicas={replicas}"] = self.run_replicas(replicas, options)
+
+        report = harness.build_report(
+            None,
+            results,
+            readers=options["readers"],
+            writers=options["writers"],
+            duration=options["duration"],
+            lag=options["lag"],
+            cpus=os.cpu_count(),
+        )
+        path = harness.save_report(report, options["output"])
+
+        self.stdout.write(
+            f"\n{'databases':<12}{'reads/s':>9}{'read p95':>10}{'read max':>10}"
+            f"{'writes/s':>10}{'write p95':>11}{'on replica':>12}{'stale':>7}{'errors':>8}"
+        )
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<12}{r['reads']['per_s']:>9}{r['reads']['p95_ms']:>10}{r['reads']['max_ms']:>10}"
+                f"{r['writes']['per_s']:>10}{r['writes']['p95_ms']:>11}"
+                f"{r['replica_query_share']:>12.0%}{r['stale_read_backs']:>7}{r['errors']:>8}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"\nReport written to {path}"))
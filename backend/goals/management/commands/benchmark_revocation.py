@@ -0,0 +1,123 @@
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from benchmarks import datagen, harness
+from goals import revocation
+from goals.models import RevokedToken
+
+
+class RefreshChain:
+    """Scenario state: each refresh hands back the token for the next one."""
+
+    def __init__(self, client, refresh):
+        self.client = client
+        self.refresh = refresh
+
+    def __call__(self, ctx):
+        response = self.client.post(
+            "/api/token/refresh/", {"refresh": self.refresh}, format="json"
+        )
+        if response.status_code == 200:
+            self.refresh = response.data["refresh"]
+        return response
+
+
+def fill(target, batch=20000):
+    """Top the table up to `target` rows; half of them already expired."""
+    now = timezone.now()
+    missing = target - RevokedToken.objects.count()
+    while missing > 0:
+        n = min(batch, missing)
+        RevokedToken.objects.bulk_create(
+            RevokedToken(
+                jti=uuid.uuid4(),
+                expires_at=now + timedelta(days=(i % 60) - 30, seconds=i),
+            )
+            for i in range(n)
+        )
+        missing -= n
+
+
+class Command(BaseCommand):
+    help = (
+        "Time POST /api/token/refresh/ (rotation + revocation) with a growing "
+        "number of revoked tokens on file, then time a batched purge."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="0,100000,1000000", help="comma separated row counts")
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument("--output", help="report path (default benchmarks/results/)")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(s) for s in options["sizes"].split(",") if s.strip())
+        except ValueError:
+            raise CommandError("--sizes must be comma separated integers")
+
+        results = {}
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            spec = datagen.DatasetSpec(users=1, goals_per_user=1, tasks_per_goal=1, habits_per_user=0)
+            ctx = harness.make_context(datagen.generate(spec)[0])
+            ctx.client.credentials()  # the refresh endpoint is anonymous
+
+            for size in sizes:
+                self.stdout.write(f"{size} revoked tokens on file ...")
+                fill(size)
+                revocation.store.reset()  # as a freshly started worker
+                chain = RefreshChain(ctx.client, str(RefreshToken.for_user(ctx.user)))
+                results[f"refresh@{size}"] = harness.run_scenario(
+                    chain, ctx, options["iterations"], options["warmup"]
+                )
+
+                replay = ctx.client.post(
+                    "/api/token/refresh/", {"refresh": str(RefreshToken.for_user(ctx.user))}
+                )
+                if replay.status_code != 200:
+                    raise CommandError(f"fresh token refused: {replay.status_code}")
+
+            with harness.count_queries() as counter:
+                started = timezone.now()
+                deleted = revocation.purge_expired()
+                elapsed = (timezone.now() - started).total_seconds()
+            results["purge"] = {
+                "deleted": deleted,
+                "seconds": round(elapsed, 2),
+                "queries": counter["queries"],
+                "remaining": RevokedToken.objects.count(),
+            }
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = harness.build_report(
+            None, results, iterations=options["iterations"], warmup=options["warmup"]
+        )
+        path = harness.save_report(report, options["output"])
+
+        self.stdout.write(f"\n{'scenario':<24}{'p50 ms':>10}{'p95 ms':>10}{'queries':>10}{'errors':>8}")
+        for name, r in results.items():
+            if name == "purge":
+                continue
+            self.stdout.write(
+                f"{name:<24}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['queries_mean']:>10}{r['errors']:>8}"
+            )
+        purge = results["purge"]
+        self.stdout.write(
+            f"\npurge: {purge['deleted']} expired rows in {purge['seconds']} s "
+            f"({purge['queries']} queries), {purge['remaining']} left"
+        )
+        self.stdout.write(self.style.SUCCESS(f"\nReport written to {path}"))
@@ -0,0 +1,110 @@
+import time
+from datetime import date, timedelta
+
+from django.db.models import Count
+from django.db.models.functions import TruncWeek
+from django.core.management.base import BaseCommand
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from benchmarks import datagen, harness
+from goals import rollups
+from goals.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the weekly completed-tasks chart computed from raw Task rows "
+        "against the precomputed rollups, on a throwaway database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=200_000, help="tasks for the benchmark user")
+        parser.add_argument("--goals", type=int, default=50)
+        parser.add_argument("--weeks", type=int, default=52, help="chart window")
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="report path (default benchmarks/results/)")
+
+    def handle(self, *args, **options):
+        spec = datagen.DatasetSpec(
+            users=1,
+            goals_per_user=options["goals"],
+            tasks_per_goal=max(1, options["tasks"] // options["goals"]),
+            habits_per_user=0,
+            years=2,
+            seed=options["seed"],
+        )
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            self.stdout.write(f"Generating dataset {spec.as_dict()} ...")
+            user = datagen.generate(spec)[0]
+            results = self.measure(user, spec.anchor, options["weeks"], options["iterations"])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = harness.build_report(
+            spec, results, weeks=options["weeks"], iterations=options["iterations"]
+        )
+        path = harness.save_report(report, options["output"])
+
+        self.stdout.write(f"\n{'scenario':<20}{'p50 ms':>10}{'p95 ms':>10}{'queries':>10}")
+        for name, r in results.items():
+            self.stdout.write(f"{name:<20}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['queries_mean']:>10}")
+        self.stdout.write(self.style.SUCCESS(f"\nReport written to {path}"))
+
+    def measure(self, user, until, weeks, iterations):
+        since = rollups.week_start(until - timedelta(weeks=weeks - 1))
+
+        def raw():
+            rows = (
+                Task.objects.filter(
+                    goal__user=user, completed_at__date__gte=since, completed_at__date__lte=until
+                )
+                .annotate(week=TruncWeek("completed_at"))
+                .values("week")
+                .annotate(n=Count("id"))
+                .order_by("week")
+            )
+            return {row["week"].date(): row["n"] for row in rows}
+
+        def rollup():
+            return {
+                date.fromisoformat(row["period_start"]): row["tasks_completed"]
+                for row in rollups.series(user, "week", since, until)
+                if row["tasks_completed"]
+            }
+
+        expected = raw()
+        if expected != rollup():
+            self.stderr.write(self.style.WARNING("Raw and rollup series differ!"))
+
+        return {
+            "raw_week_aggregate": self.time(raw, iterations),
+            "rollup_week_read": self.time(rollup, iterations),
+        }
+
+    @staticmethod
+    def time(fn, iterations):
+        latencies, queries = [], []
+        for _ in range(iterations):
+            with harness.count_queries() as counter:
+                t0 = time.perf_counter()
+                fn()
+                latencies.append(time.perf_counter() - t0)
+            queries.append(counter["queries"])
+        latencies.sort()
+        ms = lambda s: round(s * 1000, 3)
+        return {
+            "iterations": iterations,
+            "p50_ms": ms(harness.percentile(latencies, 50)),
+            "p95_ms": ms(harness.percentile(latencies, 95)),
+            "queries_mean": round(sum(queries) / len(queries), 2),
+        }
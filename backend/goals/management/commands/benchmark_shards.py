@@ -0,0 +1,153 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from benchmarks import harness
+from goals import sharding
+from goals.models import Goal, Task
+
+
+def summarize(latencies, elapsed, writes, errors):
+    latencies.sort()
+    ms = lambda s: round(s * 1000, 1)
+    return {
+        "writes": writes,
+        "errors": errors,
+        "p50_ms": ms(harness.percentile(latencies, 50)),
+        "p95_ms": ms(harness.percentile(latencies, 95)),
+        "max_ms": ms(latencies[-1]) if latencies else 0.0,
+        "writes_per_s": round(writes / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Write throughput against 0 (unsharded), 1, 2, ... shard databases: "
+        "for each shard count, migrate fresh SQLite files in a temp dir, then "
+        "let --workers processes create tasks for their own users as fast as "
+        "they can for --duration seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--shards", default="0,1,2,4", help="shard counts to compare")
+        parser.add_argument("--workers", type=int, default=4, help="writer processes")
+        parser.add_argument("--users", type=int, default=16)
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument("--output", help="report path (default benchmarks/results/)")
+        # the subprocesses
+        parser.add_argument("--setup", action="store_true", help=argparse.SUPPRESS)
+        parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+        parser.add_argument("--start", type=float, help=argparse.SUPPRESS)
+
+    # -----------------------------
+    # SUBPROCESSES
+    # -----------------------------
+    def setup(self, users):
+        today = timezone.localdate()
+        for i in range(users):
+            # the post_save signal puts the user on a shard
+            user = User.objects.create_user(f"writer{i}", password=None)
+            with sharding.use_user(user.pk):
+                Goal.objects.create(user=user, title=f"Goal of writer{i}", start_date=today, end_date=today)
+
+    def work(self, worker, workers, start, duration):
+        goals = []
+        for user_id in User.objects.order_by("id").values_list("id", flat=True)[worker::workers]:
+            with sharding.use_user(user_id):
+                goals.append((user_id, Goal.objects.filter(user_id=user_id).values_list("id", flat=True).get()))
+
+        latencies, errors, i = [], 0, 0
+        time.sleep(max(0.0, start - time.time()))
+        deadline = start + duration
+        while time.time() < deadline:
+            user_id, goal_id = goals[i % len(goals)]
+            t0 = time.perf_counter()
+            try:
+                with sharding.use_user(user_id), sharding.atomic():
+                    Task.objects.create(goal_id=goal_id, title=f"task {worker}-{i}")
+            except Exception:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - t0)
+            i += 1
+        self.stdout.write(json.dumps({"latencies": latencies, "errors": errors}))
+
+    # -----------------------------
+    # DRIVER
+    # -----------------------------
+    def run_shards(self, shards, options):
+        manage = [sys.executable, str(settings.BASE_DIR / "manage.py")]
+        workdir = tempfile.mkdtemp(prefix=f"shards{shards}-")
+        env = {**os.environ, "DB_SHARDS": str(shards), "DB_DIR": workdir}
+        try:
+            subprocess.run([*manage, "migrate_shards", "-v", "0"], env=env, check=True, stdout=subprocess.DEVNULL)
+            subprocess.run(
+                [*manage, "benchmark_shards", "--setup", "--users", str(options["users"])],
+                env=env,
+                check=True,
+            )
+
+            workers = min(options["workers"], options["users"])
+            start = time.time() + 2.0 + workers  # after every worker has started Django
+            procs = [
+                subprocess.Popen(
+                    [
+                        *manage, "benchmark_shards",
+                        "--worker", str(w),
+                        "--workers", str(workers),
+                        "--start", str(start),
+                        "--duration", str(options["duration"]),
+                    ],
+                    env=env,
+                    stdout=subprocess.PIPE,
+                    text=True,
+                )
+                for w in range(workers)
+            ]
+            latencies, errors = [], 0
+            for proc in procs:
+                out, _ = proc.communicate()
+                result = json.loads(out.strip().splitlines()[-1])
+                latencies += result["latencies"]
+                errors += result["errors"]
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        return summarize(latencies, options["duration"], len(latencies), errors)
+
+    def handle(self, *args, **options):
+        if options["setup"]:
+            return self.setup(options["users"])
+        if options["worker"] is not None:
+            return self.work(options["worker"], options["workers"], options["start"], options["duration"])
+
+        results = {}
+        for shards in [int(n) for n in options["shards"].split(",")]:
+            self.stdout.write(f"{shards} shards: {options['workers']} writers for {options['duration']} s ...")
+            results[f"shards={shards}"] = self.run_shards(shards, options)
+
+        report = harness.build_report(
+            None,
+            results,
+            workers=options["workers"],
+            users=options["users"],
+            duration=options["duration"],
+            cpus=os.cpu_count(),
+        )
+        path = harness.save_report(report, options["output"])
+
+        self.stdout.write(f"\n{'databases':<12}{'writes/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'errors':>8}")
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<12}{r['writes_per_s']:>10}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['max_ms']:>9}{r['errors']:>8}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"\nReport written to {path}"))
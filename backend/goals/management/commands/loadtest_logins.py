@@ -0,0 +1,149 @@
+import asyncio
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from benchmarks import datagen, harness
+
+PASSWORD = "correct horse battery staple"
+
+# the old DRF TokenObtainPairView hashes on Django's sync thread
+MODES = {"sync": "benchmarks.legacy_urls", "async": "backend.urls"}
+
+
+def summarize(latencies, elapsed, errors):
+    latencies.sort()
+    ms = lambda s: round(s * 1000, 1)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": ms(harness.percentile(latencies, 50)),
+        "p95_ms": ms(harness.percentile(latencies, 95)),
+        "max_ms": ms(latencies[-1]) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the app through its ASGI handler: a login storm (concurrent "
+        "POST /api/token/) while one client keeps doing task CRUD. Reports "
+        "login throughput and CRUD latency for the old sync login view and "
+        "the async one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=8, help="concurrent login clients")
+        parser.add_argument("--duration", type=float, default=10.0, help="seconds per phase")
+        parser.add_argument("--modes", default="sync,async")
+        parser.add_argument("--output", help="report path (default benchmarks/results/)")
+
+    async def login_loop(self, deadline, username, latencies, errors):
+        client = AsyncClient()
+        body = {"username": username, "password": PASSWORD}
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            response = await client.post("/api/token/", body, content_type="application/json")
+            latencies.append(time.perf_counter() - t0)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+    async def crud_loop(self, deadline, token, task_ids, latencies, errors):
+        client = AsyncClient()
+        headers = {"authorization": f"Bearer {token}"}
+        i = 0
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            if i % 2:
+                response = await client.patch(
+                    f"/api/tasks/{task_ids[i % len(task_ids)]}/",
+                    {"completed": bool(i % 4 == 1)},
+                    content_type="application/json",
+                    headers=headers,
+                )
+            else:
+                response = await client.get("/api/tasks/", headers=headers)
+            latencies.append(time.perf_counter() - t0)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+            i += 1
+            await asyncio.sleep(0.01)
+
+    async def phase(self, duration, logins, usernames, token, task_ids):
+        deadline = time.perf_counter() + duration
+        crud, crud_errors = [], []
+        login, login_errors = [], []
+        started = time.perf_counter()
+        await asyncio.gather(
+            self.crud_loop(deadline, token, task_ids, crud, crud_errors),
+            *(
+                self.login_loop(deadline, usernames[i % len(usernames)], login, login_errors)
+                for i in range(logins)
+            ),
+        )
+        elapsed = time.perf_counter() - started
+        result = {"crud": summarize(crud, elapsed, len(crud_errors))}
+        if logins:
+            result["login"] = summarize(login, elapsed, len(login_errors))
+        return result
+
+    def handle(self, *args, **options):
+        modes = [m for m in options["modes"].split(",") if m in MODES]
+        duration = options["duration"]
+
+        results = {}
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            spec = datagen.DatasetSpec(users=1, goals_per_user=10, tasks_per_goal=20, habits_per_user=0)
+            crud_user = datagen.generate(spec)[0]
+            token = str(RefreshToken.for_user(crud_user).access_token)
+            task_ids = list(
+                crud_user.goals.values_list("tasks__id", flat=True).exclude(tasks__id=None)
+            )
+
+            # one real (default hasher) hash shared by all storm users
+            encoded = make_password(PASSWORD)
+            usernames = [f"storm{i}" for i in range(options["logins"])]
+            User.objects.bulk_create(User(username=u, password=encoded) for u in usernames)
+
+            for mode in modes:
+                with override_settings(ROOT_URLCONF=MODES[mode]):
+                    self.stdout.write(f"{mode}: CRUD alone ...")
+                    results[f"{mode}/idle"] = asyncio.run(
+                        self.phase(duration, 0, usernames, token, task_ids)
+                    )
+                    self.stdout.write(f"{mode}: CRUD during {options['logins']} concurrent logins ...")
+                    results[f"{mode}/storm"] = asyncio.run(
+                        self.phase(duration, options["logins"], usernames, token, task_ids)
+                    )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = harness.build_report(None, results, logins=options["logins"], duration=duration)
+        path = harness.save_report(report, options["output"])
+
+        self.stdout.write(
+            f"\n{'phase':<14}{'logins/s':>10}{'login p95':>11}"
+            f"{'crud p50':>10}{'crud p95':>10}{'crud max':>10}{'errors':>8}"
+        )
+        for name, r in results.items():
+            login = r.get("login", {})
+            errors = r["crud"]["errors"] + login.get("errors", 0)
+            self.stdout.write(
+                f"{name:<14}{login.get('throughput_rps', '-'):>10}{login.get('p95_ms', '-'):>11}"
+                f"{r['crud']['p50_ms']:>10}{r['crud']['p95_ms']:>10}{r['crud']['max_ms']:>10}{errors:>8}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"\nReport written to {path}"))
@@ -0,0 +1,29 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from goals import sharding
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply migrations to `default` and every shard database (DB_SHARDS). "
+        "The router decides which tables each one gets."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("app_label", nargs="?")
+        parser.add_argument("migration_name", nargs="?")
+
+    def handle(self, *args, **options):
+        labels = [label for label in (options["app_label"], options["migration_name"]) if label]
+        for alias in (sharding.DEFAULT, *sharding.SHARDS):
+            self.stdout.write(f"Migrating {alias} ...")
+            call_command(
+                "migrate",
+                *labels,
+                database=alias,
+                interactive=False,
+                verbosity=max(0, options["verbosity"] - 1),
+                stdout=self.stdout,
+            )
+        self.stdout.write(self.style.SUCCESS(f"Migrated {1 + len(sharding.SHARDS)} databases"))
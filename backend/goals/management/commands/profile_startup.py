@@ -0,0 +1,117 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# runs in a fresh interpreter so nothing is imported yet. Loading the
+# URLconf pulls in every view module, which a worker otherwise does on
+# its first request.
+BOOT = (
+    "import time; t = time.perf_counter(); "
+    "import {module}; "
+    "from django.urls import get_resolver; get_resolver().url_patterns; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def parse_importtime(stderr):
+    """{module: self_us} from `python -X importtime` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        modules[name.strip()] = int(self_us)
+    return modules
+
+
+def classify(package):
+    if (settings.BASE_DIR / package).is_dir():
+        return "project"
+    if package == "django":
+        return "django"
+    if package in sys.stdlib_module_names or package.startswith("_"):
+        return "stdlib"
+    return "third-party"
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot the WSGI app (and its URLconf) in fresh interpreters with "
+        "-X importtime and report cold-start import cost per app / package."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--module", default="backend.wsgi", help="module to import")
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--top", type=int, default=15, help="packages to list")
+        parser.add_argument("--json", dest="json_path", help="also write the report here")
+
+    def boot(self, module):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get(
+            "DJANGO_SETTINGS_MODULE", "backend.settings"
+        )}
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", BOOT.format(module=module)],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise CommandError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+        return float(proc.stdout.strip().splitlines()[-1]), parse_importtime(proc.stderr)
+
+    def handle(self, *args, **options):
+        runs = max(1, options["runs"])
+
+        walls = []
+        per_package = defaultdict(list)
+        for _ in range(runs):
+            wall, modules = self.boot(options["module"])
+            walls.append(wall)
+
+            totals = defaultdict(int)
+            for name, self_us in modules.items():
+                totals[name.split(".")[0]] += self_us
+            for package, us in totals.items():
+                per_package[package].append(us)
+
+        # median over runs; a package missing from a run counts as 0
+        packages = {
+            package: statistics.median(values + [0] * (runs - len(values))) / 1000
+            for package, values in per_package.items()
+        }
+        groups = defaultdict(float)
+        for package, ms in packages.items():
+            groups[classify(package)] += ms
+
+        report = {
+            "module": options["module"],
+            "runs": runs,
+            "wall_ms": round(statistics.median(walls) * 1000, 1),
+            "groups_ms": {k: round(v, 1) for k, v in sorted(groups.items(), key=lambda i: -i[1])},
+            "packages_ms": {
+                package: round(ms, 1)
+                for package, ms in sorted(packages.items(), key=lambda i: -i[1])
+            },
+        }
+
+        self.stdout.write(f"import {report['module']} + URLconf: {report['wall_ms']} ms (median of {runs})\n")
+        for group, ms in report["groups_ms"].items():
+            self.stdout.write(f"  {group:<14}{ms:>10} ms")
+        self.stdout.write(f"\n{'package':<28}{'group':<14}{'ms':>10}")
+        for package, ms in list(report["packages_ms"].items())[: options["top"]]:
+            self.stdout.write(f"{package:<28}{classify(package):<14}{ms:>10}")
+
+        if options["json_path"]:
+            with open(options["json_path"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"\nReport written to {options['json_path']}"))
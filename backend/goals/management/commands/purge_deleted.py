@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from goals import purge, sharding
+from goals.models import Goal, UserProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Purge soft-deleted goals and accounts in chunks. The app does this in "
+        "the background already; run it from cron to finish work a restart cut short."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=purge.CHUNK_SIZE)
+        parser.add_argument(
+            "--pause", type=float, default=purge.CHUNK_PAUSE, help="seconds to sleep between chunks"
+        )
+
+    def handle(self, *args, **options):
+        users = goals = 0
+        for _ in sharding.each_shard():
+            users += UserProfile.objects.filter(deleted_at__isnull=False).count()
+            goals += Goal.all_objects.filter(deleted_at__isnull=False).count()
+        deleted = purge.purge_pending(chunk_size=max(1, options["chunk_size"]), pause=options["pause"])
+        self.stdout.write(f"Purged {users} accounts and {goals} goals ({deleted} rows)")
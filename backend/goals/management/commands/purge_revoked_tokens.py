@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from goals import revocation
+from goals.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete revoked refresh tokens that have expired anyway, in batches. "
+        "Safe to run from cron as often as you like."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=revocation.PURGE_BATCH)
+        parser.add_argument(
+            "--pause", type=float, default=0.0, help="seconds to sleep between batches"
+        )
+
+    def handle(self, *args, **options):
+        deleted = revocation.purge_expired(
+            batch_size=max(1, options["batch_size"]), pause=options["pause"]
+        )
+        remaining = RevokedToken.objects.count()
+        self.stdout.write(f"Deleted {deleted} expired revocations, {remaining} still active")
@@ -0,0 +1,178 @@
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from goals import purge, search, sharding
+from goals.models import ArchivedGoal, ArchivedTask, Goal, Task, UserShard
+
+
+# archived rows take their ids from the hot table (restore_goal() moves
+# them back), so new ones are reserved from its sequence
+ID_SOURCE = {ArchivedGoal: Goal, ArchivedTask: Task}
+
+
+def reserve_ids(connection, model, count):
+    """
+    `count` ids that are unused in `model`'s table on this (SQLite)
+    database, taken from its AUTOINCREMENT sequence.
+    """
+    if not count:
+        return iter(())
+    source = ID_SOURCE.get(model, model)._meta.db_table
+    tables = {source, model._meta.db_table}
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = %s", [source])
+        row = cursor.fetchone()
+        last = row[0] if row else 0
+        for table in tables:
+            cursor.execute(f"SELECT MAX(id) FROM {connection.ops.quote_name(table)}")
+            last = max(last, cursor.fetchone()[0] or 0)
+        if row:
+            cursor.execute("UPDATE sqlite_sequence SET seq = %s WHERE name = %s", [last + count, source])
+        else:
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", [source, last + count])
+    return iter(range(last + 1, last + count + 1))
+
+
+def copy_rows(model, lookup, user_id, src, dst, new_ids, chunk_size):
+    """
+    INSERT the user's `model` rows from `src` into `dst` with plain SQL:
+    same values and timestamps, no save() / signals (the rollups move as
+    rows too). Ids are only unique per database, so every row gets a new
+    one; foreign keys to rows copied earlier follow `new_ids`
+    ({model: {old id: new id}}), which this extends.
+    """
+    fields = model._meta.concrete_fields
+    connection = connections[dst]
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = ", ".join(connection.ops.quote_name(f.column) for f in fields)
+    sql = f"INSERT INTO {table} ({columns}) VALUES ({', '.join(['%s'] * len(fields))})"
+
+    rows = (
+        model._base_manager.using(src)
+        .filter(**{lookup: user_id})
+        .order_by("pk")
+        .values_list(*(f.attname for f in fields))
+    )
+    ids = reserve_ids(connection, model, rows.count())
+    remap = {
+        i: new_ids[f.related_model]
+        for i, f in enumerate(fields)
+        if f.is_relation and f.related_model in new_ids
+    }
+    pk = fields.index(model._meta.pk)
+    moved = new_ids[model] = {}
+
+    batch = []
+    with connection.cursor() as cursor:
+        for row in rows.iterator(chunk_size=chunk_size):
+            row = list(row)
+            moved[row[pk]] = row[pk] = next(ids)
+            for i, mapping in remap.items():
+                if row[i] is not None:
+                    row[i] = mapping[row[i]]
+            batch.append([f.get_db_prep_save(value, connection) for f, value in zip(fields, row)])
+            if len(batch) == chunk_size:
+                cursor.executemany(sql, batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+    return len(moved)
+
+
+def move_user(user_id, src, dst, chunk_size=purge.CHUNK_SIZE):
+    """Copy a user's rows to `dst`, point the directory there, then clear `src`."""
+    # parents first; leftovers of an interrupted move are replaced
+    plan = purge.USER_PLAN[::-1]
+    with sharding.use_shard(dst):
+        for model, lookup in purge.USER_PLAN:
+            purge.delete_chunked(model, lookup, user_id, chunk_size=chunk_size, pause=0)
+        new_ids = {}
+        with transaction.atomic(using=dst):
+            copied = sum(
+                copy_rows(model, lookup, user_id, src, dst, new_ids, chunk_size) for model, lookup in plan
+            )
+        search.rebuild([user_id])
+
+    sharding.assign_user(user_id, dst)
+
+    with sharding.use_shard(src):
+        search.unindex_user(user_id, max(1, chunk_size // 4))
+        for model, lookup in purge.USER_PLAN:
+            purge.delete_chunked(model, lookup, user_id, chunk_size=chunk_size, pause=0)
+    return copied
+
+
+class Command(BaseCommand):
+    help = (
+        "Move users between shard databases until every shard holds the same "
+        "number of users (or move one user with --user/--to). Users without a "
+        "directory entry, i.e. created before DB_SHARDS was set, are moved out "
+        "of `default`. Moved rows get new ids on their new shard. Run it with "
+        "the app stopped: processes cache the user -> shard mapping."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="move only this user ...")
+        parser.add_argument("--to", help="... to this shard")
+        parser.add_argument("--chunk-size", type=int, default=purge.CHUNK_SIZE)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def plan(self):
+        """[(user_id, from, to)] leaving the shards' user counts at most 1 apart."""
+        directory = dict(UserShard.objects.values_list("user_id", "alias"))
+        load = Counter({alias: 0 for alias in sharding.SHARDS})
+        moves = []
+        for user_id in User.objects.order_by("id").values_list("id", flat=True):
+            alias = directory.get(user_id)
+            if alias in load:
+                load[alias] += 1
+            else:
+                # created before DB_SHARDS was set: still in `default`
+                target = min(sharding.SHARDS, key=load.__getitem__)
+                moves.append((user_id, alias or sharding.DEFAULT, target))
+                load[target] += 1
+
+        # then the newest users of the fullest shard go to the emptiest
+        by_shard = {alias: [] for alias in sharding.SHARDS}
+        for user_id, alias in sorted(directory.items()):
+            if alias in by_shard:
+                by_shard[alias].append(user_id)
+        while True:
+            fullest = max(sharding.SHARDS, key=load.__getitem__)
+            emptiest = min(sharding.SHARDS, key=load.__getitem__)
+            if load[fullest] - load[emptiest] <= 1 or not by_shard[fullest]:
+                return moves
+            moves.append((by_shard[fullest].pop(), fullest, emptiest))
+            load[fullest] -= 1
+            load[emptiest] += 1
+
+    def handle(self, *args, **options):
+        if not sharding.enabled():
+            raise CommandError("Sharding is off; set DB_SHARDS first")
+
+        if options["user"] is not None:
+            if options["to"] not in sharding.SHARDS:
+                raise CommandError(f"--to must be one of {', '.join(sharding.SHARDS)}")
+            alias = UserShard.objects.filter(user_id=options["user"]).values_list("alias", flat=True).first()
+            moves = [(options["user"], alias or sharding.DEFAULT, options["to"])]
+        else:
+            moves = self.plan()
+
+        moved = rows = 0
+        for user_id, src, dst in moves:
+            if src == dst:
+                continue
+            self.stdout.write(f"user {user_id}: {src} -> {dst}")
+            if options["dry_run"]:
+                continue
+            rows += move_user(user_id, src, dst, chunk_size=max(1, options["chunk_size"]))
+            moved += 1
+        sharding.forget()
+
+        if options["dry_run"]:
+            self.stdout.write(f"{len(moves)} users would move")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Moved {moved} users ({rows} rows)"))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from goals import bitmaps, sharding
+from goals.models import Habit, HabitCompletion, HabitYearBitmap
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-year habit completion bitmaps from HabitCompletion rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--habit", type=int, action="append", help="only these habit ids")
+        parser.add_argument("--verify", action="store_true", help="compare bitmaps against rows afterwards")
+        parser.add_argument("--check-only", action="store_true", help="verify without rebuilding")
+
+    def handle(self, *args, **options):
+        habit_ids = options["habit"]
+
+        if not options["check_only"]:
+            written = sum(bitmaps.rebuild(habit_ids) for _ in sharding.each_shard())
+            self.stdout.write(f"Wrote {written} bitmap rows")
+
+        if options["verify"] or options["check_only"]:
+            mismatched = []
+            for _ in sharding.each_shard():
+                mismatched += self.verify(habit_ids)
+            if mismatched:
+                self.stderr.write(self.style.ERROR(
+                    f"{len(mismatched)} habits out of sync: {mismatched[:20]}"
+                ))
+                raise SystemExit(1)
+            self.stdout.write(self.style.SUCCESS("Bitmaps match completion rows"))
+
+    def verify(self, habit_ids=None):
+        habits = Habit.objects.all()
+        if habit_ids:
+            habits = habits.filter(id__in=habit_ids)
+
+        mismatched = []
+        for habit_id in habits.values_list("id", flat=True).iterator():
+            rows = set(
+                HabitCompletion.objects.filter(habit_id=habit_id).values_list("date", flat=True)
+            )
+            calendar = bitmaps.HabitCalendar.from_rows(
+                HabitYearBitmap.objects.filter(habit_id=habit_id)
+            )
+            if set(calendar.dates()) != rows:
+                mismatched.append(habit_id)
+        return mismatched
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from goals import search, sharding
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index (goals/search.py) from goals, tasks and habits."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", help="only these user ids")
+
+    def handle(self, *args, **options):
+        if not search.enabled():
+            raise CommandError("The search index is only kept on SQLite (FTS5)")
+
+        written = sum(search.rebuild(options["user"]) for _ in sharding.each_shard())
+        self.stdout.write(self.style.SUCCESS(f"Indexed {written} rows"))
@@ -0,0 +1,58 @@
+import sqlite3
+import time
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _path(name):
+    # replicas are opened as file:<path>?mode=ro
+    return urlparse(str(name)).path if str(name).startswith("file:") else str(name)
+
+
+def copy_database(source, target):
+    """
+    Overwrite `target` with a snapshot of `source` using SQLite's online
+    backup. Readers of `target` wait on its lock for the copy (a few ms)
+    and then see the new contents, open connections included.
+    """
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target, timeout=30)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the SQLite stand-in read replicas (DB_REPLICAS) from their "
+        "primaries, once or every --every seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--every", type=float, help="keep copying, this many seconds apart")
+
+    def sync(self):
+        started = time.perf_counter()
+        count = 0
+        for primary, replicas in settings.DATABASE_REPLICAS.items():
+            source = _path(settings.DATABASES[primary]["NAME"])
+            for replica in replicas:
+                copy_database(source, _path(settings.DATABASES[replica]["NAME"]))
+                count += 1
+        return count, (time.perf_counter() - started) * 1000
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No replicas configured; set DB_REPLICAS first")
+
+        while True:
+            count, ms = self.sync()
+            if options["verbosity"] > 1 or not options["every"]:
+                self.stdout.write(f"Copied {count} replicas in {ms:.0f} ms")
+            if not options["every"]:
+                return
+            time.sleep(options["every"])
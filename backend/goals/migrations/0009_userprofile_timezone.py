@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0008_habityearbitmap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='timezone',
+            field=models.CharField(default='UTC', max_length=64),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# frozen copies of goals/search.py at the time of this migration: rowid is
+# object id * 4 + kind code (0 goal, 1 task, 2 habit), owner is "u<user id>"
+CREATE_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS goals_search USING fts5(
+    kind UNINDEXED,
+    object_id UNINDEXED,
+    goal_id UNINDEXED,
+    owner,
+    title,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+BACKFILL = [
+    """
+    INSERT OR REPLACE INTO goals_search (rowid, kind, object_id, goal_id, owner, title, body)
+    SELECT id * 4, 0, id, id, 'u' || user_id, title, COALESCE(description, '')
+    FROM goals_goal
+    """,
+    """
+    INSERT OR REPLACE INTO goals_search (rowid, kind, object_id, goal_id, owner, title, body)
+    SELECT t.id * 4 + 1, 1, t.id, t.goal_id, 'u' || g.user_id, t.title, ''
+    FROM goals_task t JOIN goals_goal g ON g.id = t.goal_id
+    """,
+    """
+    INSERT OR REPLACE INTO goals_search (rowid, kind, object_id, goal_id, owner, title, body)
+    SELECT id * 4 + 2, 2, id, goal_id, 'u' || user_id, title, ''
+    FROM goals_habit
+    """,
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(CREATE_TABLE)
+    for sql in BACKFILL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS goals_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goals", "0011_goal_task_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
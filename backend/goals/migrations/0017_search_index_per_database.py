@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# Before sharding, 0012's backfill wrote through the default connection
+# whatever database was being migrated. Refill each database's index
+# from its own rows, so every shard indexes exactly the users it holds.
+# Soft-deleted goals (0014) and their tasks / habits stay out.
+REBUILD = [
+    "DELETE FROM goals_search",
+    """
+    INSERT INTO goals_search (rowid, kind, object_id, goal_id, owner, title, body)
+    SELECT id * 4, 0, id, id, 'u' || user_id, title, COALESCE(description, '')
+    FROM goals_goal WHERE deleted_at IS NULL
+    """,
+    """
+    INSERT INTO goals_search (rowid, kind, object_id, goal_id, owner, title, body)
+    SELECT t.id * 4 + 1, 1, t.id, t.goal_id, 'u' || g.user_id, t.title, ''
+    FROM goals_task t JOIN goals_goal g ON g.id = t.goal_id
+    WHERE g.deleted_at IS NULL
+    """,
+    """
+    INSERT INTO goals_search (rowid, kind, object_id, goal_id, owner, title, body)
+    SELECT h.id * 4 + 2, 2, h.id, h.goal_id, 'u' || h.user_id, h.title, ''
+    FROM goals_habit h JOIN goals_goal g ON g.id = h.goal_id
+    WHERE g.deleted_at IS NULL
+    """,
+]
+
+
+def rebuild_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in REBUILD:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goals", "0016_user_shards"),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+from datetime import datetime, time, timezone as dt_timezone
+
+from django.db import migrations
+from django.db.models import Max
+from django.utils import timezone
+
+# 0010 added Goal.completed_at without filling it, so goals completed
+# before then read as "completed, never". Give them the moment their last
+# task was completed, else noon UTC on their end date, else (no tasks and
+# an end date still ahead) the migration time. The rollups only see the
+# result after `manage.py rebuild_rollups`.
+
+
+def _completed_at(goal, last_task, now):
+    if last_task is not None:
+        return last_task
+    end = datetime.combine(goal.end_date, time(12), tzinfo=dt_timezone.utc)
+    return min(end, now)
+
+
+def backfill_completed_at(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    now = timezone.now()
+    for goal_name, task_name in (("Goal", "Task"), ("ArchivedGoal", "ArchivedTask")):
+        Goal = apps.get_model("goals", goal_name)
+        Task = apps.get_model("goals", task_name)
+        goals = list(
+            Goal._default_manager.using(alias).filter(is_completed=True, completed_at__isnull=True)
+        )
+        if not goals:
+            continue
+        last_task = dict(
+            Task._default_manager.using(alias)
+            .filter(goal_id__in=[goal.pk for goal in goals], completed_at__isnull=False)
+            .values("goal_id").annotate(last=Max("completed_at")).order_by()
+            .values_list("goal_id", "last")
+        )
+        for goal in goals:
+            goal.completed_at = _completed_at(goal, last_task.get(goal.pk), now)
+        Goal._default_manager.using(alias).bulk_update(goals, ["completed_at"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goals", "0017_search_index_per_database"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+    ]
@@ -4,11 +4,74 @@ from django.conf import settings
 from django.utils import timezone
 
 
+# ---------------------------------------------------
+# OPTIMISTIC CONCURRENCY
+# ---------------------------------------------------
+class VersionConflict(Exception):
+    """The row was changed by someone else since this instance was loaded."""
+
+
+class VersionedModel(models.Model):
+    """
+    `version` goes up by one on every save that writes it (a plain save(),
+    or update_fields including "version"), and that UPDATE only matches
+    the row at the version this instance was loaded with:
+
+        UPDATE ... SET ..., version = 4 WHERE id = 7 AND version = 3
+
+    If another writer got there first nothing matches and VersionConflict
+    is raised instead of silently overwriting their change. Saves limited
+    to other fields (progress recalculation, reordering) leave it alone.
+    """
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        self._expected_version = None
+        if not self._state.adding and (update_fields is None or "version" in update_fields):
+            self._expected_version = self.version
+            self.version += 1
+        try:
+            super().save(*args, **kwargs)
+        except VersionConflict:
+            self.version = self._expected_version
+            raise
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected = getattr(self, "_expected_version", None)
+        if expected is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+        base_qs = base_qs.filter(version=expected)
+        if not super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update):
+            raise VersionConflict(f"{self._meta.model_name} {pk_val} is no longer at version {expected}")
+        return True
+
+
+# ---------------------------------------------------
+# SOFT DELETE (rows are purged later by goals/purge.py)
+# ---------------------------------------------------
+# Task and Habit keep a plain default manager: hiding a deleted goal's
+# children there would join goals into every task / habit query, and they
+# are purged soon after. The views and helpers that list a user's tasks /
+# habits filter on goal__deleted_at__isnull themselves.
+class LiveManager(models.Manager):
+    """Default manager that hides soft-deleted goals."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 # ---------------------------------------------------
 # GOAL MODEL
 # ---------------------------------------------------
-class Goal(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="goals")
+class Goal(VersionedModel):
+    # no DB constraints on foreign keys to auth_user: with DB_SHARDS these
+    # tables live in a shard file without it (goals/sharding.py)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="goals", db_constraint=False)
 
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
@@ -21,18 +84,97 @@ class Goal(models.Model):
 
     progress = models.IntegerField(default=0)
     is_completed = models.BooleanField(default=False)
+    completed_at = models.DateTimeField(null=True, blank=True)
 
     # Drag-and-drop sorting
     order = models.PositiveIntegerField(default=0)
 
+    # set by goals.purge.soft_delete_goal; the row and its children go later
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = LiveManager()
+    all_objects = models.Manager()
+
     def __str__(self):
         return self.title
 
+    def recalculate_progress(self):
+        """
+        Recompute progress / is_completed from this goal's tasks
+        with a single aggregate query.
+        """
+        counts = self.tasks.aggregate(
+            total=models.Count("id"),
+            done=models.Count("id", filter=models.Q(completed=True)),
+        )
+        total = counts["total"]
+        self.progress = int((counts["done"] / total) * 100) if total > 0 else 0
+        changed = self._set_completed(self.progress == 100)
+        self.save(update_fields=["progress", "is_completed", "completed_at"])
+
+        if changed:
+            from . import rollups
+            rollups.goals_completed_changed([changed])
+
+    def _set_completed(self, completed):
+        """
+        Update is_completed / completed_at. Returns (goal, old_completed_at,
+        new_completed_at) when the completion state flipped, else None.
+        """
+        if completed == self.is_completed:
+            return None
+        old = self.completed_at
+        self.is_completed = completed
+        self.completed_at = timezone.now() if completed else None
+        return (self, old, self.completed_at)
+
+    @classmethod
+    def recalculate_progress_for(cls, goal_ids):
+        """
+        Bulk version of recalculate_progress(): one grouped aggregate
+        and one bulk_update for any number of goals.
+        """
+        goal_ids = set(goal_ids)
+        if not goal_ids:
+            return
+
+        counts = {
+            row["goal_id"]: row
+            for row in Task.objects.filter(goal_id__in=goal_ids)
+            .values("goal_id")
+            .annotate(
+                total=models.Count("id"),
+                done=models.Count("id", filter=models.Q(completed=True)),
+            )
+        }
+
+        goals = list(
+            cls.objects.filter(id__in=goal_ids).only(
+                "id", "user_id", "is_completed", "completed_at"
+            )
+        )
+        changes = []
+        for goal in goals:
+            row = counts.get(goal.id)
+            total = row["total"] if row else 0
+            done = row["done"] if row else 0
+            goal.progress = int((done / total) * 100) if total > 0 else 0
+            changed = goal._set_completed(goal.progress == 100)
+            if changed:
+                changes.append(changed)
+
+        cls.objects.bulk_update(goals, ["progress", "is_completed", "completed_at"])
+
+        # bulk_update sends no signals, so feed the rollups directly
+        if changes:
+            from . import rollups
+            rollups.goals_completed_changed(changes)
+
 
 # ---------------------------------------------------
 # TASK MODEL  (✅ now with created_at + completed_at)
 # ---------------------------------------------------
-class Task(models.Model):
+class Task(VersionedModel):
     goal = models.ForeignKey(Goal, related_name="tasks", on_delete=models.CASCADE)
 
     title = models.CharField(max_length=200)
@@ -48,8 +190,13 @@ class Task(models.Model):
         - when completed flips False -> True → set completed_at = now
         - when completed flips True -> False → clear completed_at
         """
+        # read by goals.rollups / the search index after save
+        self._old_completed_at = self._old_title = self._old_goal_id = None
         if self.pk:
             old = Task.objects.get(pk=self.pk)
+            self._old_completed_at = old.completed_at
+            self._old_title = old.title
+            self._old_goal_id = old.goal_id
             if not old.completed and self.completed and self.completed_at is None:
                 # just completed
                 self.completed_at = timezone.now()
@@ -76,12 +223,18 @@ def avatar_upload_path(instance, filename):
 
 class UserProfile(models.Model):
     user = models.OneToOneField(
-        User, on_delete=models.CASCADE, related_name="profile"
+        User, on_delete=models.CASCADE, related_name="profile", db_constraint=False
     )
 
     avatar = models.ImageField(upload_to=avatar_upload_path, blank=True, null=True)
+    # {"source": <avatar name>, "32": <thumb name>, ...} filled in by goals.thumbnails
+    avatar_thumbnails = models.JSONField(default=dict, blank=True)
     bio = models.TextField(blank=True)
     theme = models.CharField(max_length=10, default="light")  # dark/light
+    # IANA name, decides when the user's "today" rolls over (goals/localtime.py)
+    timezone = models.CharField(max_length=64, default="UTC")
+    # account deletion requested (goals.purge.soft_delete_user)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     def __str__(self):
         return f"{self.user.username}'s Profile"
@@ -94,7 +247,8 @@ class Habit(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name="habits"
+        related_name="habits",
+        db_constraint=False,
     )
     goal = models.ForeignKey(
         Goal,
@@ -123,4 +277,141 @@ class HabitCompletion(models.Model):
         return f"{self.habit.title} @ {self.date}"
 
 
+class HabitYearBitmap(models.Model):
+    """
+    One year of a habit's completions packed into 366 bits
+    (bit N = day N of the year). Derived from HabitCompletion,
+    see goals/bitmaps.py.
+    """
+    habit = models.ForeignKey(
+        Habit,
+        on_delete=models.CASCADE,
+        related_name="year_bitmaps"
+    )
+    year = models.PositiveSmallIntegerField()
+    bits = models.BinaryField(max_length=46)
+
+    class Meta:
+        unique_together = ("habit", "year")
+
+    def __str__(self):
+        return f"{self.habit.title} bitmap {self.year}"
+
+
+# ---------------------------------------------------
+# ARCHIVE (cold rows moved out by goals/archive.py)
+# ---------------------------------------------------
+class ArchivedGoal(models.Model):
+    """A completed goal moved out of Goal; keeps its id and fields."""
+    id = models.BigIntegerField(primary_key=True)
+    version = models.PositiveIntegerField(default=1)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="archived_goals", db_constraint=False
+    )
+
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+
+    start_date = models.DateField()
+    end_date = models.DateField()
+
+    category = models.CharField(max_length=100, default="General")
+    priority = models.CharField(max_length=10, default="Medium")
+
+    progress = models.IntegerField(default=0)
+    is_completed = models.BooleanField(default=False)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    order = models.PositiveIntegerField(default=0)
+
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.title} (archived)"
+
+
+class ArchivedTask(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    version = models.PositiveIntegerField(default=1)
+    goal = models.ForeignKey(ArchivedGoal, related_name="tasks", on_delete=models.CASCADE)
+
+    title = models.CharField(max_length=200)
+    completed = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField()
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.title} (archived)"
+
 
+class ArchivedHabitCompletion(models.Model):
+    """A HabitCompletion from a year that is no longer kept hot."""
+    habit = models.ForeignKey(
+        Habit,
+        on_delete=models.CASCADE,
+        related_name="archived_completions"
+    )
+    date = models.DateField()
+
+    class Meta:
+        unique_together = ("habit", "date")
+
+    def __str__(self):
+        return f"{self.habit.title} @ {self.date} (archived)"
+
+
+# ---------------------------------------------------
+# ANALYTICS ROLLUPS (maintained by goals/rollups.py)
+# ---------------------------------------------------
+class StatsRollup(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+", db_constraint=False)
+    period_start = models.DateField()
+
+    tasks_created = models.IntegerField(default=0)
+    tasks_completed = models.IntegerField(default=0)
+    goals_completed = models.IntegerField(default=0)
+    habit_checkins = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+        unique_together = ("user", "period_start")
+        ordering = ["period_start"]
+
+
+class UserDailyStats(StatsRollup):
+    class Meta(StatsRollup.Meta):
+        pass
+
+
+class UserWeeklyStats(StatsRollup):
+    # period_start is the Monday of the week
+    class Meta(StatsRollup.Meta):
+        pass
+
+
+# ---------------------------------------------------
+# REVOKED REFRESH TOKENS (see goals/revocation.py)
+# ---------------------------------------------------
+class RevokedToken(models.Model):
+    """
+    jti of a refresh token that may no longer be used. Only kept until the
+    token would have expired anyway; purge_revoked_tokens removes the rest.
+    """
+    jti = models.UUIDField(unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.jti} (until {self.expires_at:%Y-%m-%d})"
+
+
+# ---------------------------------------------------
+# USER SHARDS (goals/sharding.py)
+# ---------------------------------------------------
+class UserShard(models.Model):
+    """Which shard database holds the user's data; lives in `default`."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="+")
+    alias = models.CharField(max_length=32, db_index=True)
+
+    def __str__(self):
+        return f"user {self.user_id} on {self.alias}"
@@ -0,0 +1,87 @@
+"""
+Password hashing off the request path.
+
+PBKDF2 with Django's default iteration count takes about half a second of
+CPU per hash. Done inline, a burst of logins ties up every worker and all
+other requests wait behind it. Here hashing runs on a small, bounded
+thread pool (hashlib releases the GIL, so the pool uses real cores) and
+the async auth views await it without blocking the event loop.
+
+The pool also caps how much hashing can pile up: once PASSWORD_HASH_WORKERS
+hashes are running and PASSWORD_HASH_QUEUE more are waiting, new requests
+get HashingBusy (a 503 with Retry-After) right away instead of queueing
+for seconds.
+
+Settings:
+    PASSWORD_HASH_WORKERS   threads, default half the CPUs (at least 1)
+    PASSWORD_HASH_QUEUE     extra hashes allowed to wait, default 32
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from backend.metrics import record_timing
+
+WORKERS = getattr(settings, "PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2))
+QUEUE = getattr(settings, "PASSWORD_HASH_QUEUE", 32)
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(WORKERS + QUEUE)
+
+
+class HashingBusy(Exception):
+    """Too many hashes running / queued; retry shortly."""
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(WORKERS, thread_name_prefix="pwhash")
+    return _executor
+
+
+async def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        future = get_executor().submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    # free the slot when the hash is done, even if the request was cancelled
+    future.add_done_callback(lambda _: _slots.release())
+
+    with record_timing("hash"):
+        return await asyncio.wrap_future(future)
+
+
+async def make_password(raw_password):
+    return await _run(hashers.make_password, raw_password)
+
+
+async def check_password(user, raw_password):
+    """
+    user.check_password() without blocking: True / False, and upgrades
+    the stored hash when the hasher settings changed.
+    """
+    needs_upgrade = []
+    ok = await _run(hashers.check_password, raw_password, user.password, needs_upgrade.append)
+    if ok and needs_upgrade:
+        user.password = await make_password(raw_password)
+        await user.asave(update_fields=["password"])
+    return ok
+
+
+async def burn_time(raw_password):
+    """
+    Hash once for a login with an unknown username, so response time
+    doesn't reveal which usernames exist (same as ModelBackend).
+    """
+    await make_password(raw_password)
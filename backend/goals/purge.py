@@ -0,0 +1,207 @@
+"""
+Soft delete + chunked purge for goals and whole accounts.
+
+Deleting a goal (or a user) through the ORM makes Django's collector load
+every Task / Habit / HabitCompletion underneath into memory and delete
+them in one transaction, which on SQLite locks the database for everyone
+until it's done. Instead:
+
+1. soft_delete_goal() / soft_delete_user() only mark the root row (for
+   a goal also fixing its rollups / search rows) in one short transaction.
+   Goal's default manager hides deleted goals, the task / habit views
+   filter out their children, and a deleted user can no longer log in,
+   so the delete takes effect right away.
+
+2. After commit a background worker (one thread per process) calls
+   purge_pending(): for each marked root it deletes the descendants
+   leaves-first with plain `DELETE ... WHERE id IN (...)`, PURGE_CHUNK_SIZE
+   rows per statement, each chunk in its own transaction. Memory and lock
+   time per step are bounded by the chunk size, not by the account.
+
+No signals fire for purged rows; everything they would have updated was
+taken care of at soft-delete time. `manage.py purge_deleted` drains the
+queue too, e.g. from cron to pick up work interrupted by a restart.
+
+Settings:
+    PURGE_CHUNK_SIZE   rows per DELETE, default 2000
+    PURGE_CHUNK_PAUSE  seconds between chunks, default 0.01 (lets
+                       other writers take the SQLite lock)
+    PURGE_SYNC         purge inline after commit instead of in the
+                       background (tests / management commands)
+"""
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import rollups, search, sharding
+from .models import (
+    ArchivedGoal,
+    ArchivedHabitCompletion,
+    ArchivedTask,
+    Goal,
+    Task,
+    Habit,
+    HabitCompletion,
+    HabitYearBitmap,
+    UserProfile,
+    UserDailyStats,
+    UserWeeklyStats,
+)
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = getattr(settings, "PURGE_CHUNK_SIZE", 2000)
+CHUNK_PAUSE = getattr(settings, "PURGE_CHUNK_PAUSE", 0.01)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="purge")
+
+# (model, lookup from that model to the root's id), children before parents
+GOAL_PLAN = (
+    (HabitCompletion, "habit__goal_id"),
+    (ArchivedHabitCompletion, "habit__goal_id"),
+    (HabitYearBitmap, "habit__goal_id"),
+    (Habit, "goal_id"),
+    (Task, "goal_id"),
+    (Goal, "id"),
+)
+
+USER_PLAN = (
+    (HabitCompletion, "habit__user_id"),
+    (ArchivedHabitCompletion, "habit__user_id"),
+    (HabitYearBitmap, "habit__user_id"),
+    (Habit, "user_id"),
+    (Task, "goal__user_id"),
+    (Goal, "user_id"),
+    (ArchivedTask, "goal__user_id"),
+    (ArchivedGoal, "user_id"),
+    (UserDailyStats, "user_id"),
+    (UserWeeklyStats, "user_id"),
+    (UserProfile, "user_id"),
+)
+
+
+# -----------------------------
+# SOFT DELETE
+# -----------------------------
+def soft_delete_goal(goal):
+    with sharding.atomic():
+        rollups.forget_goal(goal)
+        search.unindex_goal(goal)
+        goal.deleted_at = timezone.now()
+        # update(), not save(): no version bump, and no post_save to put
+        # the goal back into the search index
+        Goal.all_objects.filter(pk=goal.pk).update(deleted_at=goal.deleted_at)
+    schedule_purge()
+
+
+def soft_delete_user(user):
+    """
+    Deactivate the account and free the username at once; the rows go
+    in the background. Tokens stop working because the user is inactive.
+    """
+    with transaction.atomic():
+        user.is_active = False
+        user.username = f"deleted-{user.pk}-{uuid.uuid4().hex[:8]}"
+        user.set_unusable_password()
+        user.save(update_fields=["is_active", "username", "password"])
+    # with DB_SHARDS the profile is in another database than the user
+    with sharding.use_user(user.pk):
+        UserProfile.objects.filter(user=user).update(deleted_at=timezone.now())
+        schedule_purge()
+
+
+# -----------------------------
+# PURGE
+# -----------------------------
+def delete_ids(model, ids, chunk_size=CHUNK_SIZE):
+    """
+    Plain `DELETE FROM <table> WHERE id IN (...)` for the given primary
+    keys, chunk_size per statement, on the current shard. Unlike
+    QuerySet.delete() nothing is collected or cascaded and no signals are
+    sent: the caller keeps bitmaps / rollups / the search index in step.
+    Returns the number of rows deleted.
+    """
+    connection = sharding.connection()
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    ids = list(ids)
+
+    deleted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            cursor.execute(f"DELETE FROM {table} WHERE {pk} IN ({', '.join(['%s'] * len(chunk))})", chunk)
+            deleted += cursor.rowcount
+    return deleted
+
+
+def delete_chunked(model, lookup, root_id, chunk_size=CHUNK_SIZE, pause=CHUNK_PAUSE):
+    """
+    Delete `model` rows where `lookup` == root_id, chunk_size at a time,
+    one short transaction per chunk. Returns the number of rows deleted.
+    """
+    rows = model._base_manager.filter(**{lookup: root_id}).order_by()
+
+    deleted = 0
+    while True:
+        with sharding.atomic():
+            ids = list(rows.values_list("pk", flat=True)[:chunk_size])
+            if not ids:
+                return deleted
+            deleted += delete_ids(model, ids, chunk_size)
+        if len(ids) < chunk_size:
+            return deleted
+        if pause:
+            time.sleep(pause)
+
+
+def purge_goal(goal_id, **options):
+    return sum(delete_chunked(model, lookup, goal_id, **options) for model, lookup in GOAL_PLAN)
+
+
+def purge_user(user_id, **options):
+    # nobody can search as this user any more; drop the index rows in
+    # chunks too (smaller ones: an FTS row costs several table rows to delete)
+    search.unindex_user(user_id, max(1, options.get("chunk_size", CHUNK_SIZE) // 4))
+    deleted = sum(delete_chunked(model, lookup, user_id, **options) for model, lookup in USER_PLAN)
+    # only small auth tables (groups, permissions, admin log) are left,
+    # so the collector has nothing big to load
+    deleted += User.objects.filter(pk=user_id).delete()[0]
+    sharding.forget(user_id)
+    return deleted
+
+
+def purge_pending(**options):
+    """Purge every soft-deleted goal and account. Returns rows deleted."""
+    deleted = 0
+    for _ in sharding.each_shard():
+        for user_id in UserProfile.objects.filter(deleted_at__isnull=False).values_list("user_id", flat=True):
+            deleted += purge_user(user_id, **options)
+        for goal_id in Goal.all_objects.filter(deleted_at__isnull=False).values_list("id", flat=True):
+            deleted += purge_goal(goal_id, **options)
+    return deleted
+
+
+def _run_purge(inline=False):
+    try:
+        purge_pending()
+    except Exception:
+        logger.exception("Purging deleted goals / accounts failed")
+    finally:
+        if not inline:
+            connections.close_all()
+
+
+def schedule_purge():
+    """Run purge_pending() once the current transaction commits."""
+    # read per call so tests / benchmarks can override_settings() it
+    if getattr(settings, "PURGE_SYNC", False):
+        sharding.on_commit(lambda: _run_purge(inline=True))
+    else:
+        sharding.on_commit(lambda: _executor.submit(_run_purge))
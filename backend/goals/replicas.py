@@ -0,0 +1,163 @@
+"""
+Read replicas with read-your-writes.
+
+With DB_REPLICAS=N (backend/settings.py) every primary database
+(`default` and each shard) gets N read-only copies, <alias>_replica_<i>.
+Reads of safe-method requests (GET / HEAD / OPTIONS) by an authenticated
+user go to one replica of the database the router picked, the same one
+for the whole request. Everything else stays on the primary:
+
+- writes, and reads inside a transaction (they must see its rows)
+- the rest of a request once it has written anything
+- every request of a user for READ_REPLICA_PIN_SECONDS after one of
+  their writes (any non-safe request, or signup), so nobody reads a
+  replica that hasn't caught up with their own change yet. The pin is a
+  cache entry: with several processes the cache has to be shared
+  (REDIS_URL).
+- authentication itself, management commands and background jobs
+
+Locally the replicas are SQLite file copies that `manage.py sync_replicas
+--every 2` refreshes. READ_REPLICA_PIN_SECONDS must be longer than that
+interval plus the copy time: it is the replication lag. In tests the
+replicas mirror their primary.
+
+Settings:
+    DATABASE_REPLICAS         {primary alias: [replica aliases]}
+    READ_REPLICA_PIN_SECONDS  default 10
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+DEFAULT = "default"
+REPLICAS = {alias: tuple(aliases) for alias, aliases in getattr(settings, "DATABASE_REPLICAS", {}).items()}
+PRIMARY = {replica: alias for alias, aliases in REPLICAS.items() for replica in aliases}
+PIN_SECONDS = getattr(settings, "READ_REPLICA_PIN_SECONDS", 10)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# per request: {"safe", "user", "replica", "wrote"}; a dict so that what
+# the view's thread records is seen by the middleware
+_request = ContextVar("replica_request", default=None)
+
+
+def enabled():
+    return bool(PRIMARY)
+
+
+def primary_of(alias):
+    return PRIMARY.get(alias, alias)
+
+
+# -----------------------------
+# PINNING
+# -----------------------------
+def _pin_key(user_id):
+    return f"replica-pin:{user_id}"
+
+
+def pin(user_id):
+    """Send the user's reads to the primary for the next PIN_SECONDS."""
+    if PRIMARY:
+        cache.set(_pin_key(user_id), 1, PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(_pin_key(user_id)) is not None
+
+
+def select_user(user_id):
+    """The request's user is known: let its reads use a replica if allowed."""
+    state = _request.get()
+    if state is None or not PRIMARY:
+        return
+    state["user"] = user_id
+    if state["safe"] and not state["wrote"] and not is_pinned(user_id):
+        state["replica"] = random.randrange(1 << 16)
+
+
+# -----------------------------
+# ROUTING
+# -----------------------------
+def for_read(alias):
+    """Where a read of `alias` goes: the request's replica, or `alias`."""
+    state = _request.get()
+    if state is None or state["replica"] is None:
+        return alias
+    replicas = REPLICAS.get(alias)
+    if not replicas or connections[alias].in_atomic_block:
+        return alias
+    return replicas[state["replica"] % len(replicas)]
+
+
+def for_write(alias):
+    """A write to `alias`; the rest of the request reads the primary."""
+    state = _request.get()
+    if state is not None:
+        state["replica"] = None
+        state["wrote"] = True
+    return primary_of(alias)
+
+
+class ReplicaRouter:
+    """For an unsharded setup; UserShardRouter does the same per shard."""
+
+    def db_for_read(self, model, **hints):
+        return for_read(DEFAULT)
+
+    def db_for_write(self, model, **hints):
+        return for_write(DEFAULT)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return primary_of(obj1._state.db) == primary_of(obj2._state.db)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # copies of their primary, never migrated themselves
+        return db not in PRIMARY
+
+
+# -----------------------------
+# MIDDLEWARE
+# -----------------------------
+class ReplicaMiddleware:
+    """
+    Opens the per-request routing state and pins the user to the primary
+    after a request that wrote.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _start(self, request):
+        state = {"safe": request.method in SAFE_METHODS, "user": None, "replica": None, "wrote": False}
+        return state, _request.set(state)
+
+    def _finish(self, state, token):
+        _request.reset(token)
+        if state["user"] is not None and (state["wrote"] or not state["safe"]):
+            pin(state["user"])
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state, token = self._start(request)
+        try:
+            return self.get_response(request)
+        finally:
+            self._finish(state, token)
+
+    async def __acall__(self, request):
+        state, token = self._start(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            self._finish(state, token)
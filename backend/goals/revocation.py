@@ -0,0 +1,195 @@
+"""
+Revoked refresh tokens.
+
+SIMPLE_JWT rotates refresh tokens and asks for the old one to be
+blacklisted, but simplejwt's token_blacklist app isn't installed (and
+would keep every token ever issued). Here only revoked tokens are stored,
+as (jti, expires_at) rows in RevokedToken, and only until they expire.
+
+Each process keeps a Bloom filter of the revoked jtis:
+
+- a token whose jti is not in the filter is not revoked: no DB lookup
+- a hit is confirmed with one indexed query (false positives ~0.1%)
+- the filter picks up other processes' revocations by reading rows with
+  a higher id every REVOCATION_SYNC_INTERVAL seconds, and is rebuilt from
+  the live rows every REVOCATION_REBUILD_INTERVAL or when it fills up
+
+The filter is only a shortcut for rejecting replays. The unique jti
+column is what makes rotation safe: revoke() is an INSERT, so of two
+concurrent refreshes with the same token exactly one wins.
+
+Expired rows are deleted in batches by `manage.py purge_revoked_tokens`,
+and a batch at a time every REVOCATION_PRUNE_EVERY revocations.
+
+Settings:
+    REVOCATION_SYNC_INTERVAL     seconds, default 5
+    REVOCATION_REBUILD_INTERVAL  seconds, default 3600
+    REVOCATION_ERROR_RATE        Bloom filter false-positive rate, default 0.001
+    REVOCATION_PRUNE_EVERY       revocations between inline prunes, default 1000
+    REVOCATION_PURGE_BATCH       rows per delete, default 5000
+"""
+import math
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import RevokedToken
+
+SYNC_INTERVAL = getattr(settings, "REVOCATION_SYNC_INTERVAL", 5)
+REBUILD_INTERVAL = getattr(settings, "REVOCATION_REBUILD_INTERVAL", 3600)
+ERROR_RATE = getattr(settings, "REVOCATION_ERROR_RATE", 0.001)
+PRUNE_EVERY = getattr(settings, "REVOCATION_PRUNE_EVERY", 1000)
+PURGE_BATCH = getattr(settings, "REVOCATION_PURGE_BATCH", 5000)
+
+MIN_CAPACITY = 1024
+
+
+def _key(jti):
+    return uuid.UUID(str(jti))
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over UUIDs. jtis are random, so the two
+    halves of the UUID serve directly as the hash pair (double hashing).
+    """
+
+    def __init__(self, capacity, error_rate=ERROR_RATE):
+        self.capacity = max(capacity, MIN_CAPACITY)
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        h1 = key.int >> 64
+        h2 = (key.int & 0xFFFFFFFFFFFFFFFF) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def full(self):
+        return self.count > self.capacity
+
+
+class RevocationStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._last_id = 0
+        self._built_at = 0.0
+        self._synced_at = 0.0
+        self._revoked_since_prune = 0
+
+    # -- filter maintenance --
+    def _rebuild(self):
+        live = RevokedToken.objects.filter(expires_at__gte=timezone.now())
+        bloom = BloomFilter(live.count() * 2)
+        last_id = 0
+        for pk, jti in live.order_by("id").values_list("id", "jti").iterator(chunk_size=5000):
+            bloom.add(jti)
+            last_id = pk
+        # rows written while we were reading are picked up by the next sync
+        self._filter, self._last_id = bloom, last_id
+        self._built_at = self._synced_at = time.monotonic()
+
+    def _sync(self):
+        now = time.monotonic()
+        if (
+            self._filter is None
+            or self._filter.full
+            or now - self._built_at >= REBUILD_INTERVAL
+        ):
+            self._rebuild()
+            return
+        if now - self._synced_at < SYNC_INTERVAL:
+            return
+
+        rows = RevokedToken.objects.filter(id__gt=self._last_id).order_by("id")
+        for pk, jti in rows.values_list("id", "jti"):
+            self._filter.add(jti)
+            self._last_id = pk
+        self._synced_at = now
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+
+    # -- public API --
+    def is_revoked(self, jti):
+        key = _key(jti)
+        with self._lock:
+            self._sync()
+            maybe = key in self._filter
+        return maybe and RevokedToken.objects.filter(jti=key).exists()
+
+    def revoke(self, jti, expires_at):
+        """
+        Revoke a token. False if it was already revoked (by this or a
+        concurrent request), which a refresh must treat as a replay.
+        """
+        key = _key(jti)
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(jti=key, expires_at=expires_at)
+        except IntegrityError:
+            revoked = False
+        else:
+            revoked = True
+
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(key)
+            self._revoked_since_prune += 1
+            prune = PRUNE_EVERY and self._revoked_since_prune >= PRUNE_EVERY
+            if prune:
+                self._revoked_since_prune = 0
+        if prune:
+            purge_expired(max_batches=1)
+        return revoked
+
+
+store = RevocationStore()
+
+
+def expiry_of(token):
+    """The token's exp claim as an aware datetime."""
+    return datetime.fromtimestamp(token["exp"], tz=dt_timezone.utc)
+
+
+def purge_expired(batch_size=PURGE_BATCH, max_batches=None, pause=0.0):
+    """
+    Delete rows for tokens that have expired (plus LEEWAY) in batches of
+    `batch_size`, so no single DELETE holds the table for long. Returns
+    the number of rows deleted.
+    """
+    leeway = jwt_settings.LEEWAY
+    if not isinstance(leeway, timedelta):
+        leeway = timedelta(seconds=leeway)
+    expired = RevokedToken.objects.filter(expires_at__lt=timezone.now() - leeway)
+
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(expired.order_by("expires_at").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted += RevokedToken.objects.filter(id__in=ids).delete()[0]
+        batches += 1
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return deleted
@@ -0,0 +1,303 @@
+"""
+Per-user daily / weekly analytics rollups.
+
+UserDailyStats and UserWeeklyStats hold, per user and period:
+tasks created, tasks completed, goals completed and habit check-ins.
+They are derived data: every count equals what an aggregate over the
+current Task / Goal / HabitCompletion rows (hot and archived, see
+goals/archive.py) would return, so they can be rebuilt from scratch at
+any time (`manage.py rebuild_rollups`).
+
+Single-row changes arrive through model signals (goals/signals.py) and
+Goal.recalculate_progress*; bulk writers call bump_many() / rebuild()
+themselves. Timestamps are bucketed by the owner's local date (profile
+timezone, goals/localtime.py), the same day request_today() gives the
+stats range, so counts near midnight land on the user's day.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import localtime, sharding
+from .models import (
+    ArchivedGoal,
+    ArchivedHabitCompletion,
+    ArchivedTask,
+    Goal,
+    Task,
+    HabitCompletion,
+    UserDailyStats,
+    UserProfile,
+    UserWeeklyStats,
+)
+
+FIELDS = ("tasks_created", "tasks_completed", "goals_completed", "habit_checkins")
+
+PERIODS = {
+    # period: (default window, max window) in days
+    "day": (30, 366),
+    "week": (12 * 7, 5 * 366),
+}
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def _day(value, tz):
+    if value is None:
+        return None
+    if hasattr(value, "hour"):
+        return timezone.localdate(value, tz)
+    return value
+
+
+# -----------------------------
+# INCREMENTAL UPDATES
+# -----------------------------
+def bump_many(user_id, field, deltas, tz=None):
+    """
+    Add {day: delta} to `field` in both the daily and weekly rollups.
+    Keys are dates or datetimes; datetimes are taken in `tz`, by default
+    the user's timezone.
+    """
+    if user_id is None:
+        # the goal / habit is soft-deleted and forget_goal() already took
+        # it out of the rollups
+        return
+
+    daily = Counter()
+    weekly = Counter()
+    for day, delta in deltas.items():
+        if hasattr(day, "hour") and tz is None:
+            tz = localtime.user_id_timezone(user_id)
+        day = _day(day, tz)
+        if day is None or not delta:
+            continue
+        daily[day] += delta
+        weekly[week_start(day)] += delta
+
+    # no savepoint: single toggles bump from inside their own transaction
+    with sharding.atomic(savepoint=False):
+        for model, counts in ((UserDailyStats, daily), (UserWeeklyStats, weekly)):
+            counts = {k: v for k, v in counts.items() if v}
+            if not counts:
+                continue
+            model.objects.bulk_create(
+                [model(user_id=user_id, period_start=p) for p in counts],
+                ignore_conflicts=True,
+            )
+            for period, delta in counts.items():
+                model.objects.filter(user_id=user_id, period_start=period).update(
+                    **{field: F(field) + delta}
+                )
+
+
+def bump(user_id, day, field, delta=1, tz=None):
+    bump_many(user_id, field, {day: delta}, tz)
+
+
+def task_saved(task, created, user_id):
+    if user_id is None:
+        return
+    if created:
+        tz = localtime.user_id_timezone(user_id)
+        bump(user_id, task.created_at, "tasks_created", tz=tz)
+        if task.completed_at:
+            bump(user_id, task.completed_at, "tasks_completed", tz=tz)
+        return
+
+    old = getattr(task, "_old_completed_at", None)
+    if old != task.completed_at:
+        # a re-completion on the same day nets out in bump_many()
+        deltas = Counter()
+        if old:
+            deltas[old] -= 1
+        if task.completed_at:
+            deltas[task.completed_at] += 1
+        bump_many(user_id, "tasks_completed", deltas)
+
+
+def task_deleted(task, user_id):
+    if user_id is None:
+        return
+    tz = localtime.user_id_timezone(user_id)
+    bump(user_id, task.created_at, "tasks_created", -1, tz=tz)
+    if task.completed_at:
+        bump(user_id, task.completed_at, "tasks_completed", -1, tz=tz)
+
+
+def goals_completed_changed(changes):
+    """changes: (goal, old_completed_at, new_completed_at) tuples."""
+    per_user = defaultdict(Counter)
+    for goal, old, new in changes:
+        if old:
+            per_user[goal.user_id][old] -= 1
+        if new:
+            per_user[goal.user_id][new] += 1
+    for user_id, deltas in per_user.items():
+        bump_many(user_id, "goals_completed", deltas)
+
+
+def forget_goal(goal):
+    """
+    Take a goal that is being deleted out of the rollups: its completion,
+    its tasks and its habits' check-ins. One grouped query per field, so
+    the cost follows the number of distinct days, not of rows.
+    """
+    sources = (
+        ("tasks_created", Task.objects.filter(goal=goal), "created_at"),
+        (
+            "tasks_completed",
+            Task.objects.filter(goal=goal, completed_at__isnull=False), "completed_at",
+        ),
+        ("habit_checkins", HabitCompletion.objects.filter(habit__goal=goal), None),
+        ("habit_checkins", ArchivedHabitCompletion.objects.filter(habit__goal=goal), None),
+    )
+    tz = localtime.user_id_timezone(goal.user_id)
+    for field, qs, ts_field in sources:
+        day = TruncDate(ts_field, tzinfo=tz) if ts_field else F("date")
+        rows = qs.annotate(day=day).values("day").annotate(n=Count("id")).order_by()
+        bump_many(goal.user_id, field, {row["day"]: -row["n"] for row in rows}, tz)
+
+    if goal.completed_at:
+        goals_completed_changed([(goal, goal.completed_at, None)])
+
+
+# -----------------------------
+# FULL REBUILD
+# -----------------------------
+def _daily_counts(user_ids=None):
+    def scoped(qs, user_path):
+        if user_ids is not None:
+            qs = qs.filter(**{f"{user_path}__in": user_ids})
+        return qs
+
+    # (field, rows, path to the user id, timestamp field or None for `date`)
+    sources = []
+    # Task's default manager keeps soft-deleted goals' rows; archived goals
+    # are never soft-deleted
+    live_tasks = Task.objects.filter(goal__deleted_at__isnull=True)
+    for tasks, goal_model in ((live_tasks, Goal), (ArchivedTask.objects.all(), ArchivedGoal)):
+        sources += [
+            ("tasks_created", scoped(tasks, "goal__user_id"), "goal__user_id", "created_at"),
+            (
+                "tasks_completed",
+                scoped(tasks.filter(completed_at__isnull=False), "goal__user_id"),
+                "goal__user_id", "completed_at",
+            ),
+            (
+                "goals_completed",
+                scoped(goal_model.objects.filter(completed_at__isnull=False), "user_id"),
+                "user_id", "completed_at",
+            ),
+        ]
+    for completion_model in (HabitCompletion, ArchivedHabitCompletion):
+        sources.append((
+            "habit_checkins",
+            # completions have no manager of their own that hides deleted goals
+            scoped(completion_model.objects.filter(habit__goal__deleted_at__isnull=True), "habit__user_id"),
+            "habit__user_id", None,
+        ))
+
+    # timestamps are grouped per owner timezone: one query per source and
+    # timezone in use; users without a (known) profile timezone are on UTC
+    names = {
+        name
+        for name in scoped(UserProfile.objects.all(), "user_id").values_list("timezone", flat=True).distinct()
+        if localtime.zone(name).key != localtime.DEFAULT_TIMEZONE
+    }
+
+    def owners(names):
+        return UserProfile.objects.filter(timezone__in=names).values("user_id")
+
+    counts = defaultdict(Counter)  # (user_id, day) -> {field: n}
+    for field, qs, user_path, ts_field in sources:
+        if ts_field:
+            groups = [
+                qs.exclude(**{f"{user_path}__in": owners(names)})
+                .annotate(day=TruncDate(ts_field, tzinfo=localtime.zone(None))),
+                *(
+                    qs.filter(**{f"{user_path}__in": owners([name])})
+                    .annotate(day=TruncDate(ts_field, tzinfo=localtime.zone(name)))
+                    for name in sorted(names)
+                ),
+            ]
+        else:
+            groups = [qs.annotate(day=F("date"))]
+        for group in groups:
+            rows = group.values(user_path, "day").annotate(n=Count("id")).order_by()
+            for row in rows.iterator():
+                counts[(row[user_path], row["day"])][field] += row["n"]
+    return counts
+
+
+def rebuild(user_ids=None):
+    """Recompute both rollup tables (for `user_ids`, or everyone)."""
+    daily = _daily_counts(user_ids)
+
+    weekly = defaultdict(Counter)
+    for (user_id, day), fields in daily.items():
+        weekly[(user_id, week_start(day))].update(fields)
+
+    with sharding.atomic():
+        for model, data in ((UserDailyStats, daily), (UserWeeklyStats, weekly)):
+            qs = model.objects.all()
+            if user_ids is not None:
+                qs = qs.filter(user_id__in=user_ids)
+            qs.delete()
+            model.objects.bulk_create(
+                [
+                    model(user_id=user_id, period_start=period, **fields)
+                    for (user_id, period), fields in data.items()
+                ],
+                batch_size=2000,
+            )
+    return len(daily), len(weekly)
+
+
+# -----------------------------
+# READS
+# -----------------------------
+def _param_date(params, key):
+    value = params.get(key)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError(f"{key} must be YYYY-MM-DD")
+    return parsed
+
+
+def parse_range(period, params, today):
+    """(since, until) from ?since= / ?until=; ValueError on bad input."""
+    default_days, max_days = PERIODS[period]
+    until = _param_date(params, "until") or today
+    since = _param_date(params, "since") or until - timedelta(days=default_days - 1)
+    if period == "week":
+        since = week_start(since)
+    if since > until:
+        raise ValueError("since must be on or before until")
+    if (until - since).days >= max_days:
+        raise ValueError(f"{period} stats are limited to {max_days} days per request")
+    return since, until
+
+
+def series(user, period, since, until):
+    """Rollup rows in [since, until]; periods without activity are omitted."""
+    model = UserWeeklyStats if period == "week" else UserDailyStats
+    rows = (
+        model.objects.filter(user=user, period_start__gte=since, period_start__lte=until)
+        .order_by("period_start")
+        .values("period_start", *FIELDS)
+    )
+    return [
+        dict(row, period_start=row["period_start"].isoformat()) for row in rows
+    ]
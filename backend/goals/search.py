@@ -0,0 +1,278 @@
+"""
+Full-text search over goals, tasks and habits.
+
+On SQLite everything searchable lives in one FTS5 table, `goals_search`
+(created by migration 0012), so a single ranked query covers all three
+kinds:
+
+    rowid     object_id * 4 + kind code (lets a row be replaced / deleted
+              without a lookup)
+    kind, object_id, goal_id   UNINDEXED payload
+    owner     "u<user id>"; matched together with the terms, so only the
+              user's own rows are ever scored
+    title     goal / task / habit title (weighted 10x in bm25)
+    body      goal description
+
+Signals (goals/signals.py) keep it in step with single-row saves and
+deletes; bulk writers call rebuild() for the users they touched, and
+`manage.py rebuild_search_index` backfills everything.
+
+Other databases fall back to case-insensitive LIKE matching.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+from . import sharding
+from .models import Goal, Task, Habit
+
+TABLE = "goals_search"
+KINDS = {"goal": 0, "task": 1, "habit": 2}
+KIND_NAMES = {code: name for name, code in KINDS.items()}
+
+MAX_QUERY_LENGTH = 200
+MAX_TERMS = 8
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+CREATE_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(
+    kind UNINDEXED,
+    object_id UNINDEXED,
+    goal_id UNINDEXED,
+    owner,
+    title,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+
+def enabled():
+    # shards use the same backend as default
+    return connections[sharding.DEFAULT].vendor == "sqlite"
+
+
+def _rowid(kind, object_id):
+    return object_id * 4 + KINDS[kind]
+
+
+def _owner(user_id):
+    return f"u{user_id}"
+
+
+# -----------------------------
+# WRITES
+# -----------------------------
+def _rows_for_goals(goals):
+    for g in goals:
+        yield ("goal", g["id"], g["id"], g["user_id"], g["title"], g["description"])
+
+
+def _rows_for_tasks(tasks):
+    for t in tasks:
+        yield ("task", t["id"], t["goal_id"], t["goal__user_id"], t["title"], "")
+
+
+def _rows_for_habits(habits):
+    for h in habits:
+        yield ("habit", h["id"], h["goal_id"], h["user_id"], h["title"], "")
+
+
+def _write(rows):
+    rows = [
+        (_rowid(kind, pk), KINDS[kind], pk, goal_id, _owner(user_id), title, body or "")
+        for kind, pk, goal_id, user_id, title, body in rows
+    ]
+    if not rows:
+        return 0
+    with sharding.connection().cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [(r[0],) for r in rows])
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (rowid, kind, object_id, goal_id, owner, title, body) "
+            f"VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+    return len(rows)
+
+
+def index_goal(goal):
+    if enabled():
+        _write([("goal", goal.pk, goal.pk, goal.user_id, goal.title, goal.description)])
+
+
+def index_task(task, user_id):
+    if enabled():
+        _write([("task", task.pk, task.goal_id, user_id, task.title, "")])
+
+
+def index_habit(habit):
+    if enabled():
+        _write([("habit", habit.pk, habit.goal_id, habit.user_id, habit.title, "")])
+
+
+def unindex(kind, object_id):
+    if enabled():
+        with sharding.connection().cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [_rowid(kind, object_id)])
+
+
+def unindex_many(kind, object_ids):
+    if enabled() and object_ids:
+        with sharding.connection().cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {TABLE} WHERE rowid = %s",
+                [(_rowid(kind, object_id),) for object_id in object_ids],
+            )
+
+
+def _delete_owner_rows(cursor, user_id, goal_id=None):
+    # the owner MATCH narrows to the user's rows through the index first
+    sql = f"DELETE FROM {TABLE} WHERE rowid IN (SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s"
+    params = [f'owner:"{_owner(user_id)}"']
+    if goal_id is not None:
+        sql += " AND goal_id = %s"
+        params.append(goal_id)
+    cursor.execute(sql + ")", params)
+
+
+def unindex_goal(goal):
+    """Drop a goal and its tasks / habits from the index."""
+    if enabled():
+        with sharding.connection().cursor() as cursor:
+            _delete_owner_rows(cursor, goal.user_id, goal.pk)
+
+
+def unindex_user(user_id, chunk_size=2000):
+    """Drop all of a user's rows, chunk_size per statement / transaction."""
+    if not enabled():
+        return 0
+    deleted = 0
+    while True:
+        with sharding.atomic(), sharding.connection().cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {TABLE} WHERE rowid IN "
+                f"(SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s LIMIT %s)",
+                [f'owner:"{_owner(user_id)}"', chunk_size],
+            )
+            count = cursor.rowcount
+        deleted += count
+        if count < chunk_size:
+            return deleted
+
+
+def rebuild(user_ids=None):
+    """Re-index everything (or only `user_ids`). Returns rows written."""
+    if not enabled():
+        return 0
+
+    goals = Goal.objects.all()
+    tasks = Task.objects.filter(goal__deleted_at__isnull=True)
+    habits = Habit.objects.filter(goal__deleted_at__isnull=True)
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        goals = goals.filter(user_id__in=user_ids)
+        tasks = tasks.filter(goal__user_id__in=user_ids)
+        habits = habits.filter(user_id__in=user_ids)
+
+    with sharding.atomic(), sharding.connection().cursor() as cursor:
+        if user_ids is None:
+            cursor.execute(f"DELETE FROM {TABLE}")
+        else:
+            for user_id in user_ids:
+                _delete_owner_rows(cursor, user_id)
+
+        written = _write(_rows_for_goals(goals.values("id", "user_id", "title", "description")))
+        written += _write(_rows_for_tasks(tasks.values("id", "goal_id", "goal__user_id", "title")))
+        written += _write(_rows_for_habits(habits.values("id", "goal_id", "user_id", "title")))
+    return written
+
+
+# -----------------------------
+# QUERIES
+# -----------------------------
+def terms(q):
+    return TOKEN_RE.findall((q or "")[:MAX_QUERY_LENGTH].lower())[:MAX_TERMS]
+
+
+def match_expression(user_id, words):
+    """
+    FTS5 MATCH string: the owner token AND every word in title/body; the
+    last word is a prefix so results show up while the user is typing.
+    Words are quoted, so FTS5 operators in user input are just text.
+    """
+    parts = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"*']
+    return f'owner:"{_owner(user_id)}" AND {{title body}}: ({" AND ".join(parts)})'
+
+
+def search(user, q, kind=None, limit=20, offset=0):
+    """
+    Returns (results, has_more). Results are ranked best first:
+    {"type", "id", "goal", "title", "snippet"}, where snippet is the
+    matching part of a goal description ("" for tasks and habits).
+    """
+    words = terms(q)
+    if not words:
+        return [], False
+    if not enabled():
+        return _search_like(user, words, kind, limit, offset)
+
+    sql = (
+        f"SELECT kind, object_id, goal_id, title, "
+        f"snippet({TABLE}, 5, '', '', '…', 12) "
+        f"FROM {TABLE} WHERE {TABLE} MATCH %s"
+    )
+    params = [match_expression(user.id, words)]
+    if kind:
+        sql += " AND kind = %s"
+        params.append(KINDS[kind])
+    sql += f" ORDER BY bm25({TABLE}, 0, 0, 0, 0, 10.0, 1.0) LIMIT %s OFFSET %s"
+    params += [limit + 1, offset]
+
+    with sharding.read_connection().cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    results = [
+        {
+            "type": KIND_NAMES[kind_code],
+            "id": object_id,
+            "goal": goal_id,
+            "title": title,
+            "snippet": snippet,
+        }
+        for kind_code, object_id, goal_id, title, snippet in rows[:limit]
+    ]
+    return results, len(rows) > limit
+
+
+def _search_like(user, words, kind, limit, offset):
+    """Fallback without FTS: every word must appear; title matches first."""
+    sources = {
+        "goal": (Goal.objects.filter(user=user), ("title", "description")),
+        "task": (Task.objects.filter(goal__user=user, goal__deleted_at__isnull=True), ("title",)),
+        "habit": (Habit.objects.filter(user=user, goal__deleted_at__isnull=True), ("title",)),
+    }
+
+    matches = []
+    for name, (qs, fields) in sources.items():
+        if kind and kind != name:
+            continue
+        for word in words:
+            cond = Q()
+            for f in fields:
+                cond |= Q(**{f"{f}__icontains": word})
+            qs = qs.filter(cond)
+        for obj in qs[: offset + limit + 1]:
+            title = obj.title.lower()
+            goal_id = obj.pk if name == "goal" else obj.goal_id
+            matches.append((
+                -sum(w in title for w in words),
+                {"type": name, "id": obj.pk, "goal": goal_id, "title": obj.title, "snippet": ""},
+            ))
+
+    matches.sort(key=lambda m: m[0])
+    page = [m[1] for m in matches[offset: offset + limit + 1]]
+    return page[:limit], len(page) > limit
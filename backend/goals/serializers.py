@@ -1,5 +1,17 @@
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
-from datetime import timedelta
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from backend.metrics import TimedSerializerMixin
+
+from . import revocation
+
+from .bitmaps import HabitCalendar
+from .completions import HistoryWindow, streak_from_dates
+from .localtime import is_valid_timezone
 
 from .models import (
     Goal,
@@ -7,27 +19,31 @@ from .models import (
     UserProfile,
     Habit,
     HabitCompletion,
+    ArchivedGoal,
+    ArchivedTask,
 )
 
 
 # -----------------------------
 # TASK + GOAL + PROFILE
 # -----------------------------
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = "__all__"
         # completed_at is handled in model.save, frontend just reads it
-        read_only_fields = ("created_at", "completed_at")
+        read_only_fields = ("created_at", "completed_at", "version")
 
 
-class GoalSerializer(serializers.ModelSerializer):
+class GoalSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     tasks = TaskSerializer(many=True, read_only=True)
 
     class Meta:
         model = Goal
-        fields = "__all__"
-        read_only_fields = ("user", "progress", "is_completed", "order")
+        exclude = ("deleted_at",)
+        read_only_fields = (
+            "user", "progress", "is_completed", "completed_at", "order", "version",
+        )
 
     def create(self, validated_data):
         request = self.context.get("request")
@@ -35,21 +51,73 @@ class GoalSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+# -----------------------------
+# ARCHIVE (read-only, goals/archive.py)
+# -----------------------------
+class ArchivedTaskSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    archived_at = serializers.DateTimeField(source="goal.archived_at", read_only=True)
+
+    class Meta:
+        model = ArchivedTask
+        fields = (
+            "id", "version", "title", "completed", "created_at", "completed_at", "goal",
+            "archived_at",
+        )
+        read_only_fields = fields
+
+
+class ArchivedGoalSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    tasks = ArchivedTaskSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ArchivedGoal
+        fields = "__all__"
+        read_only_fields = [f.name for f in ArchivedGoal._meta.fields]
+
+
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     username = serializers.CharField(source="user.username", read_only=True)
+    avatar_thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = UserProfile
         # include id so frontend can PATCH /profile/<id>/
-        fields = ["id", "username", "bio", "avatar", "theme"]
+        fields = [
+            "id", "username", "bio", "avatar", "avatar_thumbnails", "theme", "timezone",
+        ]
+
+    def validate_timezone(self, value):
+        if not is_valid_timezone(value):
+            raise serializers.ValidationError("Unknown timezone")
+        return value
+
+    def get_avatar_thumbnails(self, obj):
+        """
+        {"32": url, "64": url, "256": url} once thumbnails for the current
+        avatar exist, {} while they are still being generated.
+        """
+        thumbs = obj.avatar_thumbnails or {}
+        if not obj.avatar or thumbs.get("source") != obj.avatar.name:
+            return {}
+
+        request = self.context.get("request")
+        storage = obj.avatar.storage
+        urls = {}
+        for size, name in thumbs.items():
+            if size == "source":
+                continue
+            url = storage.url(name)
+            urls[size] = request.build_absolute_uri(url) if request else url
+        return urls
 
 
 # -----------------------------
 # HABITS
 # -----------------------------
-class HabitSerializer(serializers.ModelSerializer):
+class HabitSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     goal_title = serializers.SerializerMethodField()
     completed_dates = serializers.SerializerMethodField()
+    history = serializers.SerializerMethodField()
     streak = serializers.SerializerMethodField()
 
     class Meta:
@@ -61,33 +129,88 @@ class HabitSerializer(serializers.ModelSerializer):
             "goal_title",
             "created_at",
             "completed_dates",
+            "history",
             "streak",
         ]
 
     def get_goal_title(self, obj):
         return obj.goal.title
 
+    def _calendar(self, obj):
+        # bitmap read path (HABIT_BITMAP_READS), built once per habit
+        if not getattr(settings, "HABIT_BITMAP_READS", False):
+            return None
+        if not hasattr(obj, "_calendar"):
+            obj._calendar = HabitCalendar.from_rows(obj.year_bitmaps.all())
+        return obj._calendar
+
+    def _window(self):
+        # set by HabitViewSet from ?since= / ?until= / ?encoding=
+        return self.context.get("history_window") or HistoryWindow()
+
+    def _hot_dates(self, obj, window):
+        calendar = self._calendar(obj)
+        if calendar is not None:
+            return list(calendar.dates(window.since, window.until))
+
+        dates = obj.completions.all()
+        if window.since is not None:
+            dates = dates.filter(date__gte=window.since)
+        if window.until is not None:
+            dates = dates.filter(date__lte=window.until)
+        return list(dates.values_list("date", flat=True))
+
     def get_completed_dates(self, obj):
-        # return list of "YYYY-MM-DD" strings
-        dates = obj.completions.values_list("date", flat=True)
-        return [d.isoformat() for d in dates]
+        # "YYYY-MM-DD" strings (or offsets / bitstring) inside the window
+        window = self._window()
+        # ?include_archived= on HabitViewSet: None, "with" or "only"
+        archived = self.context.get("include_archived")
+
+        dates = [] if archived == "only" else self._hot_dates(obj, window)
+        if archived:
+            # prefetched by HabitViewSet, already limited to the window
+            dates += [row.date for row in obj.archived_completions.all()]
+        return window.encode(dates)
+
+    def get_history(self, obj):
+        return self._window().as_dict()
 
     def get_streak(self, obj):
         """
         Calculates current streak: consecutive days ending at last completed day
         """
-        qs = obj.completions.order_by("-date").values_list("date", flat=True)
-        dates = list(qs)
-        if not dates:
-            return 0
-
-        streak = 1
-        current = dates[0]
-
-        for d in dates[1:]:
-            if (current - d) == timedelta(days=1):
-                streak += 1
-                current = d
-            else:
-                break
-        return streak
+        # user's local today, resolved once per request by HabitViewSet
+        today = self.context.get("today")
+
+        calendar = self._calendar(obj)
+        if calendar is not None:
+            return calendar.streak(today)
+
+        dates = obj.completions.order_by("-date").values_list("date", flat=True)
+        return streak_from_dates(list(dates), today)
+
+
+# -----------------------------
+# TOKEN REFRESH
+# -----------------------------
+class RevokingTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    simplejwt's refresh, plus the revocation store (goals/revocation.py):
+    revoked refresh tokens are rejected, and with BLACKLIST_AFTER_ROTATION
+    the token just used is revoked. Losing that race means the same token
+    was used twice, so the request fails like any revoked token.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        # read before super() rotates the claims in place
+        jti, expires_at = refresh[jwt_settings.JTI_CLAIM], revocation.expiry_of(refresh)
+        if revocation.store.is_revoked(jti):
+            raise TokenError(_("Token is blacklisted"))
+
+        data = super().validate(attrs)
+
+        if jwt_settings.ROTATE_REFRESH_TOKENS and jwt_settings.BLACKLIST_AFTER_ROTATION:
+            if not revocation.store.revoke(jti, expires_at):
+                raise TokenError(_("Token is blacklisted"))
+        return data
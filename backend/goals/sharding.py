@@ -0,0 +1,262 @@
+"""
+User-sharded databases.
+
+SQLite has one write lock per database file, so with every user in
+db.sqlite3 all writes queue behind each other however many cores there
+are. With DB_SHARDS=N (backend/settings.py) the per-user data is spread
+over N more files, shard_0 .. shard_N-1:
+
+    default   auth_user & co, sessions, admin log, RevokedToken, UserShard
+    shard_*   UserProfile, Goal, Task, Habit, HabitCompletion, bitmaps,
+              rollups, archive tables and the search index
+
+Every user lives on one shard, recorded in UserShard (in `default`) when
+the user is created: shard_<user id % N>. The mapping is cached per
+process. UserShardRouter picks the database for a query from
+
+- the instance it comes from (goal.tasks, user.profile, task.save())
+- otherwise the current shard: CachedJWTAuthentication selects the
+  request user's shard, ShardMiddleware clears it after the response,
+  and background jobs use use_user() / each_shard().
+
+Per-user data queried with no shard selected raises ShardNotSelected
+rather than silently reading `default`. Code that opens transactions or
+cursors itself uses atomic() / on_commit() / connection() from here,
+which follow the current shard.
+
+The goal tables also exist, empty, in `default`: Django deletes related
+rows on the deleted object's own database, so a cascade from auth_user
+must find (empty) tables there. Foreign keys to auth_user have no DB
+constraint, since auth_user isn't in the shard files.
+
+`manage.py migrate_shards` migrates every database; `manage.py
+rebalance_shards` moves users between shards (with the app stopped: the
+mapping cache isn't shared between processes).
+
+With DB_SHARDS unset there is only `default`, no router is installed and
+the helpers here all resolve to `default`. Read replicas (DB_REPLICAS)
+work per shard; the router asks goals/replicas.py where reads go.
+"""
+import contextvars
+import threading
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections, transaction
+
+from . import replicas
+
+DEFAULT = "default"
+SHARDS = tuple(getattr(settings, "DATABASE_SHARDS", ()))
+
+SHARDED_APPS = {"goals"}
+# goals models that stay in `default` with auth_user
+GLOBAL_MODELS = {"goals.revokedtoken", "goals.usershard"}
+
+_current = contextvars.ContextVar("db_shard", default=None)
+
+_directory = {}
+_directory_lock = threading.Lock()
+
+
+class ShardNotSelected(Exception):
+    """Per-user data was queried without a user / shard to route it to."""
+
+
+def enabled():
+    return bool(SHARDS)
+
+
+def is_sharded(model):
+    meta = model._meta
+    return meta.app_label in SHARDED_APPS and meta.label_lower not in GLOBAL_MODELS
+
+
+# -----------------------------
+# USER -> SHARD DIRECTORY
+# -----------------------------
+def default_shard(user_id):
+    return SHARDS[user_id % len(SHARDS)]
+
+
+def assign_user(user_id, alias=None):
+    """Record the user's shard (default_shard() unless given)."""
+    from .models import UserShard
+
+    if not SHARDS:
+        return DEFAULT
+    alias = alias or default_shard(user_id)
+    UserShard.objects.update_or_create(user_id=user_id, defaults={"alias": alias})
+    with _directory_lock:
+        _directory[user_id] = alias
+    return alias
+
+
+def shard_for_user(user_id):
+    if not SHARDS:
+        return DEFAULT
+    alias = _directory.get(user_id)
+    if alias is None:
+        from .models import UserShard
+
+        alias = UserShard.objects.filter(user_id=user_id).values_list("alias", flat=True).first()
+        if alias is None:
+            # created before sharding was switched on
+            return assign_user(user_id)
+        with _directory_lock:
+            _directory[user_id] = alias
+    return alias
+
+
+def forget(user_id=None):
+    """Drop cached directory entries (all of them without user_id)."""
+    with _directory_lock:
+        if user_id is None:
+            _directory.clear()
+        else:
+            _directory.pop(user_id, None)
+
+
+# -----------------------------
+# CURRENT SHARD
+# -----------------------------
+def current():
+    """The selected shard alias; None if sharded and nothing is selected."""
+    alias = _current.get()
+    if alias is None and not SHARDS:
+        return DEFAULT
+    return alias
+
+
+def require():
+    alias = current()
+    if alias is None:
+        raise ShardNotSelected("No shard selected; wrap the code in sharding.use_user()")
+    return alias
+
+
+def select_user(user_id):
+    """Route this request's per-user queries to the user's shard."""
+    if SHARDS:
+        _current.set(shard_for_user(user_id))
+
+
+@contextmanager
+def use_shard(alias):
+    token = _current.set(alias)
+    try:
+        yield alias
+    finally:
+        _current.reset(token)
+
+
+def use_user(user_id):
+    return use_shard(shard_for_user(user_id))
+
+
+def each_shard():
+    """Yield every database holding per-user data, selected in turn."""
+    for alias in SHARDS or (DEFAULT,):
+        with use_shard(alias):
+            yield alias
+
+
+def atomic(**kwargs):
+    return transaction.atomic(using=require(), **kwargs)
+
+
+def on_commit(func):
+    transaction.on_commit(func, using=require())
+
+
+def connection():
+    return connections[require()]
+
+
+def read_connection():
+    """connection() for a read-only query; may be a replica (goals/replicas.py)."""
+    return connections[replicas.for_read(require())]
+
+
+# -----------------------------
+# ROUTER
+# -----------------------------
+class UserShardRouter:
+    def _db(self, model, hints):
+        if not is_sharded(model):
+            return DEFAULT
+
+        instance = hints.get("instance")
+        if instance is not None:
+            if not is_sharded(type(instance)):
+                # user.profile, user.goals, ...: the user's shard
+                return shard_for_user(instance.pk)
+            if instance._state.db:
+                # rows read from a replica are written to its primary
+                return replicas.primary_of(instance._state.db)
+            user_id = getattr(instance, "user_id", None)
+            if user_id is not None:
+                return shard_for_user(user_id)
+
+        alias = _current.get()
+        if alias is None:
+            raise ShardNotSelected(
+                f"No shard selected for {model._meta.label}; wrap the code in sharding.use_user()"
+            )
+        return alias
+
+    def db_for_read(self, model, **hints):
+        return replicas.for_read(self._db(model, hints))
+
+    def db_for_write(self, model, **hints):
+        return replicas.for_write(self._db(model, hints))
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # a row and its user are on different databases by design
+        if not is_sharded(type(obj1)) or not is_sharded(type(obj2)):
+            return True
+        return replicas.primary_of(obj1._state.db) == replicas.primary_of(obj2._state.db)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replicas.PRIMARY:
+            return False
+        if app_label not in SHARDED_APPS:
+            return db == DEFAULT
+        if model_name is not None and f"{app_label}.{model_name}" in GLOBAL_MODELS:
+            return db == DEFAULT
+        return True
+
+
+# -----------------------------
+# MIDDLEWARE
+# -----------------------------
+class ShardMiddleware:
+    """
+    Gives every request a clean shard selection, so a worker thread never
+    carries one user's shard into the next request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = _current.set(None)
+        try:
+            return self.get_response(request)
+        finally:
+            _current.reset(token)
+
+    async def __acall__(self, request):
+        token = _current.set(None)
+        try:
+            return await self.get_response(request)
+        finally:
+            _current.reset(token)
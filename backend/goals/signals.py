@@ -1,9 +1,155 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile
+from .models import UserProfile, Goal, Task, Habit, HabitCompletion, ArchivedHabitCompletion
+from .authentication import invalidate_cached_user
+from . import bitmaps, rollups, search, sharding
+from .thumbnails import schedule_avatar_thumbnails
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        UserProfile.objects.create(user=instance)
+        # pick the user's shard first; the profile is created there
+        with sharding.use_shard(sharding.assign_user(instance.pk)):
+            UserProfile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=UserProfile)
+def queue_avatar_thumbnails(sender, instance, **kwargs):
+    # regenerate only when the stored avatar actually changed
+    if instance.avatar and instance.avatar_thumbnails.get("source") != instance.avatar.name:
+        schedule_avatar_thumbnails(instance.pk, instance._state.db)
+
+
+# username / password / profile edits must not be served from the auth cache
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.user_id)
+
+
+# keep the per-year completion bitmaps in step with single-row toggles
+@receiver(post_save, sender=HabitCompletion)
+def set_completion_bit(sender, instance, created, **kwargs):
+    if created:
+        bitmaps.mark(instance.habit_id, instance.date, True)
+
+
+@receiver(post_delete, sender=HabitCompletion)
+def clear_completion_bit(sender, instance, **kwargs):
+    # when the habit itself goes, its bitmaps are deleted in the same cascade
+    if _deleted_via(kwargs, HabitCompletion):
+        bitmaps.mark(instance.habit_id, instance.date, False)
+
+
+def _deleted_via(kwargs, model):
+    """True if the delete() that sent this signal was called on `model`."""
+    origin = kwargs.get("origin")
+    return isinstance(origin, model) or getattr(origin, "model", None) is model
+
+
+# -----------------------------
+# ANALYTICS ROLLUPS
+# -----------------------------
+def _user_deleted(kwargs):
+    # the user's rollup rows go away with the user; don't recreate them
+    return _deleted_via(kwargs, User)
+
+
+# The owner lookups return None for a soft-deleted goal and its children:
+# forget_goal() already took them out of the rollups (bump_many() skips a
+# None user) and unindex_goal() out of the search index.
+def _goal_user_id(goal_id):
+    return Goal.objects.filter(pk=goal_id).values_list("user_id", flat=True).first()
+
+
+def _task_user_id(task):
+    """The task's owner; one lookup per save shared by the receivers below."""
+    if Task.goal.is_cached(task):
+        return None if task.goal.deleted_at else task.goal.user_id
+    cached = getattr(task, "_goal_owner", None)
+    if cached is None or cached[0] != task.goal_id:
+        cached = task._goal_owner = (task.goal_id, _goal_user_id(task.goal_id))
+    return cached[1]
+
+
+def _habit_user_id(habit_id):
+    habits = Habit.objects.filter(pk=habit_id, goal__deleted_at__isnull=True)
+    return habits.values_list("user_id", flat=True).first()
+
+
+@receiver(post_save, sender=Task)
+def rollup_task_saved(sender, instance, created, **kwargs):
+    rollups.task_saved(instance, created, _task_user_id(instance))
+
+
+@receiver(post_delete, sender=Task)
+def rollup_task_deleted(sender, instance, **kwargs):
+    if not _user_deleted(kwargs):
+        rollups.task_deleted(instance, _task_user_id(instance))
+
+
+@receiver(post_delete, sender=Goal)
+def rollup_goal_deleted(sender, instance, **kwargs):
+    if instance.completed_at and not _user_deleted(kwargs):
+        rollups.goals_completed_changed([(instance, instance.completed_at, None)])
+
+
+@receiver(post_save, sender=HabitCompletion)
+def rollup_checkin_saved(sender, instance, created, **kwargs):
+    if created:
+        rollups.bump(_habit_user_id(instance.habit_id), instance.date, "habit_checkins")
+
+
+# archived check-ins still count; they only get deleted along with their habit
+@receiver(post_delete, sender=HabitCompletion)
+@receiver(post_delete, sender=ArchivedHabitCompletion)
+def rollup_checkin_deleted(sender, instance, **kwargs):
+    if not _user_deleted(kwargs):
+        rollups.bump(_habit_user_id(instance.habit_id), instance.date, "habit_checkins", -1)
+
+
+# -----------------------------
+# SEARCH INDEX (goals/search.py)
+# -----------------------------
+# only title / description are indexed: progress saves (every task change)
+# and completion toggles leave the index alone
+@receiver(post_save, sender=Goal)
+def index_goal(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {"title", "description"} & set(update_fields):
+        return
+    search.index_goal(instance)
+
+
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, created, update_fields=None, **kwargs):
+    # the row carries the title and the goal (unindex_goal matches on it)
+    if update_fields is not None and not {"title", "goal", "goal_id"} & set(update_fields):
+        return
+    old = (getattr(instance, "_old_title", None), getattr(instance, "_old_goal_id", None))
+    if not created and old == (instance.title, instance.goal_id):
+        return
+    user_id = _task_user_id(instance)
+    if user_id is not None:
+        search.index_task(instance, user_id)
+    elif not created:
+        # moved under a deleted goal
+        search.unindex("task", instance.pk)
+
+
+@receiver(post_save, sender=Habit)
+def index_habit(sender, instance, **kwargs):
+    search.index_habit(instance)
+
+
+@receiver(post_delete, sender=Goal)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Habit)
+def unindex_search_row(sender, instance, **kwargs):
+    search.unindex(sender._meta.model_name, instance.pk)
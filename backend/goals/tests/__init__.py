@@ -0,0 +1,24 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from goals.models import Goal
+
+
+def make_user(username="alice", password="pass-1234-word"):
+    return User.objects.create_user(username=username, password=password)
+
+
+def make_goal(user, title="Run a marathon", **fields):
+    fields.setdefault("start_date", date(2025, 1, 1))
+    fields.setdefault("end_date", date(2025, 12, 31))
+    return Goal.objects.create(user=user, title=title, **fields)
+
+
+def api_client(user):
+    """An APIClient sending a real access token (JWT auth, not force_authenticate)."""
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    return client
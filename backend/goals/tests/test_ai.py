@@ -0,0 +1,114 @@
+import os
+import subprocess
+import sys
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+
+from ai import client as ai_client
+from ai.client import override_client
+from benchmarks.fakes import FakeOpenAI
+
+from . import api_client, make_goal, make_user
+
+
+class AISuggestionsBatchTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = api_client(self.user)
+        self.goals = [make_goal(self.user, title=f"Goal {i}") for i in range(3)]
+        self.fake = FakeOpenAI()
+
+    def post(self, goal_ids):
+        with override_client(self.fake):
+            return self.client.post("/api/ai/suggestions/batch/", {"goal_ids": goal_ids}, format="json")
+
+    def test_one_upstream_call_for_several_goals(self):
+        ids = [goal.id for goal in self.goals]
+        response = self.post(ids)
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(sorted(response.data["results"]), sorted(str(i) for i in ids))
+        self.assertTrue(all(len(s) == 3 for s in response.data["results"].values()))
+        self.assertEqual(len(self.fake.chat.completions.calls), 1)
+
+    def test_string_ids_are_accepted_like_the_single_goal_endpoint(self):
+        goal = self.goals[0]
+        response = self.post([str(goal.id), goal.id])
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(list(response.data["results"]), [str(goal.id)])
+
+    def test_bad_ids_are_a_400(self):
+        for goal_ids in ([], "1,2", ["abc"], [True], [1.5], [None], None):
+            with self.subTest(goal_ids=goal_ids):
+                self.assertEqual(self.post(goal_ids).status_code, 400)
+
+    def test_other_users_goals_are_missing(self):
+        other = make_goal(make_user("bob"))
+        response = self.post([self.goals[0].id, other.id])
+
+        self.assertEqual(response.data["missing"], [other.id])
+        self.assertEqual(list(response.data["results"]), [str(self.goals[0].id)])
+
+
+
+class AIClientTests(SimpleTestCase):
+    def setUp(self):
+        ai_client.close_client()
+        self.addCleanup(ai_client.close_client)
+
+    def test_project_import_does_not_load_openai(self):
+        code = (
+            "import sys, django; django.setup(); "
+            "import backend.wsgi, backend.urls; "
+            "print('openai' in sys.modules)"
+        )
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": "backend.settings"}
+        env.pop("OPENAI_API_KEY", None)
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(result.stdout.strip().splitlines()[-1], "False")
+
+    def test_one_client_per_process(self):
+        built = []
+
+        def build():
+            built.append(object())
+            return built[-1]
+
+        with mock.patch.object(ai_client, "_build_client", side_effect=build):
+            seen = []
+            threads = [threading.Thread(target=lambda: seen.append(ai_client.get_client())) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        self.assertEqual(len(built), 1)
+        self.assertTrue(all(c is built[0] for c in seen))
+
+    def test_pool_settings(self):
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "sk-test"}):
+            client = ai_client.get_client()
+
+        self.assertEqual(client.max_retries, settings.OPENAI_MAX_RETRIES)
+        self.assertEqual(client.timeout.read, settings.OPENAI_TIMEOUT)
+        self.assertIs(ai_client.get_client(), client)
+
+    def test_override_and_close(self):
+        fake = FakeOpenAI()
+        with mock.patch.object(ai_client, "_build_client", side_effect=mock.Mock) as build:
+            real = ai_client.get_client()
+            with override_client(fake):
+                self.assertIs(ai_client.get_client(), fake)
+            self.assertIs(ai_client.get_client(), real)
+
+            ai_client.close_client()
+            real.close.assert_called_once()
+            self.assertIsNot(ai_client.get_client(), real)
+        self.assertEqual(build.call_count, 2)
@@ -0,0 +1,114 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from goals import archive, bitmaps
+from goals.models import (
+    ArchivedGoal,
+    ArchivedHabitCompletion,
+    ArchivedTask,
+    Goal,
+    Habit,
+    HabitCompletion,
+    HabitYearBitmap,
+    Task,
+)
+
+from . import api_client, make_goal, make_user
+
+
+def bits(habit, year):
+    row = HabitYearBitmap.objects.filter(habit=habit, year=year).first()
+    return None if row is None else bitmaps.to_int(row.bits)
+
+
+class ArchiveCompletionsTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        goal = make_goal(self.user)
+        self.moved = Habit.objects.create(user=self.user, goal=goal, title="Stretch")
+        self.kept = Habit.objects.create(user=self.user, goal=goal, title="Read")
+
+    def complete(self, habit, *days):
+        for day in days:
+            HabitCompletion.objects.create(habit=habit, date=day)
+
+    def test_moves_old_completions_and_drops_only_their_bitmaps(self):
+        self.complete(self.moved, date(2022, 3, 1), date(2022, 3, 2), date(2024, 5, 1))
+        self.complete(self.kept, date(2024, 5, 1))
+        # a bitmap row with no completions behind it, e.g. left by an import
+        HabitYearBitmap.objects.create(habit=self.kept, year=2022, bits=bitmaps.to_bytes(1))
+
+        moved = archive.archive_completions(before=date(2024, 1, 1), pause=0)
+
+        self.assertEqual(moved, 2)
+        self.assertEqual(ArchivedHabitCompletion.objects.filter(habit=self.moved).count(), 2)
+        self.assertEqual(HabitCompletion.objects.filter(habit=self.moved).count(), 1)
+        self.assertIsNone(bits(self.moved, 2022))
+        self.assertIsNotNone(bits(self.moved, 2024))
+        self.assertEqual(bits(self.kept, 2022), 1)
+
+    def test_mid_year_cutoff_clears_moved_days_from_that_year(self):
+        self.complete(self.moved, date(2024, 1, 10), date(2024, 6, 1))
+
+        archive.archive_completions(before=date(2024, 3, 1), pause=0)
+
+        self.assertEqual(bits(self.moved, 2024), 1 << bitmaps.day_index(date(2024, 6, 1)))
+
+    def test_small_batches(self):
+        start = date(2021, 1, 1)
+        self.complete(self.moved, *(start + timedelta(days=n) for n in range(25)))
+
+        self.assertEqual(archive.archive_completions(before=date(2022, 1, 1), batch_size=10, pause=0), 25)
+        self.assertFalse(HabitCompletion.objects.filter(habit=self.moved).exists())
+        self.assertIsNone(bits(self.moved, 2021))
+
+
+class ArchiveGoalsTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = api_client(self.user)
+        self.goal = make_goal(self.user, title="Old goal")
+        Task.objects.create(goal=self.goal, title="Done task", completed=True)
+        Goal.objects.filter(pk=self.goal.pk).update(
+            is_completed=True, completed_at=timezone.now() - timedelta(days=400)
+        )
+
+    def test_completed_goal_and_tasks_move_and_restore(self):
+        self.assertEqual(archive.archive_goals(pause=0), (1, 1))
+        self.assertFalse(Goal.all_objects.filter(pk=self.goal.pk).exists())
+        self.assertEqual(ArchivedTask.objects.filter(goal_id=self.goal.pk).count(), 1)
+
+        response = self.client.post(f"/api/goals/{self.goal.pk}/restore/")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertFalse(ArchivedGoal.objects.exists())
+        self.assertEqual(Task.objects.filter(goal_id=self.goal.pk).count(), 1)
+
+    def test_goal_with_habits_stays_hot(self):
+        Habit.objects.create(user=self.user, goal=self.goal, title="Stretch")
+        self.assertEqual(archive.archive_goals(pause=0), (0, 0))
+
+    def test_include_archived(self):
+        make_goal(self.user, title="Hot goal")
+        archive.archive_goals(pause=0)
+
+        titles = lambda query: [g["title"] for g in self.client.get(f"/api/goals/{query}").data]
+        self.assertEqual(titles(""), ["Hot goal"])
+        self.assertEqual(titles("?include_archived=true"), ["Hot goal", "Old goal"])
+        self.assertEqual(titles("?include_archived=only"), ["Old goal"])
+        self.assertEqual(self.client.get(f"/api/goals/{self.goal.pk}/").status_code, 404)
+        self.assertEqual(
+            self.client.get(f"/api/goals/{self.goal.pk}/?include_archived=true").data["title"], "Old goal"
+        )
+        self.assertEqual(self.client.get("/api/goals/?include_archived=maybe").status_code, 400)
+
+    def test_archived_tasks_are_per_user(self):
+        archive.archive_goals(pause=0)
+        other = api_client(make_user("bob"))
+
+        mine = self.client.get("/api/tasks/?include_archived=only").data
+        self.assertEqual([t["title"] for t in mine], ["Done task"])
+        self.assertIsNotNone(mine[0]["archived_at"])
+        self.assertEqual(other.get("/api/tasks/?include_archived=only").data, [])
+        self.assertEqual(other.get(f"/api/goals/{self.goal.pk}/?include_archived=only").status_code, 404)
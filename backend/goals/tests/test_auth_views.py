@@ -0,0 +1,146 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth import hashers
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from goals import passwords
+from goals.models import UserProfile
+
+from . import api_client, make_user
+
+MD5 = "django.contrib.auth.hashers.MD5PasswordHasher"
+PBKDF2 = "django.contrib.auth.hashers.PBKDF2PasswordHasher"
+
+
+def busy():
+    """No free hashing slots: every hash is refused at once."""
+    return mock.patch.object(passwords, "_slots", threading.Semaphore(0))
+
+
+# MD5 keeps the suite fast; the views don't care which hasher runs
+@override_settings(PASSWORD_HASHERS=[MD5])
+class SignupTests(TestCase):
+    def signup(self, data):
+        return self.client.post("/api/signup/", data, content_type="application/json")
+
+    def test_creates_user_and_profile(self):
+        response = self.signup({"username": "alice", "password": "pass-1234-word"})
+
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(username="alice")
+        self.assertTrue(user.check_password("pass-1234-word"))
+        self.assertTrue(UserProfile.objects.filter(user=user).exists())
+
+    def test_errors(self):
+        make_user()
+        self.assertEqual(
+            self.signup({"username": "alice", "password": "x"}).json(), {"error": "Username already exists"}
+        )
+        self.assertEqual(self.signup({"username": "bob"}).status_code, 400)
+        self.assertEqual(self.signup("[1, 2]").status_code, 400)
+        self.assertEqual(self.client.post("/api/signup/", "{nope", content_type="application/json").status_code, 400)
+        self.assertEqual(self.client.get("/api/signup/").status_code, 405)
+
+    def test_hashing_runs_on_the_pool(self):
+        threads = []
+        real = hashers.make_password
+
+        def record(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return real(*args, **kwargs)
+
+        with mock.patch.object(hashers, "make_password", side_effect=record):
+            self.signup({"username": "alice", "password": "pass-1234-word"})
+        self.assertTrue(threads[0].startswith("pwhash"))
+
+    def test_busy_pool_is_a_503(self):
+        with busy():
+            response = self.signup({"username": "alice", "password": "pass-1234-word"})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertFalse(User.objects.exists())
+
+
+@override_settings(PASSWORD_HASHERS=[MD5])
+class LoginTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+
+    def login(self, username="alice", password="pass-1234-word"):
+        return self.client.post(
+            "/api/token/", {"username": username, "password": password}, content_type="application/json"
+        )
+
+    def test_returns_a_token_pair(self):
+        response = self.login()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {"access", "refresh"})
+        # the access token works against the API
+        self.assertEqual(
+            self.client.get("/api/goals/", headers={"Authorization": f"Bearer {response.json()['access']}"}).status_code,
+            200,
+        )
+
+    def test_bad_credentials(self):
+        self.assertEqual(self.login(password="wrong").status_code, 401)
+
+        with mock.patch.object(passwords, "burn_time", wraps=passwords.burn_time) as burn:
+            response = self.login(username="nobody")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), self.login(password="wrong").json())
+        burn.assert_called_once()
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.login().status_code, 401)
+
+    def test_busy_pool_is_a_503(self):
+        with busy():
+            self.assertEqual(self.login().status_code, 503)
+
+    @override_settings(PASSWORD_HASHERS=[PBKDF2, MD5])
+    def test_outdated_hash_is_upgraded(self):
+        User.objects.filter(pk=self.user.pk).update(password=hashers.make_password("pass-1234-word", hasher="md5"))
+
+        self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+
+
+@override_settings(PASSWORD_HASHERS=[MD5])
+class ChangePasswordTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = api_client(self.user)
+
+    def change(self, old, new):
+        return self.client.post(
+            "/api/profile/change-password/", {"old_password": old, "new_password": new}, format="json"
+        )
+
+    def test_changes_the_password(self):
+        response = self.change("pass-1234-word", "a-much-longer-pass-99")
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("a-much-longer-pass-99"))
+
+    def test_errors(self):
+        self.assertEqual(self.change("wrong", "a-much-longer-pass-99").json(), {"error": "Old password is incorrect"})
+
+        weak = self.change("pass-1234-word", "123")
+        self.assertEqual(weak.status_code, 400)
+        self.assertIsInstance(weak.json()["error"], list)
+
+        self.assertEqual(self.change("pass-1234-word", "").status_code, 400)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("pass-1234-word"))
+
+    def test_requires_a_token(self):
+        response = self.client_class().post(
+            "/api/profile/change-password/", {"old_password": "a", "new_password": "b"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,50 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from goals import authentication
+
+from . import api_client, make_user
+
+
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        authentication._local_cache.clear()
+        self.user = make_user()
+        self.client = api_client(self.user)
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get("/api/goals/").status_code, 200)
+        return sum('FROM "auth_user"' in q["sql"] for q in ctx.captured_queries)
+
+    @mock.patch.object(authentication, "USER_CACHE_ENABLED", True)
+    def test_cached_user_is_reused(self):
+        self.assertEqual(self.user_queries(), 1)
+        self.assertEqual(self.user_queries(), 0)
+
+    @mock.patch.object(authentication, "USER_CACHE_ENABLED", True)
+    def test_deactivation_invalidates_every_layer(self):
+        self.user_queries()
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get("/api/goals/").status_code, 401)
+
+    @mock.patch.object(authentication, "USER_CACHE_ENABLED", True)
+    def test_password_change_is_seen_at_once(self):
+        self.user_queries()
+        self.user.set_password("another-pass-5678")
+        self.user.save()
+
+        self.assertEqual(authentication.get_cached_user(self.user.pk).password, self.user.password)
+
+    @mock.patch.object(authentication, "USER_CACHE_ENABLED", False)
+    def test_disabled_without_a_shared_cache(self):
+        self.assertEqual(self.user_queries(), 1)
+        self.assertEqual(self.user_queries(), 1)
+        self.assertEqual(authentication._local_cache, {})
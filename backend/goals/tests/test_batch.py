@@ -0,0 +1,95 @@
+from django.test import TestCase
+
+from goals.models import Goal, Task
+
+from . import api_client, make_goal, make_user
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = api_client(self.user)
+
+    def post(self, operations):
+        return self.client.post("/api/batch/", {"operations": operations}, format="json")
+
+    def test_refs_link_created_objects(self):
+        response = self.post([
+            {"op": "create", "model": "goal", "ref": "g", "data": {
+                "title": "Learn Go", "start_date": "2025-01-01", "end_date": "2025-06-01",
+            }},
+            {"op": "create", "model": "task", "ref": "t", "data": {"goal": "@g", "title": "Tour of Go"}},
+            {"op": "update", "model": "task", "id": "@t", "data": {"completed": True}},
+        ])
+
+        self.assertEqual(response.status_code, 200, response.data)
+        goal = Goal.objects.get(user=self.user, title="Learn Go")
+        self.assertEqual(list(goal.tasks.values_list("title", "completed")), [("Tour of Go", True)])
+        # progress recomputed once at the end
+        self.assertEqual(response.data["goals"][goal.id], {"progress": 100, "is_completed": True})
+
+    def test_title_starting_with_at_is_plain_text(self):
+        goal = make_goal(self.user)
+
+        response = self.post([
+            {"op": "create", "model": "task", "data": {"goal": goal.id, "title": "@home clean"}},
+            {"op": "update", "model": "goal", "id": goal.id, "data": {"description": "@gym twice a week"}},
+        ])
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertTrue(Task.objects.filter(goal=goal, title="@home clean").exists())
+        goal.refresh_from_db()
+        self.assertEqual(goal.description, "@gym twice a week")
+
+    def test_unknown_ref_rolls_everything_back(self):
+        goal = make_goal(self.user)
+
+        response = self.post([
+            {"op": "create", "model": "task", "data": {"goal": goal.id, "title": "First"}},
+            {"op": "create", "model": "task", "data": {"goal": "@missing", "title": "Second"}},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["index"], 1)
+        self.assertFalse(Task.objects.filter(goal=goal).exists())
+
+    def test_invalid_operation_rolls_back_earlier_writes(self):
+        goal = make_goal(self.user)
+        task = Task.objects.create(goal=goal, title="Keep me")
+
+        response = self.post([
+            {"op": "update", "model": "task", "id": task.id, "data": {"title": "Changed"}},
+            {"op": "create", "model": "goal", "data": {"title": "No dates"}},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        task.refresh_from_db()
+        self.assertEqual(task.title, "Keep me")
+
+    def test_stale_version_is_412_and_rolls_back(self):
+        goal = make_goal(self.user)
+        task = Task.objects.create(goal=goal, title="Draft")
+
+        response = self.post([
+            {"op": "create", "model": "task", "data": {"goal": goal.id, "title": "New"}},
+            {"op": "update", "model": "task", "id": task.id, "version": task.version + 1,
+             "data": {"title": "Overwritten"}},
+        ])
+
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(list(Task.objects.filter(goal=goal).values_list("title", flat=True)), ["Draft"])
+
+    def test_other_users_goal_is_404(self):
+        other = make_goal(make_user("bob"))
+
+        response = self.post([
+            {"op": "create", "model": "task", "data": {"goal": other.id, "title": "Sneaky"}},
+        ])
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Task.objects.filter(goal=other).exists())
+
+    def test_rejects_empty_and_oversized_batches(self):
+        self.assertEqual(self.post([]).status_code, 400)
+        ops = [{"op": "delete", "model": "task", "id": 1}] * 101
+        self.assertEqual(self.post(ops).status_code, 400)
@@ -0,0 +1,130 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from goals import bitmaps
+from goals.bitmaps import HabitCalendar
+from goals.models import Habit, HabitCompletion, HabitYearBitmap
+
+from . import api_client, make_goal, make_user
+
+
+def calendar(*days):
+    return HabitCalendar(bitmaps.bitmaps_from_dates(days))
+
+
+def calendar_of(habit):
+    return HabitCalendar.from_rows(HabitYearBitmap.objects.filter(habit=habit))
+
+
+class HabitCalendarTests(SimpleTestCase):
+    def test_dates_count_and_membership(self):
+        days = [date(2023, 12, 31), date(2024, 1, 1), date(2024, 2, 29), date(2024, 12, 31)]
+        cal = calendar(*days)
+
+        self.assertEqual(list(cal.dates()), days)
+        self.assertEqual(cal.count(), 4)
+        self.assertEqual(cal.count(since=date(2024, 1, 1), until=date(2024, 6, 30)), 2)
+        self.assertEqual(list(cal.dates(since=date(2024, 2, 29))), days[2:])
+        self.assertIn(date(2024, 12, 31), cal)
+        self.assertNotIn(date(2024, 3, 1), cal)
+        self.assertEqual(cal.last_date(), date(2024, 12, 31))
+
+    def test_leap_day_fits(self):
+        self.assertEqual(len(bitmaps.to_bytes(1 << 365)), bitmaps.BITMAP_BYTES)
+        self.assertEqual(bitmaps.day_index(date(2024, 12, 31)), 365)
+
+    def test_streak_runs_across_year_boundaries(self):
+        start = date(2022, 12, 20)
+        cal = calendar(*(start + timedelta(days=i) for i in range(30)))
+        self.assertEqual(cal.streak(), 30)
+
+        # a run covering all of 2023
+        full = calendar(*(date(2023, 1, 1) + timedelta(days=i) for i in range(366)))
+        self.assertEqual(full.streak(), 366)
+
+    def test_streak_stops_at_a_gap_and_expires(self):
+        cal = calendar(date(2024, 5, 1), date(2024, 5, 3), date(2024, 5, 4))
+
+        self.assertEqual(cal.streak(), 2)
+        self.assertEqual(cal.streak(today=date(2024, 5, 5)), 2)
+        self.assertEqual(cal.streak(today=date(2024, 5, 6)), 0)
+        self.assertEqual(calendar().streak(), 0)
+
+
+class BitmapSyncTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.habit = Habit.objects.create(user=self.user, goal=make_goal(self.user), title="Read")
+
+    def test_single_rows_keep_the_bitmap_in_step(self):
+        first = HabitCompletion.objects.create(habit=self.habit, date=date(2024, 3, 1))
+        HabitCompletion.objects.create(habit=self.habit, date=date(2025, 3, 1))
+        self.assertEqual(list(calendar_of(self.habit).dates()), [date(2024, 3, 1), date(2025, 3, 1)])
+
+        first.delete()
+        self.assertEqual(list(calendar_of(self.habit).dates()), [date(2025, 3, 1)])
+
+    def test_mark_writes_one_row_once(self):
+        bitmaps.mark(self.habit.id, date(2024, 3, 1), False)
+        self.assertFalse(HabitYearBitmap.objects.exists())
+
+        with self.assertNumQueries(4):  # SELECT, then the INSERT in a savepoint
+            bitmaps.mark(self.habit.id, date(2024, 3, 1), True)
+        with self.assertNumQueries(2):  # SELECT, UPDATE
+            bitmaps.mark(self.habit.id, date(2024, 3, 2), True)
+        self.assertEqual(list(calendar_of(self.habit).dates()), [date(2024, 3, 1), date(2024, 3, 2)])
+
+    def test_toggle_query_budget(self):
+        client = api_client(self.user)
+        url = f"/api/habits/{self.habit.id}/toggle/"
+
+        # user, habit, completion get_or_create (3 + savepoint), bitmap
+        # SELECT + UPDATE, habit owner, 4 rollup writes, 2 reads for the
+        # serializer; the year's first check-in INSERTs the bitmap instead
+        with self.assertNumQueries(17):
+            self.assertEqual(client.post(url).data["status"], "checked")
+        with self.assertNumQueries(13):
+            self.assertEqual(client.post(url).data["status"], "unchecked")
+        with self.assertNumQueries(15):
+            self.assertEqual(client.post(url).data["status"], "checked")
+
+    def test_apply_and_rebuild(self):
+        written = bitmaps.apply([
+            (self.habit.id, date(2024, 1, 1), True),
+            (self.habit.id, date(2024, 1, 2), True),
+            (self.habit.id, date(2024, 1, 2), False),
+        ])
+        self.assertEqual(written, 1)
+        self.assertEqual(list(calendar_of(self.habit).dates()), [date(2024, 1, 1)])
+
+        # rows are the source of truth
+        HabitCompletion.objects.bulk_create([HabitCompletion(habit=self.habit, date=date(2023, 7, 4))])
+        self.assertEqual(bitmaps.rebuild([self.habit.id]), 1)
+        self.assertEqual(list(calendar_of(self.habit).dates()), [date(2023, 7, 4)])
+
+    def test_rebuild_command_verifies(self):
+        HabitCompletion.objects.bulk_create([HabitCompletion(habit=self.habit, date=date(2024, 1, 1))])
+        with self.assertRaises(SystemExit):
+            call_command("rebuild_habit_bitmaps", "--check-only", stdout=StringIO(), stderr=StringIO())
+
+        out = StringIO()
+        call_command("rebuild_habit_bitmaps", "--verify", stdout=out)
+        self.assertIn("Bitmaps match completion rows", out.getvalue())
+
+    @override_settings(HABIT_BITMAP_READS=True)
+    def test_reads_from_bitmaps_match_rows(self):
+        for offset in (0, 1, 2, 5):
+            HabitCompletion.objects.create(habit=self.habit, date=date(2024, 6, 1) + timedelta(days=offset))
+        client = api_client(self.user)
+        params = {"since": "2024-06-01", "until": "2024-06-30"}
+
+        with_bitmaps = client.get(f"/api/habits/{self.habit.id}/", params).data
+        with override_settings(HABIT_BITMAP_READS=False):
+            with_rows = client.get(f"/api/habits/{self.habit.id}/", params).data
+
+        self.assertEqual(with_bitmaps["completed_dates"], with_rows["completed_dates"])
+        self.assertEqual(len(with_bitmaps["completed_dates"]), 4)
+        self.assertEqual(with_bitmaps["streak"], with_rows["streak"])
@@ -0,0 +1,124 @@
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from goals import bitmaps
+from goals.models import Habit, HabitCompletion, HabitYearBitmap, UserDailyStats
+
+from . import api_client, make_goal, make_user
+
+TODAY = date(2025, 3, 10)
+
+
+class BulkCompletionTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = api_client(self.user)
+        self.habit = Habit.objects.create(user=self.user, goal=make_goal(self.user), title="Read")
+
+    def post(self, changes):
+        return self.client.post("/api/habits/completions/", {"changes": changes}, format="json")
+
+    def cells(self, days, done=True, habit=None):
+        return [{"habit": (habit or self.habit).id, "date": d.isoformat(), "done": done} for d in days]
+
+    def assert_bitmaps_match_rows(self):
+        stored = {row.year: bitmaps.to_int(row.bits) for row in HabitYearBitmap.objects.filter(habit=self.habit)}
+        expected = bitmaps.bitmaps_from_dates(
+            HabitCompletion.objects.filter(habit=self.habit).values_list("date", flat=True)
+        )
+        self.assertEqual({y: v for y, v in stored.items() if v}, dict(expected))
+
+    def test_check_a_range_across_a_year_boundary(self):
+        days = [date(2024, 12, 30) + timedelta(days=i) for i in range(5)]
+
+        response = self.post(self.cells(days))
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(response.data["changed"]), 5)
+        self.assertEqual(HabitCompletion.objects.filter(habit=self.habit).count(), 5)
+        self.assertEqual(set(HabitYearBitmap.objects.filter(habit=self.habit).values_list("year", flat=True)), {2024, 2025})
+        self.assert_bitmaps_match_rows()
+        self.assertEqual(UserDailyStats.objects.get(user=self.user, period_start=days[0]).habit_checkins, 1)
+
+    def test_only_flipped_cells_are_reported_and_counted(self):
+        self.post(self.cells([date(2025, 3, 1)]))
+
+        response = self.post(
+            self.cells([date(2025, 3, 1), date(2025, 3, 2)])
+            + self.cells([date(2025, 3, 5)], done=False)
+        )
+
+        self.assertEqual(response.data["changed"], [{"habit": self.habit.id, "date": "2025-03-02", "done": True}])
+        self.assertEqual(UserDailyStats.objects.get(user=self.user, period_start=date(2025, 3, 1)).habit_checkins, 1)
+
+    def test_uncheck_clears_rows_bits_and_rollups(self):
+        days = [date(2025, 3, 1) + timedelta(days=i) for i in range(4)]
+        self.post(self.cells(days))
+
+        response = self.post(self.cells(days[1:3], done=False))
+
+        self.assertEqual(len(response.data["changed"]), 2)
+        self.assertEqual(
+            list(HabitCompletion.objects.filter(habit=self.habit).order_by("date").values_list("date", flat=True)),
+            [days[0], days[3]],
+        )
+        self.assert_bitmaps_match_rows()
+        self.assertEqual(UserDailyStats.objects.get(user=self.user, period_start=days[1]).habit_checkins, 0)
+
+    def test_other_years_bitmaps_are_left_alone(self):
+        self.post(self.cells([date(2023, 6, 1)]))
+        old = HabitYearBitmap.objects.get(habit=self.habit, year=2023)
+
+        self.post(self.cells([date(2025, 3, 1)]))
+
+        self.assertEqual(HabitYearBitmap.objects.get(pk=old.pk).bits, old.bits)
+
+    def test_query_count_does_not_grow_with_history(self):
+        def queries_for(day):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.post(self.cells([day])).status_code, 200)
+            return len(queries)
+
+        queries_for(date(2025, 1, 1))  # warm the auth cache, create the 2025 bitmap
+        short = queries_for(date(2025, 1, 2))
+        HabitCompletion.objects.bulk_create(
+            HabitCompletion(habit=self.habit, date=date(2020, 1, 1) + timedelta(days=i)) for i in range(1500)
+        )
+        bitmaps.rebuild([self.habit.id])
+
+        self.assertEqual(queries_for(date(2025, 1, 3)), short)
+
+    def test_streak_is_returned(self):
+        # the profile's timezone is UTC
+        today = timezone.now().date()
+
+        response = self.post(self.cells([today - timedelta(days=i) for i in range(3)]))
+
+        self.assertEqual(response.data["streaks"][self.habit.id], 3)
+
+    def test_streak_counts_rows_without_bitmaps(self):
+        today = timezone.now().date()
+        # history from before the bitmaps existed: rows only
+        HabitCompletion.objects.bulk_create(
+            HabitCompletion(habit=self.habit, date=today - timedelta(days=i)) for i in range(1, 5)
+        )
+
+        response = self.post(self.cells([today]))
+
+        self.assertEqual(response.data["streaks"][self.habit.id], 5)
+        read = self.client.get(f"/api/habits/{self.habit.id}/").data
+        self.assertEqual(read["streak"], 5)
+
+    def test_validation(self):
+        bob = make_user("bob")
+        other = Habit.objects.create(user=bob, goal=make_goal(bob), title="Not mine")
+
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.post(self.cells([TODAY], habit=other)).status_code, 400)
+        self.assertEqual(self.post([{"habit": self.habit.id, "date": "2025-02-30"}]).status_code, 400)
+        self.assertEqual(self.post(self.cells([TODAY] * 1001)).status_code, 400)
+        self.assertFalse(HabitCompletion.objects.exists())
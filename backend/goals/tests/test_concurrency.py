@@ -0,0 +1,87 @@
+from django.db import transaction
+from django.test import TestCase
+
+from goals.concurrency import parse_if_match
+from goals.models import Goal, Task, VersionConflict
+
+from . import api_client, make_goal, make_user
+
+
+class IfMatchTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = api_client(self.user)
+        self.goal = make_goal(self.user)
+        self.task = Task.objects.create(goal=self.goal, title="Buy shoes")
+
+    def patch(self, path, data, if_match=None):
+        headers = {"HTTP_IF_MATCH": if_match} if if_match is not None else {}
+        return self.client.patch(path, data, format="json", **headers)
+
+    def test_detail_carries_etag(self):
+        response = self.client.get(f"/api/tasks/{self.task.id}/")
+
+        self.assertEqual(response["ETag"], f'"{self.task.version}"')
+
+    def test_matching_if_match_updates_and_bumps_version(self):
+        response = self.patch(f"/api/tasks/{self.task.id}/", {"title": "Buy running shoes"}, '"1"')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["version"], 2)
+        self.assertEqual(response["ETag"], '"2"')
+
+    def test_stale_if_match_is_412_with_current_row(self):
+        self.patch(f"/api/tasks/{self.task.id}/", {"title": "Edited elsewhere"}, '"1"')
+
+        response = self.patch(f"/api/tasks/{self.task.id}/", {"title": "My edit"}, '"1"')
+
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response.data["current"]["title"], "Edited elsewhere")
+        self.assertEqual(response["ETag"], '"2"')
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, "Edited elsewhere")
+
+    def test_stale_if_match_blocks_delete(self):
+        response = self.client.delete(f"/api/goals/{self.goal.id}/", HTTP_IF_MATCH='"7"')
+
+        self.assertEqual(response.status_code, 412)
+        self.assertTrue(Goal.objects.filter(pk=self.goal.pk).exists())
+
+    def test_without_if_match_last_write_wins(self):
+        self.patch(f"/api/goals/{self.goal.id}/", {"title": "One"})
+        response = self.patch(f"/api/goals/{self.goal.id}/", {"title": "Two"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["version"], 3)
+
+    def test_task_changes_do_not_bump_goal_version(self):
+        # progress is saved with update_fields, which leaves version alone
+        self.patch(f"/api/tasks/{self.task.id}/", {"completed": True})
+
+        self.goal.refresh_from_db()
+        self.assertEqual(self.goal.progress, 100)
+        self.assertEqual(self.goal.version, 1)
+
+
+class VersionedModelTests(TestCase):
+    def test_concurrent_save_raises_conflict(self):
+        goal = make_goal(make_user())
+        first = Goal.objects.get(pk=goal.pk)
+        second = Goal.objects.get(pk=goal.pk)
+
+        first.title = "First"
+        first.save()
+        second.title = "Second"
+        with self.assertRaises(VersionConflict), transaction.atomic():
+            second.save()
+
+        self.assertEqual(second.version, 1)
+        goal.refresh_from_db()
+        self.assertEqual((goal.title, goal.version), ("First", 2))
+
+
+class ParseIfMatchTests(TestCase):
+    def test_forms(self):
+        self.assertIsNone(parse_if_match(""))
+        self.assertEqual(parse_if_match("*"), "*")
+        self.assertEqual(parse_if_match('"3", W/"4", "x"'), {3, 4})
@@ -0,0 +1,43 @@
+from dataclasses import replace
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from benchmarks import datagen
+from goals.models import Goal, HabitCompletion, Task
+
+SPEC = datagen.DatasetSpec(users=1, goals_per_user=3, tasks_per_goal=4, habits_per_user=2, years=1)
+
+
+def snapshot():
+    return {
+        "goals": list(Goal.objects.order_by("id").values_list("title", "start_date", "end_date", "category")),
+        "tasks": list(Task.objects.order_by("id").values_list("title", "completed", "completed_at")),
+        "completions": list(HabitCompletion.objects.order_by("id").values_list("date", flat=True)),
+    }
+
+
+class DatagenTests(TestCase):
+    def test_same_spec_same_rows(self):
+        datagen.generate(SPEC)
+        first = snapshot()
+        User.objects.all().delete()
+
+        datagen.generate(SPEC)
+        self.assertEqual(snapshot(), first)
+
+    def test_dates_count_back_from_the_anchor(self):
+        spec = replace(SPEC, anchor=date(2020, 6, 1))
+        datagen.generate(spec)
+        rows = snapshot()
+
+        self.assertLess(max(rows["completions"]), spec.anchor)
+        self.assertGreaterEqual(min(rows["completions"]), date(2019, 6, 1))
+        done = [at for _, completed, at in rows["tasks"] if completed]
+        self.assertTrue(done)
+        self.assertLessEqual(max(done), spec.now)
+        self.assertTrue(all(end > spec.anchor for _, _, end, _ in rows["goals"]))
+
+    def test_report_dict_is_json_ready(self):
+        self.assertEqual(SPEC.as_dict()["anchor"], "2025-01-01")
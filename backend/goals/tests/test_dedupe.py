@@ -0,0 +1,93 @@
+from django.test import SimpleTestCase, TestCase
+
+from ai import dedupe
+from ai.dedupe import filter_new, normalize
+from goals.models import Task
+
+from . import api_client, make_goal, make_user
+
+
+class NormalizeTests(SimpleTestCase):
+    def test_case_accents_punctuation_and_spaces(self):
+        self.assertEqual(normalize("  Café — crème BRÛLÉE!! "), "cafe creme brulee")
+        self.assertEqual(normalize("go_for a...run"), "go for a run")
+        self.assertEqual(normalize("!!!"), "")
+
+
+class FilterNewTests(TestCase):
+    def setUp(self):
+        self.goal = make_goal(make_user())
+        for title in ("Go for a 5 km run", "Buy running shoes", "Sign up for the city half marathon"):
+            Task.objects.create(goal=self.goal, title=title)
+
+    def test_near_copies_are_duplicates(self):
+        new, duplicates = filter_new(self.goal, [
+            "go for a 5km run!",
+            "Buy Running Shoes.",
+            "Sign up for the city half-marathon",
+            "Stretch for ten minutes",
+        ])
+
+        self.assertEqual(new, ["Stretch for ten minutes"])
+        self.assertEqual(duplicates, ["go for a 5km run!", "Buy Running Shoes.", "Sign up for the city half-marathon"])
+
+    def test_candidates_are_checked_against_each_other(self):
+        new, duplicates = filter_new(self.goal, ["Stretch after runs", "", "Stretch after runs.", "Book a massage"])
+
+        self.assertEqual(new, ["Stretch after runs", "Book a massage"])
+        self.assertEqual(duplicates, ["", "Stretch after runs."])
+
+    def test_threshold(self):
+        candidate = ["Buy new running shoes"]
+        self.assertEqual(filter_new(self.goal, candidate, threshold=0.99)[0], candidate)
+        self.assertEqual(filter_new(self.goal, candidate, threshold=0.3)[1], candidate)
+
+    def test_empty_goal_and_no_candidates(self):
+        empty = make_goal(self.goal.user, title="Empty")
+        self.assertEqual(filter_new(empty, ["Go for a 5 km run"]), (["Go for a 5 km run"], []))
+        self.assertEqual(filter_new(self.goal, []), ([], []))
+
+    def test_index_is_cached_until_the_tasks_change(self):
+        first = dedupe.get_index(self.goal)
+        with self.assertNumQueries(1):
+            self.assertIs(dedupe.get_index(self.goal), first)
+
+        task = Task.objects.create(goal=self.goal, title="Stretch after runs")
+        self.assertEqual(filter_new(self.goal, ["stretch after runs"])[1], ["stretch after runs"])
+
+        task.title = "Ice bath"
+        task.save()
+        self.assertEqual(filter_new(self.goal, ["stretch after runs"])[0], ["stretch after runs"])
+
+        # bulk paths skip save() but still move the fingerprint
+        Task.objects.bulk_create([Task(goal=self.goal, title="Foam roll")])
+        self.assertEqual(filter_new(self.goal, ["Foam roll"])[1], ["Foam roll"])
+
+
+class AIAddTasksTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.goal = make_goal(self.user)
+        Task.objects.create(goal=self.goal, title="Go for a 5 km run")
+
+    def post(self, user, tasks):
+        return api_client(user).post(
+            "/api/ai/add_tasks/", {"goal_id": self.goal.id, "tasks": tasks}, format="json"
+        )
+
+    def test_near_duplicates_are_skipped(self):
+        response = self.post(self.user, ["go for a 5km run!", "Stretch after runs", "Stretch after runs."])
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["added"], 1)
+        self.assertEqual(response.data["skipped"], ["go for a 5km run!", "Stretch after runs."])
+        self.assertEqual(
+            sorted(Task.objects.filter(goal=self.goal).values_list("title", flat=True)),
+            ["Go for a 5 km run", "Stretch after runs"],
+        )
+
+    def test_other_users_goal_is_missing(self):
+        response = self.post(make_user("bob"), ["Stretch after runs"])
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Task.objects.filter(goal=self.goal).count(), 1)
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers
+
+from goals import fastpath
+from goals.models import Goal, Task
+
+from . import api_client, make_goal, make_user
+
+
+class FastPathTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = api_client(self.user)
+        other = make_goal(make_user("bob"), title="Not mine")
+        Task.objects.create(goal=other, title="Hidden")
+
+        for i in range(3):
+            goal = make_goal(self.user, title=f"Goal {i}", description="ünïcode ✓", order=2 - i)
+            for j in range(4):
+                Task.objects.create(goal=goal, title=f"Task {i}.{j}", completed=j % 2 == 0)
+        make_goal(self.user, title="No tasks yet")
+        # timestamps with microseconds
+        Task.objects.filter(completed=True).update(completed_at=timezone.now() - timedelta(days=3))
+
+    def both(self, path):
+        bodies = {}
+        for fast in (False, True):
+            with override_settings(LIST_FAST_PATH=fast):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                bodies[fast] = response.content
+        return bodies[False], bodies[True]
+
+    def test_same_bytes_as_the_serializers(self):
+        for path in ("/api/goals/", "/api/tasks/"):
+            with self.subTest(path=path):
+                slow, fast = self.both(path)
+                self.assertEqual(fast, slow)
+
+    @override_settings(TIME_ZONE="Asia/Kolkata")
+    def test_same_bytes_in_another_timezone(self):
+        slow, fast = self.both("/api/tasks/")
+        self.assertIn(b"+05:30", fast)
+        self.assertEqual(fast, slow)
+
+    def test_query_count_does_not_grow_with_goals(self):
+        def queries():
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get("/api/goals/")
+            return len(ctx.captured_queries)
+
+        before = queries()
+        for i in range(5):
+            Task.objects.create(goal=make_goal(self.user, title=f"More {i}"), title="x")
+        self.assertEqual(queries(), before)
+
+    def test_soft_deleted_goals_are_left_out(self):
+        Goal.objects.filter(title="Goal 0").update(deleted_at=timezone.now())
+
+        titles = [g["title"] for g in self.client.get("/api/goals/").json()]
+        self.assertNotIn("Goal 0", titles)
+
+
+class CompiledSerializerTests(SimpleTestCase):
+    def test_unsupported_fields_fail_at_compile_time(self):
+        class Computed(serializers.Serializer):
+            total = serializers.SerializerMethodField()
+
+        class Dotted(serializers.Serializer):
+            owner = serializers.CharField(source="user.username")
+
+        for serializer_class in (Computed, Dotted):
+            with self.subTest(serializer_class.__name__), self.assertRaises(TypeError):
+                fastpath.CompiledSerializer(serializer_class)
@@ -0,0 +1,80 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from goals.completions import HISTORY_WEEKS, CompletionError, HistoryWindow, parse_history_window
+from goals.models import Habit, HabitCompletion
+
+from . import api_client, make_goal, make_user
+
+TODAY = date(2025, 3, 15)
+
+
+class HistoryWindowTests(SimpleTestCase):
+    def test_default_is_the_last_weeks_up_to_today(self):
+        window = parse_history_window({}, TODAY)
+
+        self.assertEqual(window.until, TODAY)
+        self.assertEqual(window.since, TODAY - timedelta(weeks=HISTORY_WEEKS))
+        self.assertEqual(window.encoding, "dates")
+
+    def test_explicit_bounds_and_full_history(self):
+        window = parse_history_window({"since": "2025-01-01", "until": "2025-01-31"}, TODAY)
+        self.assertEqual((window.since, window.until), (date(2025, 1, 1), date(2025, 1, 31)))
+
+        everything = parse_history_window({"history": "all"}, TODAY)
+        self.assertIsNone(everything.since)
+        self.assertTrue(everything.contains(date(1999, 1, 1)))
+
+    def test_encodings(self):
+        window = HistoryWindow(since=date(2025, 1, 1), until=date(2025, 1, 5), encoding="dates")
+        days = [date(2025, 1, 4), date(2024, 12, 31), date(2025, 1, 1)]
+
+        self.assertEqual(window.encode(days), ["2025-01-01", "2025-01-04"])
+        self.assertEqual(HistoryWindow(window.since, window.until, "offsets").encode(days), [0, 3])
+        self.assertEqual(HistoryWindow(window.since, window.until, "bits").encode(days), "10010")
+
+    def test_invalid_windows(self):
+        for params in (
+            {"since": "yesterday"},
+            {"until": "2025-02-30"},
+            {"since": "2025-02-01", "until": "2025-01-01"},
+            {"since": "2015-01-01"},
+            {"encoding": "xml"},
+            {"history": "all", "encoding": "bits"},
+        ):
+            with self.subTest(params=params), self.assertRaises(CompletionError):
+                parse_history_window(params, TODAY)
+
+
+@mock.patch("goals.views.request_today", return_value=TODAY)
+class HabitHistoryApiTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.habit = Habit.objects.create(user=self.user, goal=make_goal(self.user), title="Read")
+        for day in (date(2024, 6, 1), date(2025, 3, 1), date(2025, 3, 14)):
+            HabitCompletion.objects.create(habit=self.habit, date=day)
+        self.client = api_client(self.user)
+
+    def test_reads_default_to_the_window(self, _today):
+        data = self.client.get("/api/habits/").data[0]
+
+        self.assertEqual(data["completed_dates"], ["2025-03-01", "2025-03-14"])
+        self.assertEqual(data["history"]["until"], "2025-03-15")
+        self.assertEqual(data["history"]["encoding"], "dates")
+
+    def test_full_history_and_bits(self, _today):
+        everything = self.client.get("/api/habits/", {"history": "all"}).data[0]
+        self.assertEqual(everything["completed_dates"], ["2024-06-01", "2025-03-01", "2025-03-14"])
+
+        bits = self.client.get(
+            f"/api/habits/{self.habit.id}/", {"since": "2025-03-13", "until": "2025-03-15", "encoding": "bits"}
+        ).data
+        self.assertEqual(bits["completed_dates"], "010")
+
+    def test_bad_window_is_a_400(self, _today):
+        response = self.client.get("/api/habits/", {"since": "soon"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "since must be YYYY-MM-DD"})
@@ -0,0 +1,131 @@
+import csv
+import json
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from goals.importers import BulkImporter, iter_records
+from goals.models import Goal, Habit, HabitCompletion, HabitYearBitmap, Task
+
+from . import api_client, make_goal, make_user
+
+
+def jsonl(*records):
+    return "\n".join(r if isinstance(r, str) else json.dumps(r) for r in records).encode()
+
+
+GOAL = {"type": "goal", "ref": "g", "title": "Learn Spanish", "start_date": "2025-01-01", "end_date": "2025-12-31"}
+
+
+class ImportEndpointTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = api_client(self.user)
+
+    def upload(self, name, content, **extra):
+        return self.client.post(
+            "/api/import/", {"file": SimpleUploadedFile(name, content), **extra}, format="multipart"
+        )
+
+    def test_jsonl_with_refs(self):
+        response = self.upload("data.jsonl", jsonl(
+            GOAL,
+            {"type": "task", "goal": "g", "title": "Duolingo", "completed": True},
+            {"type": "task", "goal": "g", "title": "Podcast"},
+            {"type": "habit", "ref": "h", "goal": "g", "title": "Flashcards"},
+            {"type": "completion", "habit": "h", "date": "2025-03-01"},
+            {"type": "completion", "habit": "h", "date": "2025-03-01"},
+        ))
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["failed_batches"], 0)
+        goal = Goal.objects.get(user=self.user)
+        self.assertEqual(goal.progress, 50)
+        self.assertIsNotNone(Task.objects.get(title="Duolingo").completed_at)
+        # duplicate (habit, date) rows are skipped by the database
+        self.assertEqual(HabitCompletion.objects.count(), 1)
+        self.assertTrue(HabitYearBitmap.objects.filter(habit__title="Flashcards", year=2025).exists())
+
+    def test_csv(self):
+        existing = make_goal(self.user)
+        content = (
+            "type,goal,title,completed\n"
+            f"task,{existing.id},Long run,yes\n"
+            f"task,{existing.id},Rest day,no\n"
+        ).encode()
+
+        response = self.upload("tasks.csv", content)
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["created"]["tasks"], 2)
+        existing.refresh_from_db()
+        self.assertEqual(existing.progress, 50)
+
+    def test_row_errors_are_reported_by_line(self):
+        other = make_goal(make_user("bob"))
+
+        response = self.upload("data.jsonl", jsonl(
+            GOAL,
+            "not json",
+            {"type": "task", "goal": "nope", "title": "x"},
+            {"type": "task", "goal": str(other.id), "title": "Not yours"},
+            {"type": "goal", "title": "No dates"},
+            {"type": "spaceship"},
+        ))
+
+        self.assertEqual(response.status_code, 200)
+        errors = response.data["batches"][0]["errors"]
+        self.assertEqual([e["line"] for e in errors], [2, 3, 4, 5, 6])
+        self.assertIn("unknown reference", errors[1]["error"])
+        self.assertIn("not found", errors[2]["error"])
+        self.assertEqual(response.data["created"]["goals"], 1)
+        self.assertFalse(Task.objects.filter(goal=other).exists())
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.post("/api/import/", {}, format="multipart").status_code, 400)
+        self.assertEqual(self.upload("data.txt", b"").status_code, 400)
+        self.assertEqual(self.upload("data.txt", jsonl(GOAL), format="jsonl").status_code, 200)
+
+    def test_file_that_is_not_utf8(self):
+        content = "type,goal,title\ntask,1,Café\n".encode("latin-1")
+
+        response = self.upload("tasks.csv", content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"]["tasks"], 0)
+        [error] = response.data["batches"][0]["errors"]
+        self.assertEqual(error["line"], 1)
+        self.assertIn("not UTF-8", error["error"])
+
+    def test_malformed_csv_keeps_the_rows_before_it(self):
+        goal = make_goal(self.user)
+        too_long = "x" * (csv.field_size_limit() + 1)
+        content = f"type,goal,title\ntask,{goal.id},Long run\ntask,{goal.id},{too_long}\n".encode()
+
+        response = self.upload("tasks.csv", content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"]["tasks"], 1)
+        [error] = response.data["batches"][0]["errors"]
+        self.assertEqual(error["line"], 3)
+        self.assertIn("Invalid CSV", error["error"])
+
+
+class BulkImporterTests(TestCase):
+    def test_refs_resolve_across_batches(self):
+        user = make_user()
+        records = iter_records(SimpleUploadedFile("d.jsonl", jsonl(
+            GOAL,
+            {"type": "habit", "ref": "h", "goal": "g", "title": "Flashcards"},
+            {"type": "task", "goal": "g", "title": "One"},
+            {"type": "task", "goal": "g", "title": "Two"},
+            {"type": "completion", "habit": "h", "date": "2025-01-02"},
+        )), "jsonl")
+
+        result = BulkImporter(user, batch_size=2).run(records)
+
+        self.assertEqual(len(result["batches"]), 3)
+        self.assertEqual(result["created"], {"goals": 1, "tasks": 2, "habits": 1, "completions": 1})
+        goal = Goal.objects.get(user=user)
+        self.assertEqual(set(goal.tasks.values_list("title", flat=True)), {"One", "Two"})
+        self.assertEqual(Habit.objects.get().completions.count(), 1)
@@ -0,0 +1,67 @@
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.test import RequestFactory, TestCase
+
+from goals import localtime
+from goals.models import Habit, HabitCompletion, UserProfile
+
+from . import api_client, make_goal, make_user
+
+# 22:00 UTC on Mar 1 is already Mar 2 in Sydney (UTC+11)
+NOW = datetime(2025, 3, 1, 22, 0, tzinfo=dt_timezone.utc)
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW.astimezone(tz) if tz else NOW.replace(tzinfo=None)
+
+
+class LocalTodayTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+
+    def set_timezone(self, name):
+        UserProfile.objects.filter(user=self.user).update(timezone=name)
+        self.user.refresh_from_db()
+        self.user.profile.refresh_from_db()
+
+    def today(self):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        with mock.patch.object(localtime, "datetime", FrozenDatetime):
+            return localtime.request_today(request)
+
+    def test_today_rolls_over_at_the_users_midnight(self):
+        self.assertEqual(self.today(), date(2025, 3, 1))
+        self.set_timezone("Australia/Sydney")
+        self.assertEqual(self.today(), date(2025, 3, 2))
+
+    def test_unknown_or_empty_timezone_is_utc(self):
+        self.assertEqual(localtime.zone("Mars/Olympus").key, "UTC")
+        self.assertEqual(localtime.zone("").key, "UTC")
+        self.assertEqual(localtime.user_id_timezone(self.user.pk).key, "UTC")
+
+    def test_computed_once_per_request(self):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        first = localtime.request_today(request)
+        with mock.patch.object(localtime, "user_timezone") as user_timezone:
+            self.assertEqual(localtime.request_today(request), first)
+        user_timezone.assert_not_called()
+
+    def test_toggle_uses_the_users_day(self):
+        self.set_timezone("Australia/Sydney")
+        habit = Habit.objects.create(user=self.user, goal=make_goal(self.user), title="Stretch")
+
+        with mock.patch.object(localtime, "datetime", FrozenDatetime):
+            response = api_client(self.user).post(f"/api/habits/{habit.pk}/toggle/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(HabitCompletion.objects.values_list("date", flat=True)), [date(2025, 3, 2)])
+
+    def test_profile_rejects_unknown_timezones(self):
+        profile = UserProfile.objects.get(user=self.user)
+        response = api_client(self.user).patch(f"/api/profile/{profile.pk}/", {"timezone": "Nowhere/City"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,85 @@
+import time
+from unittest import mock
+
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from backend import metrics
+from goals.models import Goal
+from goals.serializers import GoalSerializer
+
+from . import api_client, make_goal, make_user
+
+
+def route_stats(route="api/goals/$"):
+    return metrics.registry._routes[("GET", route)]
+
+
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.user = make_user()
+        make_goal(self.user)
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    def test_wsgi_request_counts_queries(self):
+        response = api_client(self.user).get("/api/goals/")
+
+        self.assertEqual(response.status_code, 200)
+        stats = route_stats()
+        self.assertEqual(stats.count, 1)
+        self.assertGreater(stats.queries, 0)
+        self.assertGreater(stats.phases["db"], 0)
+
+    async def test_asgi_request_counts_queries(self):
+        # the ORM runs in a sync_to_async thread, not the middleware's
+        response = await AsyncClient().get(
+            "/api/goals/", headers={"Authorization": f"Bearer {self.token}"}
+        )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        stats = route_stats()
+        self.assertEqual(stats.count, 1)
+        self.assertGreater(stats.queries, 0)
+        self.assertGreater(stats.phases["db"], 0)
+
+    def test_queries_outside_a_request_are_not_counted(self):
+        api_client(self.user).get("/api/goals/")
+        before = route_stats().queries
+        make_goal(self.user, title="Another")
+        self.assertEqual(route_stats().queries, before)
+
+    def test_prometheus_output(self):
+        api_client(self.user).get("/api/goals/")
+        text = metrics.registry.render_prometheus()
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="api/goals/$"} 1', text)
+        self.assertIn('http_requests_total{method="GET",route="api/goals/$",status="2xx"} 1', text)
+
+    def test_render_phase_is_recorded(self):
+        api_client(self.user).get("/api/goals/")
+        self.assertGreater(route_stats().phases["render"], 0)
+
+    def test_serializer_data_is_its_own_phase(self):
+        goal = Goal.objects.get()
+        real = GoalSerializer.to_representation
+
+        def slow(serializer, instance):
+            time.sleep(0.05)
+            return real(serializer, instance)
+
+        with mock.patch.object(GoalSerializer, "to_representation", slow), \
+                mock.patch.object(metrics, "SERVER_TIMING", True):
+            response = api_client(self.user).get(f"/api/goals/{goal.id}/")
+            # many=True lists are timed too
+            with override_settings(LIST_FAST_PATH=False):
+                api_client(self.user).get("/api/goals/")
+
+        phases = route_stats("api/goals/(?P<pk>[^/.]+)/$").phases
+        self.assertGreaterEqual(phases["serialize"], 0.05)
+        self.assertLess(phases["render"], 0.05)
+        self.assertIn("serialize;dur=", response["Server-Timing"])
+        self.assertGreaterEqual(route_stats().phases["serialize"], 0.05)
+
+    def test_fast_path_is_timed_as_serialize(self):
+        api_client(self.user).get("/api/goals/")
+        self.assertGreater(route_stats().phases["serialize"], 0)
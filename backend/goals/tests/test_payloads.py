@@ -0,0 +1,142 @@
+import gzip
+import io
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from backend import compression
+from backend.compression import CompressionMiddleware, choose_encoding
+from backend.fastjson import FastJSONParser, FastJSONRenderer, orjson
+from goals.models import Task
+
+from . import api_client, make_goal, make_user
+
+SAMPLE = {
+    "title": "Café ✓",
+    "n": 3,
+    "ratio": 0.25,
+    "none": None,
+    "flags": [True, False],
+    "when": datetime(2025, 1, 2, 3, 4, 5, 123456, tzinfo=dt_timezone.utc),
+    "naive": datetime(2025, 1, 2, 3, 4, 5),
+    "offset": datetime(2025, 1, 2, 3, 4, 5, tzinfo=dt_timezone(timedelta(hours=5, minutes=30))),
+    "day": date(2025, 1, 2),
+    "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "price": Decimal("9.90"),
+    "duration": timedelta(hours=1, seconds=3),
+    "lazy": gettext_lazy("Goals"),
+    "nested": {"list": [{"a": 1}], 2: "int key"},
+}
+
+
+class FastJSONTests(SimpleTestCase):
+    def setUp(self):
+        if orjson is None:
+            self.skipTest("orjson is not installed")
+
+    def test_byte_identical_to_drf(self):
+        self.assertEqual(FastJSONRenderer().render(SAMPLE), JSONRenderer().render(SAMPLE))
+
+    def test_indent_requests_go_to_drf(self):
+        rendered = FastJSONRenderer().render({"a": 1}, "application/json; indent=2")
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
+
+    def test_json_backend_setting(self):
+        with override_settings(JSON_BACKEND="json"), mock.patch("backend.fastjson.dumps") as dumps:
+            FastJSONRenderer().render({"a": 1})
+        dumps.assert_not_called()
+
+    def test_parser(self):
+        body = '{"title": "Café", "n": [1, 2]}'.encode()
+        parsed = FastJSONParser().parse(io.BytesIO(body))
+        self.assertEqual(parsed, JSONParser().parse(io.BytesIO(body)))
+
+        latin1 = FastJSONParser().parse(io.BytesIO('"Café"'.encode("latin-1")), parser_context={"encoding": "latin-1"})
+        self.assertEqual(latin1, "Café")
+
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b"{nope"))
+
+
+class CompressionTests(SimpleTestCase):
+    def respond(self, response, accept="gzip, br"):
+        request = RequestFactory().get("/api/goals/", headers={"accept-encoding": accept})
+        return CompressionMiddleware(lambda r: response)(request)
+
+    def big_json(self, **headers):
+        response = HttpResponse(b'{"tasks": [' + b'{"title": "Read a book"},' * 200 + b"{}]}",
+                                content_type="application/json")
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding("gzip"), "gzip")
+        self.assertEqual(choose_encoding("gzip;q=0.5, br;q=0.1"), "gzip")
+        self.assertIsNone(choose_encoding("identity"))
+        self.assertIsNone(choose_encoding("gzip;q=0, *;q=0"))
+        self.assertIsNone(choose_encoding(""))
+        if compression.brotli is not None:
+            self.assertEqual(choose_encoding("gzip, br"), "br")
+            self.assertEqual(choose_encoding("*"), "br")
+
+    def test_gzip_round_trip_with_weak_etag(self):
+        original = self.big_json(ETag='"abc"')
+        body = original.content
+
+        response = self.respond(original, accept="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), body)
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+        self.assertEqual(response["ETag"], 'W/"abc"')
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_brotli(self):
+        if compression.brotli is None:
+            self.skipTest("brotli is not installed")
+        response = self.respond(self.big_json())
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(compression.brotli.decompress(response.content), self.big_json().content)
+
+    def test_left_alone(self):
+        small = self.respond(HttpResponse(b"{}", content_type="application/json"))
+        self.assertFalse(small.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", small["Vary"])
+
+        image = self.respond(HttpResponse(b"x" * 5000, content_type="image/png"))
+        self.assertFalse(image.has_header("Content-Encoding"))
+
+        stream = self.respond(StreamingHttpResponse(iter([b"x" * 5000]), content_type="text/plain"))
+        self.assertFalse(stream.has_header("Content-Encoding"))
+
+        refused = self.respond(self.big_json(), accept="identity")
+        self.assertFalse(refused.has_header("Content-Encoding"))
+
+    def test_disabled(self):
+        with mock.patch.object(compression, "ENABLED", False):
+            response = self.respond(self.big_json(), accept="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+
+class PayloadApiTests(TestCase):
+    def test_api_list_is_compressed_end_to_end(self):
+        user = make_user()
+        goal = make_goal(user)
+        Task.objects.bulk_create(Task(goal=goal, title=f"Task number {i}") for i in range(100))
+        client = api_client(user)
+
+        plain = client.get("/api/tasks/")
+        packed = client.get("/api/tasks/", headers={"Accept-Encoding": "gzip"})
+
+        self.assertEqual(packed["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(packed.content), plain.content)
+        self.assertLess(len(packed.content), len(plain.content) // 3)
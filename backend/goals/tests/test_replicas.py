@@ -0,0 +1,131 @@
+"""
+Routing decisions run everywhere (with the replica map patched); the
+end-to-end tests need DB_REPLICAS set (replicas mirror their primary in
+tests):
+
+    DB_REPLICAS=1 python manage.py test goals.tests.test_replicas
+"""
+import unittest
+from collections import Counter
+from contextlib import ExitStack
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import RequestFactory, TransactionTestCase
+
+from goals import replicas
+from goals.models import Task
+
+from . import api_client, make_goal, make_user
+
+REPLICA = "default_replica_0"
+
+
+# TransactionTestCase: inside TestCase's transaction every read stays on
+# the primary, as it should.
+class ReplicaRoutingTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        for name, value in (
+            ("REPLICAS", {"default": (REPLICA,)}),
+            ("PRIMARY", {REPLICA: "default"}),
+        ):
+            patcher = mock.patch.object(replicas, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+
+    def run_request(self, method, view, user_id=7):
+        """Route `view()` the way a request by `user_id` would be; returns its result."""
+        result = []
+
+        def get_response(request):
+            replicas.select_user(user_id)
+            result.append(view())
+
+        replicas.ReplicaMiddleware(get_response)(self.factory.generic(method, "/"))
+        return result[0]
+
+    def test_safe_request_reads_a_replica(self):
+        self.assertEqual(self.run_request("GET", lambda: replicas.for_read("default")), REPLICA)
+        self.assertFalse(replicas.is_pinned(7))
+
+    def test_unsafe_request_stays_on_primary_and_pins(self):
+        self.assertEqual(self.run_request("POST", lambda: replicas.for_read("default")), "default")
+        self.assertTrue(replicas.is_pinned(7))
+
+        # read-your-writes: the next GET reads the primary
+        self.assertEqual(self.run_request("GET", lambda: replicas.for_read("default")), "default")
+        # other users are unaffected
+        self.assertEqual(self.run_request("GET", lambda: replicas.for_read("default"), user_id=8), REPLICA)
+
+    def test_write_inside_a_get_moves_the_rest_to_primary(self):
+        def view():
+            before = replicas.for_read("default")
+            self.assertEqual(replicas.for_write("default"), "default")
+            return before, replicas.for_read("default")
+
+        self.assertEqual(self.run_request("GET", view), (REPLICA, "default"))
+        self.assertTrue(replicas.is_pinned(7))
+
+    def test_reads_in_a_transaction_stay_on_primary(self):
+        def view():
+            with transaction.atomic():
+                return replicas.for_read("default")
+
+        self.assertEqual(self.run_request("GET", view), "default")
+
+    def test_no_request_means_primary(self):
+        # management commands, background jobs, authentication
+        self.assertEqual(replicas.for_read("default"), "default")
+
+    def test_replica_writes_go_to_the_primary(self):
+        self.assertEqual(replicas.primary_of(REPLICA), "default")
+        router = replicas.ReplicaRouter()
+        self.assertFalse(router.allow_migrate(REPLICA, "goals"))
+        self.assertTrue(router.allow_migrate("default", "goals"))
+
+
+@unittest.skipUnless(replicas.enabled(), "set DB_REPLICAS to run against replica databases")
+class ReplicaRequestTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.client = api_client(self.user)
+        self.task = Task.objects.create(goal=make_goal(self.user), title="Stretch")
+
+    def queries_by_alias(self, send):
+        queries = Counter()
+
+        def count(alias):
+            def wrapper(execute, sql, params, many, context):
+                queries[alias] += 1
+                return execute(sql, params, many, context)
+            return wrapper
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(count(alias)))
+            response = send()
+        return response, queries
+
+    def replica_queries(self, queries):
+        return sum(n for alias, n in queries.items() if alias in replicas.PRIMARY)
+
+    def test_reads_use_a_replica_until_the_user_writes(self):
+        response, queries = self.queries_by_alias(lambda: self.client.get("/api/tasks/"))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(self.replica_queries(queries), 0)
+
+        response, queries = self.queries_by_alias(
+            lambda: self.client.patch(f"/api/tasks/{self.task.id}/", {"title": "Stretch daily"}, format="json")
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.replica_queries(queries), 0)
+
+        response, queries = self.queries_by_alias(lambda: self.client.get(f"/api/tasks/{self.task.id}/"))
+        self.assertEqual(response.json()["title"], "Stretch daily")
+        self.assertEqual(self.replica_queries(queries), 0)
@@ -0,0 +1,88 @@
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from goals import revocation
+from goals.models import RevokedToken
+
+from . import make_user
+
+
+class RefreshRotationTests(TestCase):
+    def setUp(self):
+        revocation.store.reset()
+        make_user("alice", "pass-1234-word")
+        self.client = APIClient()
+        response = self.client.post(
+            "/api/token/", {"username": "alice", "password": "pass-1234-word"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.refresh = response.json()["refresh"]
+
+    def refresh_with(self, token):
+        return self.client.post("/api/token/refresh/", {"refresh": token}, format="json")
+
+    def test_refresh_rotates_and_revokes_the_old_token(self):
+        response = self.refresh_with(self.refresh)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data["refresh"], self.refresh)
+        self.assertEqual(RevokedToken.objects.count(), 1)
+        self.assertEqual(self.refresh_with(response.data["refresh"]).status_code, 200)
+
+    def test_replayed_refresh_token_is_rejected(self):
+        self.assertEqual(self.refresh_with(self.refresh).status_code, 200)
+
+        self.assertEqual(self.refresh_with(self.refresh).status_code, 401)
+
+    def test_revocation_by_another_process_is_picked_up(self):
+        token = RefreshToken(self.refresh)
+        self.assertFalse(revocation.store.is_revoked(token["jti"]))  # filter built now
+        # a row written by some other worker, not through this store
+        RevokedToken.objects.create(jti=uuid.UUID(token["jti"]), expires_at=revocation.expiry_of(token))
+
+        # until the next sync this process's filter hasn't seen it
+        self.assertFalse(revocation.store.is_revoked(token["jti"]))
+        with mock.patch.object(revocation, "SYNC_INTERVAL", 0):
+            self.assertTrue(revocation.store.is_revoked(token["jti"]))
+        self.assertEqual(self.refresh_with(self.refresh).status_code, 401)
+
+
+class RevocationStoreTests(TestCase):
+    def setUp(self):
+        revocation.store.reset()
+
+    def test_revoke_wins_once(self):
+        jti, expires = uuid.uuid4(), timezone.now() + timedelta(days=1)
+
+        self.assertTrue(revocation.store.revoke(jti, expires))
+        self.assertFalse(revocation.store.revoke(jti, expires))
+        self.assertTrue(revocation.store.is_revoked(jti))
+        self.assertFalse(revocation.store.is_revoked(uuid.uuid4()))
+
+    def test_purge_expired_keeps_live_tokens(self):
+        now = timezone.now()
+        live = RevokedToken.objects.create(jti=uuid.uuid4(), expires_at=now + timedelta(days=1))
+        for _ in range(5):
+            RevokedToken.objects.create(jti=uuid.uuid4(), expires_at=now - timedelta(days=2))
+
+        self.assertEqual(revocation.purge_expired(batch_size=2), 5)
+        self.assertEqual(list(RevokedToken.objects.values_list("id", flat=True)), [live.id])
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives(self):
+        bloom = revocation.BloomFilter(2000)
+        keys = [uuid.uuid4() for _ in range(2000)]
+        for key in keys:
+            bloom.add(key)
+
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(uuid.uuid4() in bloom for _ in range(5000))
+        self.assertLess(false_positives, 50)
+        self.assertFalse(bloom.full)
@@ -0,0 +1,142 @@
+from datetime import date, datetime, timezone as dt_timezone
+from importlib import import_module
+from unittest import mock
+
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from goals import purge, rollups
+from goals.models import Goal, Habit, HabitCompletion, Task, UserDailyStats, UserProfile, UserWeeklyStats
+
+from . import api_client, make_goal, make_user
+
+# 23:30 UTC on Jan 5 is already Jan 6 in Tokyo (UTC+9)
+LATE = datetime(2025, 1, 5, 23, 30, tzinfo=dt_timezone.utc)
+
+
+def daily(user):
+    return {
+        row.period_start: {field: getattr(row, field) for field in rollups.FIELDS if getattr(row, field)}
+        for row in UserDailyStats.objects.filter(user=user)
+        if any(getattr(row, field) for field in rollups.FIELDS)
+    }
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.goal = make_goal(self.user)
+
+    def set_timezone(self, name):
+        UserProfile.objects.filter(user=self.user).update(timezone=name)
+
+    def create_done_task(self):
+        with mock.patch("django.utils.timezone.now", return_value=LATE):
+            return Task.objects.create(goal=self.goal, title="Late night", completed=True)
+
+    def test_days_follow_the_owners_timezone(self):
+        self.set_timezone("Asia/Tokyo")
+        self.create_done_task()
+
+        self.assertEqual(daily(self.user), {date(2025, 1, 6): {"tasks_created": 1, "tasks_completed": 1}})
+
+    def test_utc_without_a_profile_timezone(self):
+        self.create_done_task()
+
+        self.assertEqual(daily(self.user), {date(2025, 1, 5): {"tasks_created": 1, "tasks_completed": 1}})
+
+    def test_rebuild_matches_incremental_counts(self):
+        self.set_timezone("Asia/Tokyo")
+        task = self.create_done_task()
+        task.completed = False
+        task.save()
+        self.create_done_task()
+        incremental = daily(self.user)
+        weekly = list(UserWeeklyStats.objects.filter(user=self.user).values_list("period_start", "tasks_created"))
+
+        rollups.rebuild([self.user.pk])
+
+        self.assertEqual(daily(self.user), incremental)
+        self.assertEqual(
+            list(UserWeeklyStats.objects.filter(user=self.user).values_list("period_start", "tasks_created")),
+            weekly,
+        )
+
+    def test_timezone_change_rebuckets(self):
+        self.create_done_task()
+        profile = UserProfile.objects.get(user=self.user)
+
+        response = api_client(self.user).patch(
+            f"/api/profile/{profile.pk}/", {"timezone": "Asia/Tokyo"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(list(daily(self.user)), [date(2025, 1, 6)])
+
+    def test_soft_deleted_goal_is_not_counted_again(self):
+        task = self.create_done_task()
+        purge.soft_delete_goal(self.goal)
+        self.assertEqual(daily(self.user), {})
+
+        # a late write to the hidden goal's task doesn't bump a None user
+        task.completed = False
+        task.save()
+        task.delete()
+        self.assertEqual(daily(self.user), {})
+
+    def test_stats_endpoint(self):
+        self.create_done_task()
+        response = api_client(self.user).get("/api/stats/", {"since": "2025-01-01", "until": "2025-01-31"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(r["period_start"], r["tasks_completed"]) for r in response.data["results"]], [("2025-01-05", 1)]
+        )
+        self.assertEqual(api_client(self.user).get("/api/stats/", {"period": "year"}).status_code, 400)
+
+    def test_checkins_of_a_soft_deleted_goals_habit_are_not_counted(self):
+        habit = Habit.objects.create(user=self.user, goal=self.goal, title="Stretch")
+        HabitCompletion.objects.create(habit=habit, date=date(2025, 1, 5))
+        purge.soft_delete_goal(self.goal)
+        self.assertEqual(daily(self.user), {})
+
+        HabitCompletion.objects.create(habit=habit, date=date(2025, 1, 6))
+        self.assertEqual(daily(self.user), {})
+
+    def test_rebuild_skips_soft_deleted_goals(self):
+        self.create_done_task()
+        purge.soft_delete_goal(self.goal)
+
+        rollups.rebuild([self.user.pk])
+
+        self.assertEqual(daily(self.user), {})
+
+
+class CompletedAtBackfillTests(TestCase):
+    """0018 dates the goals completed before 0010 added completed_at."""
+
+    def test_backfill(self):
+        user = make_user()
+        with_tasks = make_goal(user, title="With tasks")
+        Task.objects.create(goal=with_tasks, title="Early", completed=True, completed_at=LATE)
+        last = datetime(2025, 2, 1, tzinfo=dt_timezone.utc)
+        Task.objects.create(goal=with_tasks, title="Last", completed=True, completed_at=last)
+        make_goal(user, title="Ended", end_date=date(2025, 3, 1))
+        make_goal(user, title="Ongoing", end_date=date(2999, 1, 1))
+        dated = make_goal(user, title="Dated")
+        open_ = make_goal(user, title="Open")
+        Goal.objects.exclude(pk=open_.pk).update(is_completed=True, completed_at=None)
+        Goal.objects.filter(pk=dated.pk).update(completed_at=LATE)
+
+        migration = import_module("goals.migrations.0018_backfill_goal_completed_at")
+        before = timezone.now()
+        migration.backfill_completed_at(apps, mock.Mock(connection=connection))
+
+        completed_at = dict(Goal.objects.values_list("title", "completed_at"))
+        self.assertEqual(completed_at["With tasks"], last)
+        self.assertEqual(completed_at["Ended"], datetime(2025, 3, 1, 12, tzinfo=dt_timezone.utc))
+        self.assertGreaterEqual(completed_at["Ongoing"], before)
+        self.assertEqual(completed_at["Dated"], LATE)
+        self.assertIsNone(completed_at["Open"])
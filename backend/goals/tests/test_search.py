@@ -0,0 +1,131 @@
+from importlib import import_module
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from goals import purge, search
+from goals.models import Habit, Task
+
+from . import api_client, make_goal, make_user
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = api_client(self.user)
+        self.goal = make_goal(self.user, title="Marathon training", description="Build up to 42 km by autumn")
+
+    def find(self, q, **params):
+        response = self.client.get("/api/search/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return [(r["type"], r["id"]) for r in response.data["results"]]
+
+    def test_finds_goals_tasks_and_habits_by_prefix(self):
+        task = Task.objects.create(goal=self.goal, title="Buy marathon shoes")
+        habit = Habit.objects.create(user=self.user, goal=self.goal, title="Morning marathon run")
+
+        found = self.find("marath")
+
+        self.assertEqual(set(found), {("goal", self.goal.id), ("task", task.id), ("habit", habit.id)})
+        # title matches outrank the description-only one
+        self.assertEqual(self.find("autumn"), [("goal", self.goal.id)])
+        self.assertEqual(self.find("marathon", type="task"), [("task", task.id)])
+
+    def test_index_follows_edits_and_deletes(self):
+        task = Task.objects.create(goal=self.goal, title="Book physio")
+        task.title = "Book massage"
+        task.save()
+
+        self.assertEqual(self.find("physio"), [])
+        self.assertEqual(self.find("massage"), [("task", task.id)])
+
+        task.delete()
+        self.assertEqual(self.find("massage"), [])
+
+    def test_moved_task_follows_its_goal(self):
+        task = Task.objects.create(goal=self.goal, title="Buy gels")
+        other = make_goal(self.user, title="Cycling")
+
+        response = self.client.patch(f"/api/tasks/{task.id}/", {"goal": other.id}, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+
+        # deleting the old goal leaves the moved task searchable...
+        self.assertEqual(self.client.delete(f"/api/goals/{self.goal.id}/").status_code, 204)
+        purge.purge_goal(self.goal.id)
+        self.assertEqual(self.find("gels"), [("task", task.id)])
+
+        # ...and deleting the new one takes it out
+        self.assertEqual(self.client.delete(f"/api/goals/{other.id}/").status_code, 204)
+        purge.purge_goal(other.id)
+        self.assertFalse(Task.objects.filter(pk=task.pk).exists())
+        self.assertEqual(self.find("gels"), [])
+
+    def test_other_users_rows_are_never_returned(self):
+        make_goal(make_user("bob"), title="Marathon in Berlin")
+
+        self.assertEqual(self.find("marathon"), [("goal", self.goal.id)])
+
+    def test_fts_operators_in_the_query_are_plain_text(self):
+        self.assertEqual(self.find('marathon OR "x" NOT *'), [])
+        self.assertEqual(self.find("training)"), [("goal", self.goal.id)])
+
+    def test_progress_and_completion_saves_skip_the_index(self):
+        task = Task.objects.create(goal=self.goal, title="Long run")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(f"/api/tasks/{task.id}/", {"completed": True}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in queries if search.TABLE in q["sql"]])
+        self.assertEqual(self.find("long"), [("task", task.id)])
+
+    def test_paging_and_validation(self):
+        for i in range(3):
+            Task.objects.create(goal=self.goal, title=f"Interval session {i}")
+
+        first = self.client.get("/api/search/", {"q": "interval", "limit": 2}).data
+        second = self.client.get("/api/search/", {"q": "interval", "limit": 2, "offset": 2}).data
+
+        self.assertEqual((len(first["results"]), first["next_offset"]), (2, 2))
+        self.assertEqual((len(second["results"]), second["next_offset"]), (1, None))
+        self.assertEqual(self.client.get("/api/search/").status_code, 400)
+        self.assertEqual(self.client.get("/api/search/", {"q": "x", "type": "note"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/search/", {"q": "x", "limit": "ten"}).status_code, 400)
+
+
+class SearchMigrationTests(TestCase):
+    """The migrations' frozen SQL builds the same rows as search.rebuild()."""
+
+    def setUp(self):
+        self.user = make_user()
+        goal = make_goal(self.user, title="Marathon training", description="Build up slowly")
+        Task.objects.create(goal=goal, title="Buy marathon shoes")
+        Habit.objects.create(user=self.user, goal=goal, title="Morning run")
+        gone = make_goal(self.user, title="Deleted marathon")
+        Task.objects.create(goal=gone, title="Deleted marathon task")
+        gone.deleted_at = timezone.now()
+        gone.save(update_fields=["deleted_at"])
+
+    def rows(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT rowid, kind, object_id, goal_id, owner, title, body FROM {search.TABLE} ORDER BY rowid")
+            return cursor.fetchall()
+
+    def run_sql(self, statements):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search.TABLE}")
+            for sql in statements:
+                cursor.execute(sql)
+        return self.rows()
+
+    def test_rebuild_migration_matches_rebuild(self):
+        migration = import_module("goals.migrations.0017_search_index_per_database")
+        search.rebuild()
+        self.assertEqual(self.run_sql(migration.REBUILD), self.rows())
+
+    def test_initial_backfill_indexes_every_row(self):
+        migration = import_module("goals.migrations.0012_search_index")
+        # 0012 predates soft deletes, so the deleted goal is in there too
+        self.assertEqual(len(self.run_sql(migration.BACKFILL)), 5)
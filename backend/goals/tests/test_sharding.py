@@ -0,0 +1,170 @@
+"""
+Router decisions run everywhere (with SHARDS patched); the tests against
+real shard databases need DB_SHARDS set:
+
+    DB_SHARDS=2 python manage.py test goals.tests.test_sharding
+"""
+import unittest
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase, TransactionTestCase
+
+from goals import sharding
+from goals.models import Goal, RevokedToken, Task, UserProfile, UserShard
+
+from . import api_client, make_user
+
+SHARDS = ("shard_0", "shard_1")
+
+
+class RouterTests(TestCase):
+    # with DB_SHARDS set, creating a user writes its profile to a shard
+    databases = "__all__"
+
+    def setUp(self):
+        patcher = mock.patch.object(sharding, "SHARDS", SHARDS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(sharding.forget)
+        sharding.forget()
+        self.router = sharding.UserShardRouter()
+
+    def test_users_are_assigned_by_id_and_remembered(self):
+        user = make_user()
+        expected = SHARDS[user.pk % 2]
+        # the post_save signal put the new user on its default shard
+        self.assertEqual(UserShard.objects.get(user=user).alias, expected)
+
+        other = next(alias for alias in SHARDS if alias != expected)
+        sharding.assign_user(user.pk, other)
+        sharding.forget()
+        self.assertEqual(sharding.shard_for_user(user.pk), other)
+
+    def test_user_without_entry_gets_the_default_shard(self):
+        user = make_user()
+        UserShard.objects.filter(user=user).delete()
+        sharding.forget()
+
+        self.assertEqual(sharding.shard_for_user(user.pk), SHARDS[user.pk % 2])
+        self.assertTrue(UserShard.objects.filter(user=user).exists())
+
+    def test_global_models_stay_in_default(self):
+        for model in (User, RevokedToken, UserShard):
+            self.assertEqual(self.router.db_for_read(model), "default")
+            self.assertEqual(self.router.db_for_write(model), "default")
+
+    def test_per_user_rows_follow_their_user(self):
+        user = make_user()
+        sharding.assign_user(user.pk, "shard_1")
+
+        # user.goals / user.profile
+        self.assertEqual(self.router.db_for_read(Goal, instance=user), "shard_1")
+        # a new goal, routed by its user_id
+        self.assertEqual(self.router.db_for_write(Goal, instance=Goal(user_id=user.pk)), "shard_1")
+        # a loaded row stays on the database it came from
+        task = Task()
+        task._state.db = "shard_0"
+        self.assertEqual(self.router.db_for_write(Task, instance=task), "shard_0")
+
+    def test_unrouted_query_raises_instead_of_reading_default(self):
+        with self.assertRaises(sharding.ShardNotSelected):
+            self.router.db_for_read(Task)
+
+        with sharding.use_shard("shard_1"):
+            self.assertEqual(self.router.db_for_read(Task), "shard_1")
+        self.assertIsNone(sharding.current())
+
+    def test_each_shard_selects_every_shard(self):
+        self.assertEqual([sharding.current() for _ in sharding.each_shard()], list(SHARDS))
+
+    def test_allow_migrate(self):
+        self.assertTrue(self.router.allow_migrate("shard_0", "goals", "task"))
+        self.assertFalse(self.router.allow_migrate("shard_0", "goals", "revokedtoken"))
+        self.assertFalse(self.router.allow_migrate("shard_0", "auth", "user"))
+        self.assertTrue(self.router.allow_migrate("default", "auth", "user"))
+
+    def test_allow_relation_only_within_a_database(self):
+        a, b = Goal(), Task()
+        a._state.db, b._state.db = "shard_0", "shard_1"
+        self.assertFalse(self.router.allow_relation(a, b))
+        b._state.db = "shard_0"
+        self.assertTrue(self.router.allow_relation(a, b))
+        self.assertTrue(self.router.allow_relation(User(), b))
+
+    def test_middleware_clears_the_selection(self):
+        user = make_user()
+        seen = []
+
+        def view(request):
+            sharding.select_user(user.pk)
+            seen.append(sharding.current())
+
+        sharding.ShardMiddleware(view)(RequestFactory().get("/"))
+
+        self.assertEqual(seen, [SHARDS[user.pk % 2]])
+        self.assertIsNone(sharding.current())
+
+
+@unittest.skipUnless(sharding.enabled(), "set DB_SHARDS to run against shard databases")
+class ShardedDatabaseTests(TransactionTestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        sharding.forget()
+
+    def rows(self, model, alias, **lookup):
+        return model.objects.using(alias).filter(**lookup).count()
+
+    def test_api_writes_land_on_the_users_shard(self):
+        users = [make_user(f"user{i}") for i in range(len(sharding.SHARDS))]
+        for user in users:
+            response = api_client(user).post(
+                "/api/goals/",
+                {"title": f"Goal of {user.username}", "start_date": "2025-01-01", "end_date": "2025-12-31"},
+                format="json",
+            )
+            self.assertEqual(response.status_code, 201, response.data)
+
+        for user in users:
+            alias = sharding.shard_for_user(user.pk)
+            self.assertEqual(self.rows(Goal, alias, user_id=user.pk), 1)
+            self.assertEqual(self.rows(UserProfile, alias, user_id=user.pk), 1)
+            self.assertEqual(self.rows(Goal, "default", user_id=user.pk), 0)
+        # users are spread over the shards
+        self.assertEqual({sharding.shard_for_user(u.pk) for u in users}, set(sharding.SHARDS))
+
+    def test_ids_repeat_across_shards_without_leaking(self):
+        alice, bob = make_user("alice"), make_user("bob")
+        sharding.assign_user(bob.pk, next(a for a in sharding.SHARDS if a != sharding.shard_for_user(alice.pk)))
+        goal_ids = []
+        for user in (alice, bob):
+            response = api_client(user).post(
+                "/api/goals/", {"title": "Mine", "start_date": "2025-01-01", "end_date": "2025-12-31"}, format="json"
+            )
+            goal_ids.append(response.data["id"])
+
+        # first goal on each shard file
+        self.assertEqual(goal_ids[0], goal_ids[1])
+        listed = api_client(bob).get("/api/goals/").json()
+        self.assertEqual([g["user"] for g in listed], [bob.pk])
+
+    def test_move_user_copies_rows_and_clears_the_source(self):
+        from goals.management.commands.rebalance_shards import move_user
+
+        user = make_user()
+        src = sharding.shard_for_user(user.pk)
+        dst = next(alias for alias in sharding.SHARDS if alias != src)
+        client = api_client(user)
+        goal_id = client.post(
+            "/api/goals/", {"title": "Moving", "start_date": "2025-01-01", "end_date": "2025-12-31"}, format="json"
+        ).data["id"]
+        client.post("/api/tasks/", {"goal": goal_id, "title": "Pack boxes"}, format="json")
+
+        move_user(user.pk, src, dst)
+
+        self.assertEqual(sharding.shard_for_user(user.pk), dst)
+        self.assertEqual(self.rows(Task, dst, goal__user_id=user.pk), 1)
+        self.assertEqual(self.rows(Goal, src, user_id=user.pk), 0)
+        tasks = api_client(user).get("/api/tasks/").json()
+        self.assertEqual([t["title"] for t in tasks], ["Pack boxes"])
@@ -0,0 +1,83 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from goals import purge
+from goals.models import Goal, Habit, HabitCompletion, Task, UserProfile
+
+from . import api_client, make_goal, make_user
+
+
+class SoftDeleteGoalTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = api_client(self.user)
+        self.kept = make_goal(self.user, title="Kept")
+        self.keep_task = Task.objects.create(goal=self.kept, title="Kept task")
+        self.goal = make_goal(self.user, title="Gone")
+        self.task = Task.objects.create(goal=self.goal, title="Gone task")
+        self.habit = Habit.objects.create(user=self.user, goal=self.goal, title="Gone habit")
+        HabitCompletion.objects.create(habit=self.habit, date=date(2025, 3, 1))
+
+    def delete_goal(self):
+        # inside TestCase the purge (an on_commit callback) never runs
+        response = self.client.delete(f"/api/goals/{self.goal.pk}/")
+        self.assertEqual(response.status_code, 204)
+
+    def test_goal_and_children_are_hidden_at_once(self):
+        self.delete_goal()
+
+        self.assertEqual([g["id"] for g in self.client.get("/api/goals/").data], [self.kept.pk])
+        self.assertEqual([t["id"] for t in self.client.get("/api/tasks/").data], [self.keep_task.pk])
+        self.assertEqual(self.client.get("/api/habits/").data, [])
+        self.assertEqual(self.client.get(f"/api/tasks/{self.task.pk}/").status_code, 404)
+        self.assertEqual(self.client.get(f"/api/habits/{self.habit.pk}/").status_code, 404)
+        self.assertEqual(self.client.get("/api/search/", {"q": "gone"}).data["results"], [])
+        # still there until the purge
+        self.assertTrue(Task.objects.filter(pk=self.task.pk).exists())
+
+    def test_batch_cannot_touch_a_deleted_goals_task(self):
+        self.delete_goal()
+        response = self.client.post(
+            "/api/batch/",
+            {"operations": [{"op": "update", "model": "task", "id": self.task.pk, "data": {"title": "x"}}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 404, response.data)
+
+    def test_task_queries_do_not_join_goals(self):
+        with CaptureQueriesContext(connection) as ctx:
+            list(Task.objects.filter(pk=self.task.pk))
+            list(Habit.objects.filter(pk=self.habit.pk))
+        self.assertFalse(any("JOIN" in q["sql"] for q in ctx.captured_queries))
+
+    def test_purge_removes_everything_underneath(self):
+        self.delete_goal()
+        purge.purge_pending(pause=0)
+
+        self.assertFalse(Goal.all_objects.filter(pk=self.goal.pk).exists())
+        self.assertFalse(Task.objects.filter(goal_id=self.goal.pk).exists())
+        self.assertFalse(Habit.objects.filter(pk=self.habit.pk).exists())
+        self.assertFalse(HabitCompletion.objects.filter(habit_id=self.habit.pk).exists())
+        self.assertTrue(Task.objects.filter(pk=self.keep_task.pk).exists())
+
+
+class SoftDeleteUserTests(TestCase):
+    def test_account_is_unusable_at_once_and_purged_later(self):
+        user = make_user()
+        client = api_client(user)
+        make_goal(user)
+        UserProfile.objects.get_or_create(user=user)
+
+        self.assertEqual(client.delete("/api/profile/delete-account/").status_code, 204)
+        self.assertEqual(client.get("/api/goals/").status_code, 401)
+        # the username is free again
+        make_user()
+
+        with override_settings(PURGE_SYNC=True):
+            purge.purge_pending(pause=0)
+        self.assertFalse(User.objects.filter(pk=user.pk).exists())
+        self.assertFalse(Goal.all_objects.filter(user_id=user.pk).exists())
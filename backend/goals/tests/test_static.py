@@ -0,0 +1,120 @@
+import gzip
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from backend import settings as project_settings, views
+from backend.staticfiles import StaticFilesMiddleware
+
+HASHED = "main.0a1b2c3d.js"
+
+
+class TempDirMixin:
+    def make_dir(self):
+        path = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        return path
+
+
+class StaticFilesTests(TempDirMixin, SimpleTestCase):
+    def setUp(self):
+        root = self.make_dir()
+        body = b"console.log('hello');" * 50
+        (root / HASHED).write_bytes(body)
+        (root / f"{HASHED}.gz").write_bytes(gzip.compress(body))
+        (root / "robots.txt").write_text("User-agent: *\n")
+
+        self.passed_through = HttpResponse("api")
+        with override_settings(STATIC_ROOT=root, DEBUG=False):
+            self.sync = StaticFilesMiddleware(lambda request: self.passed_through)
+
+            async def get_response(request):
+                return self.passed_through
+            self.async_ = StaticFilesMiddleware(get_response)
+
+    def get(self, path, **headers):
+        return RequestFactory().get(path, headers=headers)
+
+    def test_hashed_files_are_immutable_and_compressed(self):
+        response = self.sync(self.get(f"/static/{HASHED}", accept_encoding="gzip"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("max-age=315360000", response["Cache-Control"])
+
+    def test_unhashed_files_get_the_short_max_age(self):
+        response = self.sync(self.get("/static/robots.txt"))
+
+        self.assertEqual(response["Cache-Control"], "max-age=3600, public")
+
+    def test_async_stack(self):
+        self.assertTrue(self.async_.is_async)
+
+        response = async_to_sync(self.async_)(self.get(f"/static/{HASHED}"))
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIs(async_to_sync(self.async_)(self.get("/api/goals/")), self.passed_through)
+
+    def test_immutable_file_test(self):
+        immutable = project_settings._immutable_static_file
+        self.assertTrue(immutable("", "/static/js/main.0a1b2c3d.js"))
+        self.assertTrue(immutable("", "/static/admin/css/base.5af66c1b1797.css"))
+        self.assertFalse(immutable("", "/static/robots.txt"))
+        self.assertFalse(immutable("", "/static/logo.abc.png"))
+
+
+class SpaIndexTests(TempDirMixin, SimpleTestCase):
+    def setUp(self):
+        self.index = self.make_dir() / "index.html"
+        self.index.write_text("<div id=root></div>")
+        patcher = mock.patch.object(views, "INDEX_PATH", self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        views._index_cache.clear()
+        self.addCleanup(views._index_cache.clear)
+
+    def test_served_with_etag_and_revalidated(self):
+        response = self.client.get("/goals/42")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"<div id=root></div>")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+
+        again = self.client.get("/", headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], response["ETag"])
+
+    def test_compressed_index_still_revalidates(self):
+        self.index.write_text("<div id=root></div>" + "<script>/* app */</script>" * 100)
+        first = self.client.get("/", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(first["Content-Encoding"], "gzip")
+        self.assertTrue(first["ETag"].startswith("W/"))
+
+        again = self.client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": first["ETag"]})
+        self.assertEqual(again.status_code, 304)
+        # a list of tags, one of them ours
+        listed = self.client.get("/", headers={"If-None-Match": f'"other", {first["ETag"]}'})
+        self.assertEqual(listed.status_code, 304)
+        self.assertEqual(self.client.get("/", headers={"If-None-Match": '"other"'}).status_code, 200)
+
+    def test_cached_outside_debug(self):
+        first = self.client.get("/")["ETag"]
+        self.index.write_text("<div id=app></div>")
+        os.utime(self.index, ns=(1, 1))
+
+        self.assertEqual(self.client.get("/")["ETag"], first)
+        with override_settings(DEBUG=True):
+            response = self.client.get("/")
+        self.assertNotEqual(response["ETag"], first)
+        self.assertEqual(response.content, b"<div id=app></div>")
+
+    def test_missing_build_and_unsafe_methods(self):
+        self.assertEqual(self.client.post("/").status_code, 405)
+        self.index.unlink()
+        self.assertEqual(self.client.get("/").status_code, 404)
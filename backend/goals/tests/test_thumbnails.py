@@ -0,0 +1,90 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from goals import thumbnails
+from goals.models import UserProfile
+
+from . import api_client, make_user
+
+
+def png(width=400, height=300, color="teal"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, "PNG")
+    return SimpleUploadedFile("me.png", buffer.getvalue(), content_type="image/png")
+
+
+@mock.patch.object(thumbnails, "THUMBNAILS_SYNC", True)
+class AvatarThumbnailTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        media_root = override_settings(MEDIA_ROOT=self.media)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+        self.user = make_user()
+        self.profile = UserProfile.objects.get(user=self.user)
+
+    def upload(self, image):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.avatar = image
+            self.profile.save()
+        self.profile.refresh_from_db()
+
+    def test_thumbnails_for_every_size(self):
+        self.upload(png())
+
+        fmt = thumbnails.thumbnail_format()
+        self.assertEqual(self.profile.avatar_thumbnails["source"], self.profile.avatar.name)
+        storage = self.profile.avatar.storage
+        for size in thumbnails.THUMBNAIL_SIZES:
+            with storage.open(self.profile.avatar_thumbnails[str(size)]) as f:
+                image = Image.open(f)
+                self.assertEqual(image.size, (size, size))
+                self.assertEqual(image.format, fmt)
+
+    def test_api_urls_only_for_the_current_avatar(self):
+        client = api_client(self.user)
+        self.assertEqual(client.get("/api/profile/").data["avatar_thumbnails"], {})
+
+        self.upload(png())
+        urls = client.get("/api/profile/").data["avatar_thumbnails"]
+        self.assertEqual(set(urls), {str(size) for size in thumbnails.THUMBNAIL_SIZES})
+        self.assertTrue(all(url.startswith("http://testserver/media/") for url in urls.values()))
+
+        # a new avatar whose thumbnails are not ready yet
+        UserProfile.objects.filter(pk=self.profile.pk).update(avatar="avatars/other.png")
+        self.assertEqual(client.get("/api/profile/").data["avatar_thumbnails"], {})
+
+    def test_replacing_the_avatar_removes_old_thumbnails(self):
+        self.upload(png())
+        old = dict(self.profile.avatar_thumbnails)
+
+        self.upload(png(color="orange"))
+
+        storage = self.profile.avatar.storage
+        self.assertNotEqual(self.profile.avatar_thumbnails["source"], old["source"])
+        for size in thumbnails.THUMBNAIL_SIZES:
+            self.assertTrue(storage.exists(self.profile.avatar_thumbnails[str(size)]))
+            if old[str(size)] not in self.profile.avatar_thumbnails.values():
+                self.assertFalse(storage.exists(old[str(size)]))
+
+    def test_saving_without_a_new_avatar_does_not_requeue(self):
+        self.upload(png())
+
+        with mock.patch.object(thumbnails, "generate_avatar_thumbnails") as generate:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.profile.bio = "Runner"
+                self.profile.save()
+        generate.assert_not_called()
+
+    def test_unreadable_avatar_is_logged_not_raised(self):
+        with self.assertLogs("goals.thumbnails", "ERROR"):
+            self.upload(SimpleUploadedFile("broken.png", b"not an image"))
+        self.assertEqual(self.profile.avatar_thumbnails, {})
@@ -0,0 +1,131 @@
+"""
+Avatar thumbnails.
+
+When a profile gets a new avatar, a background worker resizes it into
+AVATAR_THUMBNAIL_SIZES square thumbnails (WebP when Pillow supports it,
+JPEG otherwise) and records their storage names on
+UserProfile.avatar_thumbnails, so the API can hand out small URLs without
+touching the filesystem on every read.
+"""
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+
+from . import sharding
+from .authentication import invalidate_cached_user
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZES = getattr(settings, "AVATAR_THUMBNAIL_SIZES", (32, 64, 256))
+THUMBNAIL_QUALITY = getattr(settings, "AVATAR_THUMBNAIL_QUALITY", 80)
+
+# run inline instead of on the worker pool (tests / management commands)
+THUMBNAILS_SYNC = getattr(settings, "AVATAR_THUMBNAILS_SYNC", False)
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="avatar-thumbs")
+
+
+# Pillow is imported inside the functions below: only the thumbnail
+# worker needs it, not every process boot (manage.py profile_startup)
+
+
+def thumbnail_format():
+    from PIL import features
+
+    requested = getattr(settings, "AVATAR_THUMBNAIL_FORMAT", "WEBP").upper()
+    if requested == "WEBP" and not features.check("webp"):
+        return "JPEG"
+    return requested
+
+
+def thumbnail_name(avatar_name, size, fmt):
+    path = PurePosixPath(avatar_name)
+    ext = "webp" if fmt == "WEBP" else "jpg"
+    return str(path.parent / "thumbs" / f"{path.stem}_{size}.{ext}")
+
+
+def render_thumbnail(image, size, fmt):
+    from PIL import Image, ImageOps
+
+    thumb = ImageOps.fit(image, (size, size), Image.LANCZOS)
+    if fmt == "JPEG" and thumb.mode not in ("RGB", "L"):
+        thumb = thumb.convert("RGB")
+
+    buffer = io.BytesIO()
+    thumb.save(buffer, fmt, quality=THUMBNAIL_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def delete_thumbnails(storage, thumbnails):
+    for size, name in (thumbnails or {}).items():
+        if size != "source" and name:
+            storage.delete(name)
+
+
+def generate_avatar_thumbnails(profile_id, using=sharding.DEFAULT):
+    from PIL import Image, ImageOps
+
+    from .models import UserProfile
+
+    try:
+        profile = UserProfile.objects.using(using).get(pk=profile_id)
+        avatar = profile.avatar
+        if not avatar:
+            return
+
+        storage = avatar.storage
+        fmt = thumbnail_format()
+
+        with avatar.open("rb") as f:
+            image = ImageOps.exif_transpose(Image.open(f))
+            image.load()
+
+        thumbnails = {"source": avatar.name}
+        for size in THUMBNAIL_SIZES:
+            name = thumbnail_name(avatar.name, size, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            thumbnails[str(size)] = storage.save(
+                name, ContentFile(render_thumbnail(image, size, fmt))
+            )
+
+        # only publish if the avatar hasn't changed again meanwhile;
+        # update() keeps the post_save signal from re-queueing us
+        updated = UserProfile.objects.using(using).filter(
+            pk=profile_id, avatar=avatar.name
+        ).update(avatar_thumbnails=thumbnails)
+
+        if updated:
+            # update() skips post_save, so drop the cached profile by hand
+            invalidate_cached_user(profile.user_id)
+            delete_thumbnails(
+                storage,
+                {k: v for k, v in profile.avatar_thumbnails.items()
+                 if v not in thumbnails.values()},
+            )
+        else:
+            delete_thumbnails(storage, thumbnails)
+    except Exception:
+        logger.exception("Avatar thumbnail generation failed for profile %s", profile_id)
+    finally:
+        if not THUMBNAILS_SYNC:
+            connections.close_all()
+
+
+def schedule_avatar_thumbnails(profile_id, using=sharding.DEFAULT):
+    """
+    Queue thumbnail generation once the current transaction commits.
+    `using` is the profile's database (a shard with DB_SHARDS).
+    """
+    if THUMBNAILS_SYNC:
+        transaction.on_commit(lambda: generate_avatar_thumbnails(profile_id, using), using=using)
+    else:
+        transaction.on_commit(
+            lambda: _executor.submit(generate_avatar_thumbnails, profile_id, using),
+            using=using,
+        )
@@ -1,14 +1,19 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from .auth_views import signup_user, change_password
+
 from .views import (
     GoalViewSet,
     TaskViewSet,
     ProfileViewSet,
     HabitViewSet,
-    signup_user,
     change_username,
-    change_password,
+    delete_account,
+    import_data,
+    batch,
+    stats,
+    search,
 )
 
 router = DefaultRouter()
@@ -21,5 +26,10 @@ urlpatterns = [
     path("signup/", signup_user),
     path("profile/change-username/", change_username),
     path("profile/change-password/", change_password),
+    path("profile/delete-account/", delete_account),
+    path("import/", import_data),
+    path("batch/", batch),
+    path("stats/", stats),
+    path("search/", search),
     path("", include(router.urls)),
 ]
@@ -1,19 +1,43 @@
-from datetime import date
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.contrib.auth.password_validation import validate_password
-from django.core.exceptions import ValidationError
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
 
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import (
     api_view,
     permission_classes,
+    parser_classes,
     action,
 )
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import Goal, Task, UserProfile, Habit, HabitCompletion
+from .models import (
+    Goal,
+    Task,
+    UserProfile,
+    Habit,
+    HabitCompletion,
+    ArchivedHabitCompletion,
+)
+from .archive import ArchivedReadMixin, include_archived, restore_goal
+from .importers import BulkImporter, detect_format, iter_records
+from .batch import BATCH_MAX_OPERATIONS, BatchError, BatchRunner
+from .concurrency import VersionedViewMixin
+from .localtime import request_today
+from . import fastpath, purge, rollups, search as text_search
+from .completions import (
+    CompletionError,
+    apply_changes,
+    parse_changes,
+    parse_history_window,
+)
 from .serializers import (
+    ArchivedGoalSerializer,
+    ArchivedTaskSerializer,
     GoalSerializer,
     TaskSerializer,
     UserProfileSerializer,
@@ -21,44 +45,33 @@ from .serializers import (
 )
 
 
-# -----------------------------
-# SIGNUP API (PUBLIC)
-# -----------------------------
-@api_view(["POST"])
-@permission_classes([AllowAny])
-def signup_user(request):
-    username = request.data.get("username")
-    password = request.data.get("password")
-
-    if not username or not password:
-        return Response(
-            {"error": "Username and password required"},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-
-    if User.objects.filter(username=username).exists():
-        return Response(
-            {"error": "Username already exists"},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-
-    User.objects.create_user(username=username, password=password)
-    return Response({"success": True}, status=status.HTTP_201_CREATED)
-
-
 # -----------------------------
 # GOALS VIEWSET (USER-BASED)
 # -----------------------------
-class GoalViewSet(viewsets.ModelViewSet):
+class GoalViewSet(ArchivedReadMixin, VersionedViewMixin, viewsets.ModelViewSet):
     serializer_class = GoalSerializer
+    archive_serializer_class = ArchivedGoalSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Goal.objects.filter(user=self.request.user).order_by("order")
+        return Goal.objects.filter(user=self.request.user).order_by("order", "id")
+
+    def get_archived_queryset(self):
+        return super().get_archived_queryset().prefetch_related("tasks").order_by("-completed_at", "id")
+
+    def list_hot(self, request, *args, **kwargs):
+        if not settings.LIST_FAST_PATH:
+            return super().list_hot(request, *args, **kwargs)
+        # same JSON as GoalSerializer, built from .values() (goals/fastpath.py)
+        return Response(fastpath.goal_list(self.filter_queryset(self.get_queryset())))
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def perform_destroy(self, instance):
+        # hidden now, tasks / habits purged in the background (goals/purge.py)
+        purge.soft_delete_goal(instance)
+
     @action(detail=True, methods=["patch"])
     def reorder(self, request, pk=None):
         goal = self.get_object()
@@ -71,20 +84,43 @@ class GoalViewSet(viewsets.ModelViewSet):
             )
 
         goal.order = new_order
-        goal.save()
+        # order isn't client-editable through PATCH, so no version bump
+        goal.save(update_fields=["order"])
         return Response({"success": True})
 
+    @action(detail=True, methods=["post"])
+    def restore(self, request, pk=None):
+        """Move an archived goal (goals/archive.py) back with its tasks."""
+        archived = get_object_or_404(self.get_archived_queryset(), pk=pk)
+        goal = restore_goal(archived)
+        return Response(self.get_serializer(goal).data)
+
 
 # -----------------------------
 # TASKS VIEWSET
 # -----------------------------
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ArchivedReadMixin, VersionedViewMixin, viewsets.ModelViewSet):
     serializer_class = TaskSerializer
+    archive_serializer_class = ArchivedTaskSerializer
+    archive_owner_field = "goal__user"
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        # Only tasks of goals belonging to logged-in user
-        return Task.objects.filter(goal__user=self.request.user)
+        # Only tasks of goals belonging to logged-in user; the goal comes
+        # along for the progress update and the save signals
+        return (
+            Task.objects.filter(goal__user=self.request.user, goal__deleted_at__isnull=True)
+            .select_related("goal")
+            .order_by("id")
+        )
+
+    def get_archived_queryset(self):
+        return super().get_archived_queryset().select_related("goal")
+
+    def list_hot(self, request, *args, **kwargs):
+        if not settings.LIST_FAST_PATH:
+            return super().list_hot(request, *args, **kwargs)
+        return Response(fastpath.task_list(self.filter_queryset(self.get_queryset())))
 
     def perform_create(self, serializer):
         task = serializer.save()
@@ -100,13 +136,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         self.update_goal_progress(goal)
 
     def update_goal_progress(self, goal):
-        tasks = goal.tasks.all()
-        total = tasks.count()
-        done = tasks.filter(completed=True).count()
-
-        goal.progress = int((done / total) * 100) if total > 0 else 0
-        goal.is_completed = goal.progress == 100
-        goal.save()
+        goal.recalculate_progress()
 
 
 # -----------------------------
@@ -121,11 +151,22 @@ class ProfileViewSet(viewsets.ModelViewSet):
 
     # GET /api/profile/
     def list(self, request, *args, **kwargs):
-        profile, created = UserProfile.objects.get_or_create(user=request.user)
+        # CachedJWTAuthentication already attached the profile to the user
+        try:
+            profile = request.user.profile
+        except UserProfile.DoesNotExist:
+            profile, created = UserProfile.objects.get_or_create(user=request.user)
         serializer = self.get_serializer(profile)
         return Response(serializer.data)
     # PATCH /api/profile/<id>/ works with default update()
 
+    def perform_update(self, serializer):
+        old_timezone = serializer.instance.timezone
+        profile = serializer.save()
+        # the rollups are bucketed by the user's local day
+        if profile.timezone != old_timezone:
+            rollups.rebuild([profile.user_id])
+
 
 # -----------------------------
 # CHANGE USERNAME
@@ -161,35 +202,14 @@ def change_username(request):
 
 
 # -----------------------------
-# CHANGE PASSWORD
+# DELETE ACCOUNT
 # -----------------------------
-@api_view(["POST"])
+@api_view(["DELETE"])
 @permission_classes([IsAuthenticated])
-def change_password(request):
-    old_password = request.data.get("old_password")
-    new_password = request.data.get("new_password")
-
-    if not old_password or not new_password:
-        return Response(
-            {"error": "Old and new password are required"},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-
-    if not request.user.check_password(old_password):
-        return Response(
-            {"error": "Old password is incorrect"},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-
-    try:
-        validate_password(new_password, user=request.user)
-    except ValidationError as e:
-        return Response({"error": list(e.messages)}, status=status.HTTP_400_BAD_REQUEST)
-
-    request.user.set_password(new_password)
-    request.user.save()
-
-    return Response({"success": True})
+def delete_account(request):
+    # logs the user out everywhere at once; the data goes in the background
+    purge.soft_delete_user(request.user)
+    return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 # -----------------------------
@@ -200,25 +220,79 @@ class HabitViewSet(viewsets.ModelViewSet):
     /api/habits/          GET, POST
     /api/habits/<id>/     GET, PUT, PATCH, DELETE
     /api/habits/<id>/toggle/   POST
+    /api/habits/completions/   POST (bulk check / uncheck)
+
+    Reads return completions for the last HABIT_HISTORY_WEEKS weeks;
+    use ?since= / ?until= (YYYY-MM-DD), ?history=all and
+    ?encoding=dates|offsets|bits to change that. Completions from
+    archived years need ?include_archived=true (or only).
     """
     serializer_class = HabitSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Habit.objects.filter(user=self.request.user).select_related("goal")
+        qs = Habit.objects.filter(user=self.request.user, goal__deleted_at__isnull=True).select_related("goal")
+        if settings.HABIT_BITMAP_READS:
+            qs = qs.prefetch_related("year_bitmaps")
+        if self.include_archived:
+            window = self.history_window
+            archived = ArchivedHabitCompletion.objects.all()
+            if window.since is not None:
+                archived = archived.filter(date__gte=window.since)
+            if window.until is not None:
+                archived = archived.filter(date__lte=window.until)
+            qs = qs.prefetch_related(Prefetch("archived_completions", queryset=archived))
+        return qs
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["history_window"] = self.history_window
+        context["today"] = self.today
+        context["include_archived"] = self.include_archived
+        return context
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # one local "today" for toggles, streaks and the history window
+        self.today = request_today(request)
+        try:
+            self.history_window = parse_history_window(request.query_params, self.today)
+        except CompletionError as e:
+            raise ParseError({"error": str(e)})
+        self.include_archived = include_archived(request.query_params)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(detail=False, methods=["post"])
+    def completions(self, request):
+        """
+        Set / clear many (habit, date) cells at once:
+        {"changes": [{"habit": 1, "date": "2024-05-01", "done": true}, ...]}
+
+        Returns only the cells that changed and the new streaks,
+        not the full habit histories.
+        """
+        try:
+            cells = parse_changes(request.user, request.data.get("changes"))
+        except CompletionError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        changed, streaks = apply_changes(cells, self.today)
+        return Response(
+            {"changed": changed, "streaks": streaks},
+            status=status.HTTP_200_OK,
+        )
+
     @action(detail=True, methods=["post"])
     def toggle(self, request, pk=None):
         """
-        Toggle completion for TODAY for this habit.
+        Toggle completion for TODAY (in the user's timezone) for this habit.
         If already completed today -> uncheck.
         If not -> mark completed today.
         """
         habit = self.get_object()
-        today = date.today()
+        today = self.today
 
         completion, created = HabitCompletion.objects.get_or_create(
             habit=habit, date=today
@@ -231,6 +305,9 @@ class HabitViewSet(viewsets.ModelViewSet):
         else:
             message = "checked"
 
+        # bitmaps were prefetched before the toggle
+        getattr(habit, "_prefetched_objects_cache", {}).pop("year_bitmaps", None)
+
         serializer = self.get_serializer(habit)
         return Response(
             {"status": message, "habit": serializer.data},
@@ -238,3 +315,152 @@ class HabitViewSet(viewsets.ModelViewSet):
         )
 
 
+
+
+# -----------------------------
+# BULK IMPORT (JSONL / CSV)
+# -----------------------------
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser])
+def import_data(request):
+    """
+    POST /api/import/   multipart: file=<.jsonl|.csv>, format=jsonl|csv (optional)
+
+    Rows are parsed incrementally and inserted in bulk batches.
+    See goals/importers.py for the record format.
+    """
+    upload = request.FILES.get("file")
+    if upload is None:
+        return Response(
+            {"error": "Upload a file in the 'file' field"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    fmt = detect_format(upload, request.data.get("format"))
+    if fmt is None:
+        return Response(
+            {"error": "Unknown format, use .jsonl or .csv"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    result = BulkImporter(request.user).run(iter_records(upload, fmt))
+    return Response(result, status=status.HTTP_200_OK)
+
+
+# -----------------------------
+# BATCH OPERATIONS
+# -----------------------------
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def batch(request):
+    """
+    POST /api/batch/   {"operations": [{"op", "model", "id", "ref", "data"}, ...]}
+
+    All operations run in one transaction; see goals/batch.py.
+    """
+    operations = request.data.get("operations")
+
+    if not isinstance(operations, list) or not operations:
+        return Response(
+            {"error": "operations must be a non-empty list"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return Response(
+            {"error": f"At most {BATCH_MAX_OPERATIONS} operations per batch"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        result = BatchRunner(request).run(operations)
+    except BatchError as e:
+        # nothing was committed
+        return Response(
+            {"error": "Batch rolled back", "index": e.index, "errors": e.errors},
+            status=e.code,
+        )
+
+    return Response(result, status=status.HTTP_200_OK)
+
+
+# -----------------------------
+# ANALYTICS ROLLUPS
+# -----------------------------
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def stats(request):
+    """
+    GET /api/stats/?period=day|week&since=YYYY-MM-DD&until=YYYY-MM-DD
+
+    Reads the precomputed per-user rollups (goals/rollups.py).
+    Defaults to the last 30 days / 12 weeks up to the user's today.
+    """
+    period = request.query_params.get("period") or "day"
+    if period not in rollups.PERIODS:
+        return Response(
+            {"error": "period must be day or week"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        since, until = rollups.parse_range(
+            period, request.query_params, request_today(request)
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        "period": period,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "results": rollups.series(request.user, period, since, until),
+    })
+
+
+# -----------------------------
+# SEARCH
+# -----------------------------
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def search(request):
+    """
+    GET /api/search/?q=<text>&type=goal|task|habit&limit=20&offset=0
+
+    Ranked full-text search over the user's goals, tasks and habits
+    (goals/search.py). `next_offset` is null on the last page.
+    """
+    q = (request.query_params.get("q") or "").strip()
+    if not q:
+        return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+    kind = request.query_params.get("type") or None
+    if kind is not None and kind not in text_search.KINDS:
+        return Response(
+            {"error": "type must be goal, task or habit"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        limit = int(request.query_params.get("limit", SEARCH_PAGE_SIZE))
+        offset = int(request.query_params.get("offset", 0))
+    except ValueError:
+        return Response(
+            {"error": "limit and offset must be integers"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    limit = max(1, min(limit, SEARCH_MAX_PAGE_SIZE))
+    offset = max(0, offset)
+
+    results, has_more = text_search.search(request.user, q, kind, limit, offset)
+    return Response({
+        "query": q,
+        "results": results,
+        "offset": offset,
+        "next_offset": offset + limit if has_more else None,
+    })
@@ -49,7 +49,21 @@ function App() {
       axios.defaults.headers.common["Authorization"] = `Bearer ${token}`;
       axios
         .get("http://127.0.0.1:8000/api/profile/")
-        .then((res) => setProfile(res.data))
+        .then((res) => {
+          setProfile(res.data);
+
+          // habits roll over at the user's local midnight, so keep the
+          // profile timezone in sync with the browser
+          const tz = Intl.DateTimeFormat().resolvedOptions().timeZone;
+          if (tz && res.data.timezone !== tz) {
+            axios
+              .patch(`http://127.0.0.1:8000/api/profile/${res.data.id}/`, {
+                timezone: tz,
+              })
+              .then((r) => setProfile(r.data))
+              .catch((err) => console.log("Timezone update error:", err));
+          }
+        })
         .catch((err) => console.log("Profile load error:", err));
     }
   }, [token]);
@@ -93,9 +107,12 @@ function App() {
       return "https://ui-avatars.com/api/?name=User&background=0D8ABC&color=fff";
     }
 
-    return profile.avatar.startsWith("http")
-      ? profile.avatar
-      : `http://127.0.0.1:8000${profile.avatar}`;
+    // small header icon: prefer the 64px thumbnail over the original upload
+    const avatar = profile.avatar_thumbnails?.["64"] || profile.avatar;
+
+    return avatar.startsWith("http")
+      ? avatar
+      : `http://127.0.0.1:8000${avatar}`;
   };
 
   return (
@@ -58,21 +58,138 @@ function Goals({ token }) {
   }, [token]);
 
   // Load goals
-  useEffect(() => {
+  const loadGoals = () =>
     axios
       .get("http://127.0.0.1:8000/api/goals/")
       .then((res) => setGoals(res.data))
       .catch((err) => console.error("Error fetching goals:", err));
+
+  useEffect(() => {
+    loadGoals();
   }, []);
 
-  // Create Goal
-  const createGoal = (goal) => {
+  // Keep the detail modal on the fresh copy of its goal (null once deleted)
+  useEffect(() => {
+    syncDetailGoal(goals);
+  }, [goals]);
+
+  // Latest goals for the batch queue below, which runs outside render
+  const goalsRef = useRef(goals);
+  goalsRef.current = goals;
+
+  // ---------------- BATCHED TASK CHANGES (/api/batch/) ----------------
+  // Task toggles / edits / deletes show up at once and are sent together
+  // BATCH_DELAY_MS after the last one: a burst of clicks is one request,
+  // in one transaction. Changes to the same task are merged. If anything
+  // was changed elsewhere in the meantime (412), the whole batch is
+  // rolled back on the server and the goals are reloaded.
+  const pendingTaskOps = useRef([]);
+  const batchTimer = useRef(null);
+  const batchInFlight = useRef(false);
+
+  const findTask = (goalList, taskId) => {
+    for (const goal of goalList) {
+      const task = (goal.tasks || []).find((t) => t.id === taskId);
+      if (task) return task;
+    }
+    return null;
+  };
+
+  // Replace / drop tasks in state and recompute their goals' progress
+  const patchTasks = (goalList, updated = [], removedIds = []) =>
+    goalList.map((goal) => {
+      const mine = updated.filter((t) => t.goal === goal.id);
+      const hasRemoved = (goal.tasks || []).some((t) => removedIds.includes(t.id));
+      if (!mine.length && !hasRemoved) return goal;
+
+      const updatedTasks = (goal.tasks || [])
+        .filter((t) => !removedIds.includes(t.id))
+        .map((t) => mine.find((u) => u.id === t.id) || t);
+      return {
+        ...goal,
+        tasks: updatedTasks,
+        progress: calculateProgress(updatedTasks),
+      };
+    });
+
+  const flushTaskOps = () => {
+    batchTimer.current = null;
+    if (batchInFlight.current) {
+      batchTimer.current = setTimeout(flushTaskOps, BATCH_DELAY_MS);
+      return;
+    }
+    const pending = pendingTaskOps.current;
+    pendingTaskOps.current = [];
+    if (!pending.length) return;
+
+    // versions are read now: an earlier batch may have moved them on
+    const operations = pending.map(({ op, id, data }) => {
+      const task = findTask(goalsRef.current, id);
+      const operation = { op, model: "task", id, version: task ? task.version : undefined };
+      return op === "update" ? { ...operation, data } : operation;
+    });
+
+    batchInFlight.current = true;
     axios
-      .post("http://127.0.0.1:8000/api/goals/", goal)
+      .post("http://127.0.0.1:8000/api/batch/", { operations })
       .then((res) => {
-        const updatedGoals = [...goals, { ...res.data, tasks: [] }];
-        setGoals(updatedGoals);
-        syncDetailGoal(updatedGoals);
+        const saved = res.data.results.filter((r) => r.data).map((r) => r.data);
+        setGoals((prev) =>
+          patchTasks(prev, saved).map((g) =>
+            res.data.goals[g.id] ? { ...g, ...res.data.goals[g.id] } : g
+          )
+        );
+      })
+      .catch((err) => {
+        if (isConflict(err)) {
+          alert("Some tasks were changed on another device. Showing the latest version.");
+        } else {
+          console.error("Error saving tasks:", err);
+        }
+        loadGoals();
+      })
+      .finally(() => {
+        batchInFlight.current = false;
+      });
+  };
+
+  const queueTaskOp = (op, task, changes = {}) => {
+    const queue = pendingTaskOps.current;
+    const pending = queue.find((p) => p.id === task.id);
+
+    if (op === "delete") {
+      pendingTaskOps.current = queue.filter((p) => p.id !== task.id);
+      pendingTaskOps.current.push({ op, id: task.id });
+      setGoals((prev) => patchTasks(prev, [], [task.id]));
+    } else {
+      if (pending) Object.assign(pending.data, changes);
+      else queue.push({ op, id: task.id, data: { ...changes } });
+      setGoals((prev) => patchTasks(prev, [{ ...task, ...changes }]));
+    }
+
+    clearTimeout(batchTimer.current);
+    batchTimer.current = setTimeout(flushTaskOps, BATCH_DELAY_MS);
+  };
+
+  // Create Goal, with its first tasks, in one batch
+  const createGoal = ({ tasks = [], ...goal }) => {
+    const operations = [
+      { op: "create", model: "goal", ref: "goal", data: goal },
+      ...tasks.map((title) => ({
+        op: "create",
+        model: "task",
+        data: { goal: "@goal", title, completed: false },
+      })),
+    ];
+
+    axios
+      .post("http://127.0.0.1:8000/api/batch/", { operations })
+      .then((res) => {
+        const [created, ...newTasks] = res.data.results.map((r) => r.data);
+        setGoals((prev) => [
+          ...prev,
+          { ...created, ...(res.data.goals[created.id] || {}), tasks: newTasks },
+        ]);
         setShowGoalModal(false);
       })
       .catch((err) => console.error("Error creating goal:", err));
@@ -83,10 +200,7 @@ function Goals({ token }) {
     axios
       .delete(`http://127.0.0.1:8000/api/goals/${goalId}/`)
       .then(() => {
-        const updatedGoals = goals.filter((g) => g.id !== goalId);
-        setGoals(updatedGoals);
-        // if this goal is opened in detail modal, close it
-        setDetailGoal((prev) => (prev && prev.id === goalId ? null : prev));
+        setGoals((prev) => prev.filter((g) => g.id !== goalId));
       })
       .catch((err) => console.error("Error deleting goal:", err));
   };
@@ -98,129 +212,69 @@ function Goals({ token }) {
       .then((res) => {
         const newTask = res.data;
 
-        const updatedGoals = goals.map((goal) => {
-          if (goal.id === newTask.goal) {
-            const updatedTasks = [...(goal.tasks || []), newTask];
-            return {
-              ...goal,
-              tasks: updatedTasks,
-              progress: calculateProgress(updatedTasks),
-            };
-          }
-          return goal;
-        });
-
-        setGoals(updatedGoals);
-        syncDetailGoal(updatedGoals);
+        setGoals((prev) =>
+          prev.map((goal) => {
+            if (goal.id === newTask.goal) {
+              const updatedTasks = [...(goal.tasks || []), newTask];
+              return {
+                ...goal,
+                tasks: updatedTasks,
+                progress: calculateProgress(updatedTasks),
+              };
+            }
+            return goal;
+          })
+        );
         setShowTaskModal(false);
       })
       .catch((err) => console.error("Error creating task:", err));
   };
 
+  // Only apply an edit if the server copy is still the one we have.
+  // On 412 the response carries the current row.
+  const ifMatch = (item) => ({ headers: { "If-Match": `"${item.version}"` } });
+  const isConflict = (err) => err.response && err.response.status === 412;
+
   // Update goal details
   const handleUpdateGoal = (updatedGoal) => {
+    const applyGoal = (saved) => {
+      setGoals((prev) =>
+        prev.map((g) => (g.id === saved.id ? { ...saved, tasks: g.tasks } : g))
+      );
+      setShowEditModal(false);
+    };
+
     axios
       .patch(
         `http://127.0.0.1:8000/api/goals/${updatedGoal.id}/`,
-        updatedGoal
+        updatedGoal,
+        ifMatch(updatedGoal)
       )
-      .then((res) => {
-        const saved = res.data;
-
-        const updatedGoals = goals.map((g) =>
-          g.id === saved.id ? { ...saved, tasks: g.tasks } : g
-        );
-
-        setGoals(updatedGoals);
-        syncDetailGoal(updatedGoals);
-        setShowEditModal(false);
-      })
-      .catch((err) => console.error("Error updating goal:", err));
+      .then((res) => applyGoal(res.data))
+      .catch((err) => {
+        if (isConflict(err)) {
+          alert("This goal was changed on another device. Showing the latest version.");
+          return applyGoal(err.response.data.current);
+        }
+        console.error("Error updating goal:", err);
+      });
   };
 
   // Toggle task completed
   const toggleTask = (task) => {
-    axios
-      .patch(`http://127.0.0.1:8000/api/tasks/${task.id}/`, {
-        completed: !task.completed,
-      })
-      .then((res) => {
-        const updated = res.data;
-
-        const updatedGoals = goals.map((goal) => {
-          if (goal.id === updated.goal) {
-            const updatedTasks = (goal.tasks || []).map((t) =>
-              t.id === updated.id ? updated : t
-            );
-
-            return {
-              ...goal,
-              tasks: updatedTasks,
-              progress: calculateProgress(updatedTasks),
-            };
-          }
-          return goal;
-        });
-
-        setGoals(updatedGoals);
-        syncDetailGoal(updatedGoals); // 🔥 keep modal in sync
-      })
-      .catch((err) => console.error("Error updating task:", err));
+    queueTaskOp("update", task, { completed: !task.completed });
   };
 
   // Edit Task Save
   const handleEditTask = (task) => {
-    axios
-      .patch(`http://127.0.0.1:8000/api/tasks/${task.id}/`, task)
-      .then((res) => {
-        const updated = res.data;
-
-        const updatedGoals = goals.map((goal) => {
-          if (goal.id === updated.goal) {
-            const updatedTasks = (goal.tasks || []).map((t) =>
-              t.id === updated.id ? updated : t
-            );
-
-            return {
-              ...goal,
-              tasks: updatedTasks,
-              progress: calculateProgress(updatedTasks),
-            };
-          }
-          return goal;
-        });
-
-        setGoals(updatedGoals);
-        syncDetailGoal(updatedGoals);
-        setShowEditTaskModal(false);
-      })
-      .catch((err) => console.error("Error saving task:", err));
+    queueTaskOp("update", task, { title: task.title });
+    setShowEditTaskModal(false);
   };
 
   // Delete Task
   const handleDeleteTask = (task) => {
-    axios
-      .delete(`http://127.0.0.1:8000/api/tasks/${task.id}/`)
-      .then(() => {
-        const updatedGoals = goals.map((goal) => {
-          if (goal.id === task.goal) {
-            const updatedTasks = (goal.tasks || []).filter(
-              (t) => t.id !== task.id
-            );
-            return {
-              ...goal,
-              tasks: updatedTasks,
-              progress: calculateProgress(updatedTasks),
-            };
-          }
-          return goal;
-        });
-
-        setGoals(updatedGoals);
-        syncDetailGoal(updatedGoals);
-        setShowEditTaskModal(false);
-      })
-      .catch((err) => console.error("Error deleting task:", err));
+    queueTaskOp("delete", task);
+    setShowEditTaskModal(false);
   };
 
   // Drag + Drop
@@ -521,12 +575,16 @@ function Goals({ token }) {
           setSelectedAIGoal(null);
         }}
         goal={selectedAIGoal}
+        goals={goals}
         token={token}
       />
     </>
   );
 }
 
+// Wait this long after the last task change before sending the batch
+const BATCH_DELAY_MS = 300;
+
 // Progress calc
 const calculateProgress = (tasks) => {
   if (!tasks || tasks.length === 0) return 0;
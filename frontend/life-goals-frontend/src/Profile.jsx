@@ -41,11 +41,12 @@ function Profile({ token }) {
         //     ? `http://127.0.0.1:8000${res.data.avatar}`
         //     : "https://via.placeholder.com/120"
         // );
+        const avatar = res.data.avatar_thumbnails?.["256"] || res.data.avatar;
         setPreview(
-  res.data.avatar
-    ? (res.data.avatar.startsWith("http")
-        ? res.data.avatar
-        : `http://127.0.0.1:8000${res.data.avatar}`
+  avatar
+    ? (avatar.startsWith("http")
+        ? avatar
+        : `http://127.0.0.1:8000${avatar}`
       )
     : "https://via.placeholder.com/120"
 );
@@ -1,8 +1,12 @@
 
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import axios from "axios";
 
-function AISuggestionsModal({ isOpen, onClose, goal, token }) {
+// Goals sent per batch request: the backend answers up to
+// AI_BATCH_GOALS_PER_CALL (25) of them with one upstream AI call
+const SUGGESTION_BATCH_SIZE = 25;
+
+function AISuggestionsModal({ isOpen, onClose, goal, goals = [], token }) {
   const [loading, setLoading] = useState(false);
   const [taskLoading, setTaskLoading] = useState(false);
 
@@ -11,6 +15,10 @@ function AISuggestionsModal({ isOpen, onClose, goal, token }) {
 
   const [taskCount, setTaskCount] = useState(3);
 
+  // goal id -> suggestions, kept while the page is open (the modal stays
+  // mounted), so opening it for another goal doesn't need a new request
+  const suggestionCache = useRef({});
+
   // ----------------------------------------------------
   // 🔥 RESET ALL STATES WHEN MODAL OPENS OR GOAL CHANGES
   // ----------------------------------------------------
@@ -29,18 +37,43 @@ function AISuggestionsModal({ isOpen, onClose, goal, token }) {
   if (!isOpen || !goal) return null;
 
   // 1️⃣ Generate Suggestions
+  // One batch request covers this goal and the other open goals without
+  // suggestions yet; asking again for the same goal gets fresh ones.
   const handleGenerateSuggestions = async () => {
+    const cache = suggestionCache.current;
+    if (cache[goal.id] && suggestions.length === 0) {
+      setSuggestions(cache[goal.id]);
+      return;
+    }
+
     setLoading(true);
     setSuggestions([]);
 
+    const others = cache[goal.id]
+      ? []
+      : goals
+          .filter((g) => g.id !== goal.id && (g.progress || 0) < 100 && !cache[g.id])
+          .map((g) => g.id);
+    const headers = { Authorization: `Bearer ${token}` };
+
     try {
       const res = await axios.post(
-        "http://127.0.0.1:8000/api/ai/suggestions/",
-        { goal_id: goal.id },
-        { headers: { Authorization: `Bearer ${token}` } }
+        "http://127.0.0.1:8000/api/ai/suggestions/batch/",
+        { goal_ids: [goal.id, ...others].slice(0, SUGGESTION_BATCH_SIZE) },
+        { headers }
       );
-
-      setSuggestions(res.data.list || []);
+      Object.assign(cache, res.data.results);
+
+      // "failed": the batch answer skipped this goal, ask for it alone
+      if (!res.data.results[goal.id] && res.data.failed.includes(goal.id)) {
+        const single = await axios.post(
+          "http://127.0.0.1:8000/api/ai/suggestions/",
+          { goal_id: goal.id },
+          { headers }
+        );
+        cache[goal.id] = single.data.list || [];
+      }
+      setSuggestions(cache[goal.id] || []);
     } catch (err) {
       console.error("AI Error:", err);
     }
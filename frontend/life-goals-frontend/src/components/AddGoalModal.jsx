@@ -8,6 +8,7 @@ function AddGoalModal({ isOpen, onClose, onSave }) {
   const [endDate, setEndDate] = useState("");
   const [category, setCategory] = useState("Other");
   const [priority, setPriority] = useState("Medium");
+  const [tasks, setTasks] = useState("");
 
   if (!isOpen) return null;
 
@@ -85,6 +86,15 @@ function AddGoalModal({ isOpen, onClose, onSave }) {
           <option>Low</option>
         </select>
 
+        {/* First tasks, saved together with the goal */}
+        <label className="block mb-2">First tasks (one per line)</label>
+        <textarea
+          className="w-full p-2 border rounded mb-4 bg-white dark:bg-slate-700 dark:border-slate-600"
+          rows="3"
+          value={tasks}
+          onChange={(e) => setTasks(e.target.value)}
+        ></textarea>
+
         {/* Buttons */}
         <div className="flex justify-end gap-4 mt-4">
           <button
@@ -104,6 +114,10 @@ function AddGoalModal({ isOpen, onClose, onSave }) {
                 end_date: endDate,
                 category,
                 priority,
+                tasks: tasks
+                  .split("\n")
+                  .map((t) => t.trim())
+                  .filter(Boolean),
               })
             }
           >
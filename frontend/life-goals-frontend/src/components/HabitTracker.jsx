@@ -356,11 +356,34 @@ function HabitCalendar({ habits }) {
     setSelectedDate(null);
   };
 
+  // /api/habits/ only returns the last 6 weeks of completions, which
+  // covers the current month. Other months load their own window.
+  const [monthHabits, setMonthHabits] = useState(null);
+
+  useEffect(() => {
+    const now = new Date();
+    if (year === now.getFullYear() && month === now.getMonth()) {
+      setMonthHabits(null);
+      return;
+    }
+
+    const toLocalDate = (d) => d.toLocaleDateString("en-CA");
+    const since = toLocalDate(new Date(year, month, -6));
+    const until = toLocalDate(new Date(year, month + 1, 14));
+
+    axios
+      .get(`http://127.0.0.1:8000/api/habits/?since=${since}&until=${until}`)
+      .then((res) => setMonthHabits(res.data))
+      .catch((err) => console.log("Habit history load error:", err));
+  }, [year, month, habits]);
+
+  const sourceHabits = monthHabits || habits;
+
   // Filter habits by selected habit
   const filteredHabits =
     habitFilter === "all"
-      ? habits
-      : habits.filter((h) => String(h.id) === String(habitFilter));
+      ? sourceHabits
+      : sourceHabits.filter((h) => String(h.id) === String(habitFilter));
 
   const days = buildMonthGrid(year, month, filteredHabits);
 